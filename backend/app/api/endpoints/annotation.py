@@ -1,16 +1,33 @@
 from fastapi import APIRouter
 from app.services.annotation import AnnotationService
 from app.schemas.annotation import AnnotationRequest, AnnotationResponse
+from app.utils.streaming import ndjson_response
 
 router = APIRouter()
 
 
 @router.post("/generate", response_model=AnnotationResponse)
 async def generate_annotation(request: AnnotationRequest):
-    annotation, provider = AnnotationService.generate_annotation(
+    annotation, provider = await AnnotationService.agenerate_annotation(
         filename=request.filename,
         provider=request.provider,
         max_length=request.max_length,
-        chunk_size=request.chunk_size
+        chunk_size=request.chunk_size,
+        reduce_mode=request.reduce_mode
     )
     return AnnotationResponse(annotation=annotation, provider=provider)
+
+
+@router.post("/generate/stream")
+async def stream_annotation(request: AnnotationRequest):
+    """Stream annotation progress as NDJSON events, ending with "done" (or "error")."""
+    # Once streaming starts the status is 200, so reject bad requests first
+    AnnotationService.get_file_path(request.filename)
+    AnnotationService.get_llm_provider(request.provider)
+    return ndjson_response(AnnotationService.astream_annotation(
+        filename=request.filename,
+        provider=request.provider,
+        max_length=request.max_length,
+        chunk_size=request.chunk_size,
+        reduce_mode=request.reduce_mode
+    ))
@@ -1,29 +1,48 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
 from app.services.file_manager.file_service import FileService
 from app.services.rag.vector_db import VectorDBService
-from typing import List
+from typing import List, Literal, Optional
 from app.schemas.file import FileInfo
 
-router = APIRouter()
+
+class UploadLimitRoute(APIRoute):
+    """Checks Content-Length before FastAPI reads and parses the request body."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            FileService.check_content_length(request.headers.get("content-length"))
+            return await handler(request)
+
+        return limited_handler
+
+
+router = APIRouter(route_class=UploadLimitRoute)
 
 
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)) -> FileInfo:
     try:
-        filename = await FileService.upload_file(file)
-        return FileInfo(
-            filename=filename,
-            size=0,  # Size will be updated when listing files
-            uploaded_at="",  # Timestamp will be updated when listing files
-        )
+        return FileInfo.from_catalog(await FileService.upload_file(file))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/", response_model=List[FileInfo])
-async def list_files() -> List[FileInfo]:
+def list_files(response: Response, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+               sort: Literal["uploaded_at", "filename", "size", "chunk_count", "status"] = "uploaded_at",
+               order: Literal["asc", "desc"] = "desc", status: Optional[str] = None) -> List[FileInfo]:
+    """A page of the file catalog; the total count is in the X-Total-Count header."""
     try:
-        return FileService.get_file_list()
+        files, total = FileService.get_file_list(offset, limit, sort, order, status)
+        response.headers["X-Total-Count"] = str(total)
+        return [FileInfo.from_catalog(entry) for entry in files]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
-from app.schemas.chunk import ChunkingRequest, ChunkingResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from typing import List, Optional
+from app.schemas.chunk import (
+    ChunkingRequest, ChunkingResponse, CollectionList, CollectionInfo, ReembedRequest
+)
 from app.schemas.retrieval import RetrievalRequest, RetrievalResponse
+from app.schemas.embedding import EmbeddingBenchmarkRequest
+from app.schemas.ingestion import IngestionJobInfo, IngestionJobList, BulkDirectoryRequest
 from app.services.rag.chunking import ChunkingService
 from app.services.rag.retrieval import RetrievalService
 from app.services.rag.vector_db import VectorDBService
+from app.services.rag.embeddings import EmbeddingModelRegistry
+from app.services.rag.embedding_benchmark import EmbeddingBenchmarkService
+from app.services.rag.ingestion_jobs import IngestionJobService
+from app.services.rag.bulk_ingestion import BulkIngestionService
+from app.services.rag.reranker import RerankerService
+from app.services.rag.reembedding import ReembeddingService
+from app.services.rag.vector_store import VectorStoreManager
 
 router = APIRouter()
 chunking_service = ChunkingService()
@@ -14,8 +25,9 @@ retrieval_service = RetrievalService()
 @router.post("/chunk", response_model=ChunkingResponse)
 def chunk_file(request: ChunkingRequest):
     try:
-        chunk_count = ChunkingService.process_file(request.filename)
-        return ChunkingResponse(filename=request.filename, chunk_count=chunk_count)
+        result = ChunkingService.ingest_file(
+            request.filename, collection=request.collection, tags=request.tags)
+        return ChunkingResponse(filename=request.filename, **result)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -23,11 +35,65 @@ def chunk_file(request: ChunkingRequest):
             status_code=500, detail=f"Error chunking file: {str(e)}")
 
 
+@router.post("/jobs", response_model=IngestionJobInfo, status_code=202)
+def create_ingestion_job(request: ChunkingRequest):
+    options = {"tags": request.tags} if request.tags else {}
+    if request.collection:
+        options["collection"] = VectorStoreManager.validate_collection_name(
+            request.collection)
+    return IngestionJobService.submit(request.filename, options=options)
+
+
+def submit_bulk_job(source: str, filenames: list[str], failures: list[dict],
+                    collection: str | None, tags: list[str]) -> dict:
+    options = {"filenames": filenames, "failures": failures, "tags": tags}
+    if collection:
+        options["collection"] = collection
+    return IngestionJobService.submit(
+        f"{source} ({len(filenames) + len(failures)} files)", kind="bulk", options=options)
+
+
+@router.post("/bulk/zip", response_model=IngestionJobInfo, status_code=202)
+def bulk_ingest_zip(file: UploadFile = File(...), collection: Optional[str] = Form(None),
+                    tags: Optional[str] = Form(None, description="Comma-separated tags")):
+    """Unpack a ZIP of .txt/.pdf files into uploads and ingest them as one background job."""
+    collection = VectorStoreManager.validate_collection_name(collection) if collection else None
+    filenames, failures = BulkIngestionService.stage_zip(file.file)
+    tag_list = [tag for tag in (tags or "").split(",") if tag.strip()]
+    return submit_bulk_job(file.filename, filenames, failures, collection, tag_list)
+
+
+@router.post("/bulk/directory", response_model=IngestionJobInfo, status_code=202)
+def bulk_ingest_directory(request: BulkDirectoryRequest):
+    """Ingest every supported file under a directory inside BULK_INGEST_ROOT."""
+    collection = VectorStoreManager.validate_collection_name(
+        request.collection) if request.collection else None
+    filenames, failures = BulkIngestionService.stage_directory(request.directory)
+    return submit_bulk_job(request.directory, filenames, failures, collection, request.tags)
+
+
+@router.get("/jobs", response_model=IngestionJobList)
+def list_ingestion_jobs(status: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    return IngestionJobList(jobs=IngestionJobService.list_jobs(status, limit))
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobInfo)
+def get_ingestion_job(job_id: str):
+    return IngestionJobService.get(job_id)
+
+
+@router.delete("/jobs/{job_id}", response_model=IngestionJobInfo)
+def cancel_ingestion_job(job_id: str):
+    return IngestionJobService.cancel(job_id)
+
+
 @router.post("/retrieve", response_model=RetrievalResponse)
 def retrieve_chunks(request: RetrievalRequest):
     try:
         chunks = RetrievalService.retrieve_relevant_chunks(
-            request.query, request.top_k, request.provider
+            request.query, request.top_k, request.provider, request.mode, request.rerank,
+            collection=request.collection, filenames=request.filenames, tags=request.tags,
+            ingested_after=request.ingested_after, ingested_before=request.ingested_before
         )
         return RetrievalResponse(chunks=chunks, provider=request.provider)
     except HTTPException as e:
@@ -37,6 +103,53 @@ def retrieve_chunks(request: RetrievalRequest):
             status_code=500, detail=f"Error retrieving chunks: {str(e)}")
 
 
+@router.get("/collections", response_model=CollectionList)
+def list_collections():
+    return CollectionList(collections=VectorDBService.list_collections())
+
+
+@router.get("/collections/{collection}", response_model=CollectionInfo)
+def get_collection(collection: str):
+    """Embedding model, dimension and normalisation the collection is bound to."""
+    return VectorDBService.describe_collection(collection)
+
+
+@router.post("/collections/{collection}/reembed", response_model=IngestionJobInfo, status_code=202)
+def reembed_collection(collection: str, request: ReembedRequest):
+    """Re-embed a collection with another model as a background job; the
+    current embeddings keep serving queries until the job switches over."""
+    options = ReembeddingService.prepare(collection, request.model_name, request.normalize)
+    return IngestionJobService.submit(options["collection"], kind="reembed", options=options)
+
+
 @router.delete("/clear")
-def clear_vector_db():
-    return VectorDBService.clear_collection()
+def clear_vector_db(collection: Optional[str] = None):
+    return VectorDBService.clear_collection(collection)
+
+
+@router.post("/lexical/rebuild")
+def rebuild_lexical_index(collection: Optional[str] = None):
+    return VectorDBService.rebuild_lexical_index(collection)
+
+
+@router.get("/cache/stats")
+def get_retrieval_cache_stats():
+    return RetrievalService.get_cache_stats()
+
+
+@router.get("/embeddings/stats")
+def get_embedding_stats():
+    return {"models": EmbeddingModelRegistry.get_stats()}
+
+
+@router.post("/embeddings/benchmark")
+def benchmark_embeddings(request: EmbeddingBenchmarkRequest):
+    """Compare throughput and recall@k of the embedding backends on a collection's chunks."""
+    return EmbeddingBenchmarkService.run(
+        request.collection, request.backends, request.sample_size,
+        request.queries, request.query_count, request.top_k)
+
+
+@router.get("/rerank/stats")
+def get_rerank_stats():
+    return RerankerService.get_stats()
@@ -7,6 +7,9 @@ from app.services.chat import ChatService
 from app.services.research import ResearchPlanService
 from app.services.research_refinement import ResearchRefinementService
 from app.services.annotation import AnnotationService
+from app.services.llm.response_cache import ResponseCache
+from app.services.rag.vector_store import VectorStoreManager
+from app.utils.streaming import ndjson_response
 
 router = APIRouter()
 research_plan_service = ResearchPlanService()
@@ -14,9 +17,9 @@ research_topic_service = ResearchRefinementService()
 
 
 @router.post("/plan", response_model=ResearchPlanResponse)
-def generate_research_plan(request: ResearchPlanRequest):
+async def generate_research_plan(request: ResearchPlanRequest):
     try:
-        result = research_plan_service.generate_research_plan(
+        result = await research_plan_service.agenerate_research_plan(
             request.topic, request.provider
         )
         return ResearchPlanResponse(goal=result["goal"], tasks=result["tasks"])
@@ -28,9 +31,9 @@ def generate_research_plan(request: ResearchPlanRequest):
 
 
 @router.post("/topic", response_model=ResearchTopicResponse)
-def refine_research_topic(request: ResearchTopicRequest):
+async def refine_research_topic(request: ResearchTopicRequest):
     try:
-        refined_topic, provider = research_topic_service.refine_research_topic(
+        refined_topic, provider = await research_topic_service.arefine_research_topic(
             request.topic, request.provider
         )
         return ResearchTopicResponse(refined_topic=refined_topic, provider=provider)
@@ -42,10 +45,12 @@ def refine_research_topic(request: ResearchTopicRequest):
 
 
 @router.post("/chat", response_model=ChatResponse)
-def generate_chat_response(request: ChatRequest):
+async def generate_chat_response(request: ChatRequest):
     try:
-        response, provider, context = ChatService.generate_response(
-            request.prompt, request.provider, request.use_rag, request.top_k
+        response, provider, context = await ChatService.agenerate_response(
+            request.prompt, request.provider, request.use_rag, request.top_k,
+            cache_scope="chat", rerank=request.rerank,
+            collection=request.collection
         )
         return ChatResponse(response=response, provider=provider, context=context)
     except ValueError as e:
@@ -53,3 +58,25 @@ def generate_chat_response(request: ChatRequest):
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error generating response: {str(e)}")
+
+
+@router.post("/chat/stream")
+async def stream_chat_response(request: ChatRequest):
+    """Stream the answer as NDJSON events: context, token..., done (or error)."""
+    # Once streaming starts the status is 200, so reject bad requests first
+    try:
+        ChatService.get_llm_service(request.provider)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.use_rag:
+        VectorStoreManager.validate_collection_name(request.collection)
+    return ndjson_response(ChatService.astream_response(
+        request.prompt, request.provider, request.use_rag, request.top_k,
+        cache_scope="chat", rerank=request.rerank,
+        collection=request.collection
+    ))
+
+
+@router.get("/cache/stats")
+def get_response_cache_stats():
+    return ResponseCache.get_stats()
@@ -13,6 +13,20 @@ class Settings(BaseSettings):
     PROJECT_ROOT: ClassVar[Path] = Path(__file__).parent.parent.parent.parent
     UPLOAD_DIR: str = str(PROJECT_ROOT / "uploads")
 
+    # Largest accepted upload, enforced while streaming
+    UPLOAD_MAX_MB: int = 100
+
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_DIR: str = "cache/extraction"
+    EXTRACTION_CACHE_MAX_MB: int = 1024
+
+    # 0 uses every core available to the process
+    OCR_WORKERS: int = 0
+    OCR_DPI: int = 200
+    # A page's text layer is used when it has enough mostly alphanumeric text
+    PDF_MIN_PAGE_CHARS: int = 50
+    PDF_MIN_ALNUM_RATIO: float = 0.5
+
     API_V1_STR: str = "/api/v1"
     DATABASE_URL: str = "sqlite:///./test.db"
     OPENAI_API_KEY: str = ""
@@ -22,7 +36,76 @@ class Settings(BaseSettings):
     GIGACHAT_SECRET: str = ""
     DEEPSEEK_API_KEY: str = ""
 
+    # Concurrent requests allowed per LLM provider, e.g. {"gigachat": 2}
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_PROVIDER_CONCURRENCY: dict[str, int] = {}
+
+    # Response cache, enabled per endpoint: "chat", "topic", "plan"
+    LLM_CACHE_ENDPOINTS: set[str] = set()
+    LLM_CACHE_SIZE: int = 1024
+    LLM_CACHE_TTL: int = 24 * 3600
+    # Cosine similarity for near-duplicate prompt hits, 0 disables
+    LLM_CACHE_SEMANTIC_THRESHOLD: float = 0.0
+
+    VECTOR_DB_DIR: str = "chroma_db"
+    VECTOR_COLLECTION_NAME: str = "documents"
+
+    # Model and normalisation for newly created collections; existing ones
+    # keep the embedding space they were built with until re-embedded.
+    # Mostly Russian corpora are better served by a multilingual model such
+    # as intfloat/multilingual-e5-small.
     VECTORIZE_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_NORMALIZE: bool = False
+    EMBEDDING_DEVICE: str = "cpu"
+    EMBEDDING_PRELOAD: bool = False
+    EMBEDDING_BATCH_SIZE: int = 64
+    # Inference backend: "torch" (sentence-transformers), or ONNX Runtime
+    # with "onnx" / "onnx-int8" (dynamically quantized), which need the
+    # onnxruntime and optimum packages. Exports are cached on disk.
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_ONNX_DIR: str = "cache/onnx"
+    # Intra-op threads for embedding inference, 0 keeps the runtime default
+    EMBEDDING_THREADS: int = 0
+    # ONNX batches group texts of similar length, capped at this many padded tokens
+    EMBEDDING_BATCH_TOKENS: int = 16384
+
+    # Retrieval caches, TTLs in seconds
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+    QUERY_EMBEDDING_CACHE_TTL: int = 24 * 3600
+    RETRIEVAL_CACHE_SIZE: int = 1024
+    RETRIEVAL_CACHE_TTL: int = 600
+
+    # Hybrid retrieval: each ranker returns top_k * multiplier candidates
+    # before reciprocal-rank fusion
+    HYBRID_CANDIDATE_MULTIPLIER: int = 4
+    RRF_K: int = 60
+    # BM25 reads at most this many postings (highest tf first) per query term
+    LEXICAL_MAX_POSTINGS: int = 5000
+
+    # Optional cross-encoder re-ranking of RERANK_CANDIDATES retrieved chunks;
+    # skipped (retrieval order kept) when scoring exceeds RERANK_BUDGET_MS
+    RERANK_MODEL: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANK_DEVICE: str = "cpu"
+    RERANK_CANDIDATES: int = 20
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_BUDGET_MS: int = 500
+    # After a failed model load, re-ranking is skipped for this many seconds
+    RERANK_RETRY_SECONDS: int = 60
+
+    # Token budget for retrieved context in chat prompts, per provider overrides
+    RAG_CONTEXT_TOKEN_BUDGET: int = 2000
+    RAG_CONTEXT_TOKEN_BUDGETS: dict[str, int] = {}
+
+    # Background ingestion jobs running at the same time
+    INGEST_MAX_CONCURRENCY: int = 2
+
+    # Bulk ingestion: parser processes (0 = one per CPU), limits, and the
+    # server-side directory tree that may be ingested (None disables it)
+    BULK_PARSE_WORKERS: int = 0
+    BULK_MAX_FILES: int = 5000
+    BULK_MAX_FILE_MB: int = 200
+    BULK_WRITE_QUEUE_SIZE: int = 4
+    BULK_INGEST_ROOT: str | None = None
 
     class Config:
         case_sensitive = True
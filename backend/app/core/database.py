@@ -0,0 +1,26 @@
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core.config import settings
+
+connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith(
+    "sqlite") else {}
+engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+Base = declarative_base()
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def init_db() -> None:
+    """Create missing tables. Safe to call repeatedly."""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            import app.models  # noqa: F401 registers the models on Base
+            Base.metadata.create_all(bind=SessionLocal.kw["bind"])
+            _initialized = True
@@ -1,12 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.routers import api_router
+from app.services.rag.embeddings import EmbeddingModelRegistry
+from app.services.rag.vector_store import VectorStoreManager
+from app.utils.pdf_parser import PDFParser
+from app.core.database import init_db
+from app.services.rag.ingestion_jobs import IngestionJobService
+from app.services.file_manager.catalog import FileCatalogService
+from app.services.file_manager.file_service import FileService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.EMBEDDING_PRELOAD:
+        await run_in_threadpool(EmbeddingModelRegistry.preload)
+    await run_in_threadpool(init_db)
+    await run_in_threadpool(FileService.remove_partial_uploads)
+    # Catalog files that predate the catalog, without delaying startup
+    FileCatalogService.sync_in_background(
+        FileService.UPLOAD_DIR, FileService.SUPPORTED_EXTENSIONS)
+    await run_in_threadpool(VectorStoreManager.open)
+    await run_in_threadpool(IngestionJobService.start)
+    yield
+    IngestionJobService.shutdown()
+    VectorStoreManager.close()
+    PDFParser.shutdown_ocr_pool()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.PROJECT_VERSION,
-    description=settings.PROJECT_DESCRIPTION
+    description=settings.PROJECT_DESCRIPTION,
+    lifespan=lifespan
 )
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 app.include_router(api_router, prefix="/api/v1")
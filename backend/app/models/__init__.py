@@ -0,0 +1,5 @@
+from app.models.ingestion_job import IngestionJob
+from app.models.chunk_manifest import ChunkManifest
+from app.models.lexical_index import LexicalDocument, LexicalPosting, LexicalCollection, LexicalTerm
+from app.models.file import File
+from app.models.collection_binding import CollectionBinding
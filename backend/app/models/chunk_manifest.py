@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, JSON, String
+
+from app.core.database import Base
+
+
+class ChunkManifest(Base):
+    """Chunk ids currently stored in a vector collection for one file."""
+
+    __tablename__ = "chunk_manifests"
+
+    collection = Column(String(128), primary_key=True)
+    filename = Column(String(512), primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    embedding_model = Column(String(256), nullable=False)
+    chunk_ids = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+
+from app.core.database import Base
+
+
+class CollectionBinding(Base):
+    """Embedding space of a vector collection and the Chroma collection holding it."""
+
+    __tablename__ = "collection_bindings"
+
+    collection = Column(String(128), primary_key=True)
+    # Chroma collection currently serving `collection`; differs from the
+    # name once the collection has been re-embedded
+    physical_name = Column(String(128), nullable=False, unique=True)
+    embedding_model = Column(String(256), nullable=False)
+    dimension = Column(Integer, nullable=True)
+    normalize = Column(Boolean, nullable=False, default=False)
+    query_prefix = Column(String(64), nullable=False, default="")
+    document_prefix = Column(String(64), nullable=False, default="")
+    # Chroma collection being filled by a running re-embed job
+    migration_target = Column(String(128), nullable=True, unique=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False,
+                        default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text
+
+from app.core.database import Base
+
+
+class File(Base):
+    """An uploaded file in the upload directory and its ingestion state."""
+
+    __tablename__ = "files"
+
+    filename = Column(String(512), primary_key=True)
+    size = Column(BigInteger, nullable=False, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    mime_type = Column(String(128), nullable=True)
+    uploaded_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    page_count = Column(Integer, nullable=True)
+    chunk_count = Column(Integer, nullable=False, default=0, index=True)
+    # uploaded, processing, ingested or failed
+    status = Column(String(32), nullable=False, default="uploaded", index=True)
+    error = Column(Text, nullable=True)
+    ingested_at = Column(DateTime, nullable=True)
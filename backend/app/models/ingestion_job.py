@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, DateTime, Float, JSON, String, Text
+
+from app.core.database import Base
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(32), nullable=False, default="file")
+    filename = Column(String(512), nullable=True)
+    options = Column(JSON, nullable=False, default=dict)
+    # queued, running, completed, failed, cancelled
+    status = Column(String(16), nullable=False, index=True, default="queued")
+    stage = Column(String(32), nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    stages = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
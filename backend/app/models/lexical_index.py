@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Index, Integer, String
+
+from app.core.database import Base
+
+
+class LexicalDocument(Base):
+    __tablename__ = "lexical_documents"
+
+    collection = Column(String(128), primary_key=True)
+    chunk_id = Column(String(600), primary_key=True)
+    filename = Column(String(512), nullable=False, index=True)
+    length = Column(Integer, nullable=False)
+
+
+class LexicalPosting(Base):
+    __tablename__ = "lexical_postings"
+
+    collection = Column(String(128), primary_key=True)
+    term = Column(String(128), primary_key=True)
+    chunk_id = Column(String(600), primary_key=True)
+    tf = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_lexical_postings_chunk", "collection", "chunk_id"),
+        # Reads the highest-tf postings of a frequent term without sorting
+        Index("ix_lexical_postings_term_tf", "collection", "term", "tf"),
+    )
+
+
+class LexicalCollection(Base):
+    """BM25 statistics of a collection, kept up to date on add and remove."""
+    __tablename__ = "lexical_collections"
+
+    collection = Column(String(128), primary_key=True)
+    document_count = Column(Integer, nullable=False, default=0)
+    total_length = Column(Integer, nullable=False, default=0)
+
+
+class LexicalTerm(Base):
+    __tablename__ = "lexical_terms"
+
+    collection = Column(String(128), primary_key=True)
+    term = Column(String(128), primary_key=True)
+    df = Column(Integer, nullable=False)
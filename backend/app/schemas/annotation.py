@@ -12,6 +12,9 @@ class AnnotationRequest(BaseModel):
         200, ge=50, le=500, description="Maximum length of the annotation in words")
     chunk_size: int = Field(8000, ge=1000, le=10000,
                             description="Size of text chunks for long documents")
+    reduce_mode: Literal["tree", "single"] = Field(
+        "tree", description="How intermediate summaries are combined: 'tree' collapses them "
+        "hierarchically when they overflow chunk_size, 'single' always uses one reduce call")
 
 
 class AnnotationResponse(BaseModel):
@@ -15,6 +15,8 @@ class ChatRequest(BaseModel):
     temperature: float = 0.7
     use_rag: bool = False
     top_k: int = 5
+    rerank: bool = False
+    collection: str | None = None
 
 
 class ChatResponse(BaseModel):
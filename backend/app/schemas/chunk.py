@@ -1,13 +1,42 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Dict, Optional
 from app.schemas.chat import LLMProvider
 
 
 class ChunkingRequest(BaseModel):
     filename: str
     provider: LLMProvider = LLMProvider.CHATGPT
+    collection: Optional[str] = None
+    tags: List[str] = []
 
 
 class ChunkingResponse(BaseModel):
     filename: str
     chunk_count: int
+    page_count: Optional[int] = None
+    timings: Optional[Dict[str, float]] = None
+    chunks_per_second: Optional[float] = None
+    added: Optional[int] = None
+    deleted: Optional[int] = None
+    unchanged: Optional[int] = None
+
+
+class CollectionList(BaseModel):
+    collections: List[str]
+
+
+class CollectionInfo(BaseModel):
+    collection: str
+    physical_name: str
+    embedding_model: str
+    dimension: Optional[int] = None
+    normalize: bool
+    query_prefix: str
+    document_prefix: str
+    migration_target: Optional[str] = None
+
+
+class ReembedRequest(BaseModel):
+    model_name: str
+    # None uses EMBEDDING_NORMALIZE
+    normalize: Optional[bool] = None
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class EmbeddingBenchmarkRequest(BaseModel):
+    collection: Optional[str] = None
+    # Defaults to every backend; torch is always run as the baseline
+    backends: List[str] = []
+    sample_size: int = Field(500, ge=1, le=10000)
+    # Defaults to the opening words of sampled chunks
+    queries: List[str] = []
+    query_count: int = Field(50, ge=1, le=1000)
+    top_k: int = Field(10, ge=1, le=100)
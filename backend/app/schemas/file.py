@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 from datetime import datetime
 
 
@@ -6,3 +7,18 @@ class FileInfo(BaseModel):
     filename: str
     size: int
     uploaded_at: str
+    sha256: Optional[str] = None
+    mime_type: Optional[str] = None
+    page_count: Optional[int] = None
+    chunk_count: int = 0
+    status: str = "uploaded"
+    error: Optional[str] = None
+    ingested_at: Optional[str] = None
+
+    @classmethod
+    def from_catalog(cls, entry: dict) -> "FileInfo":
+        return cls(**{
+            **entry,
+            "uploaded_at": entry["uploaded_at"].isoformat(),
+            "ingested_at": entry["ingested_at"].isoformat() if entry["ingested_at"] else None,
+        })
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+class IngestionJobInfo(BaseModel):
+    job_id: str
+    kind: str
+    filename: Optional[str] = None
+    status: str
+    stage: Optional[str] = None
+    progress: float
+    stages: Dict[str, float]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class IngestionJobList(BaseModel):
+    jobs: List[IngestionJobInfo]
+
+
+class BulkDirectoryRequest(BaseModel):
+    directory: str
+    collection: Optional[str] = None
+    tags: List[str] = []
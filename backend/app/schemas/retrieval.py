@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
+from datetime import datetime
 from app.schemas.chat import LLMProvider
 
 
@@ -7,6 +8,13 @@ class RetrievalRequest(BaseModel):
     query: str
     provider: LLMProvider = LLMProvider.CHATGPT
     top_k: int = 5
+    mode: Literal["vector", "keyword", "hybrid"] = "vector"
+    rerank: bool = False
+    collection: Optional[str] = None
+    filenames: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    ingested_after: Optional[datetime] = None
+    ingested_before: Optional[datetime] = None
 
 
 class RetrievalResponse(BaseModel):
@@ -1,13 +1,15 @@
 import os
+import asyncio
+from typing import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from app.utils.pdf_parser import PDFParser
 from app.utils.docx_parser import DOCXParser
 from app.services.llm.base import BaseLLMService
-from app.services.llm.chatgpt import ChatGPTService
-from app.services.llm.yandexgpt import YandexGPTService
-from app.services.llm.gigachat import GigaChatService
-from app.services.llm.deepseek import DeepSeekService
+from app.services.llm.registry import LLMServiceRegistry
+from app.core.config import settings
 
 
 class AnnotationService:
@@ -15,23 +17,17 @@ class AnnotationService:
     DEFAULT_CHUNK_SIZE = 8000
     DEFAULT_CHUNK_OVERLAP = 200
     INTERMEDIATE_ANNOTATION_LENGTH = 100
+    _semaphores: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
 
     @staticmethod
     def get_llm_provider(provider_name: str) -> BaseLLMService:
-        providers = {
-            "chatgpt": ChatGPTService,
-            "yandexgpt": YandexGPTService,
-            "gigachat": GigaChatService,
-            "deepseek": DeepSeekService
-        }
-        provider_class = providers.get(provider_name)
-        if not provider_class:
+        if not LLMServiceRegistry.is_supported(provider_name):
             raise HTTPException(
                 status_code=400, detail=f"Unsupported LLM provider: {provider_name}")
-        return provider_class()
+        return LLMServiceRegistry.get(provider_name)
 
     @staticmethod
-    def extract_text(filename: str) -> str:
+    def get_file_path(filename: str) -> str:
         file_path = os.path.join("uploads", filename)
         if not os.path.exists(file_path):
             raise HTTPException(
@@ -41,7 +37,12 @@ class AnnotationService:
         if ext.lower() not in AnnotationService.SUPPORTED_EXTENSIONS:
             raise HTTPException(
                 status_code=400, detail=f"Unsupported file extension: {ext}")
+        return file_path
 
+    @staticmethod
+    def extract_text(filename: str) -> str:
+        file_path = AnnotationService.get_file_path(filename)
+        _, ext = os.path.splitext(filename)
         try:
             if ext.lower() == ".pdf":
                 return PDFParser.extract_text_from_pdf(file_path)
@@ -61,12 +62,33 @@ class AnnotationService:
         return text_splitter.split_text(text)
 
     @staticmethod
-    def generate_intermediate_annotation(chunk: str, llm_provider: BaseLLMService) -> str:
-        prompt = (
+    def build_intermediate_prompt(chunk: str) -> str:
+        return (
             f"Создайте лаконичную аннотацию (краткое изложение) следующего текста не более чем в {AnnotationService.INTERMEDIATE_ANNOTATION_LENGTH} слов. "
             "Сосредоточьтесь на основных идеях и ключевых моментах. Используйте ясный и профессиональный язык:\n\n"
             f"{chunk}"
         )
+
+    @staticmethod
+    def build_final_prompt(intermediate_annotations: list[str], max_length: int) -> str:
+        combined_text = "\n".join(intermediate_annotations)
+        return (
+            f"Создайте лаконичную аннотацию (краткое изложение) из следующих объединённых сводок не более чем в {max_length} слов. "
+            "Синтезируйте основные идеи, ключевые выводы и назначение оригинальной статьи. Используйте ясный и профессиональный язык:\n\n"
+            f"{combined_text}"
+        )
+
+    @staticmethod
+    def build_article_prompt(text: str, max_length: int) -> str:
+        return (
+            f"Создайте лаконичную аннотацию (краткое изложение) следующей статьи не более чем в {max_length} слов. "
+            "Сосредоточьтесь на основных идеях, ключевых выводах и назначении статьи. Используйте ясный и профессиональный язык:\n\n"
+            f"{text}"
+        )
+
+    @staticmethod
+    def generate_intermediate_annotation(chunk: str, llm_provider: BaseLLMService) -> str:
+        prompt = AnnotationService.build_intermediate_prompt(chunk)
         try:
             return llm_provider.generate_response(prompt)
         except Exception as e:
@@ -75,12 +97,8 @@ class AnnotationService:
 
     @staticmethod
     def generate_final_annotation(intermediate_annotations: list[str], llm_provider: BaseLLMService, max_length: int) -> str:
-        combined_text = "\n".join(intermediate_annotations)
-        prompt = (
-            f"Создайте лаконичную аннотацию (краткое изложение) из следующих объединённых сводок не более чем в {max_length} слов. "
-            "Синтезируйте основные идеи, ключевые выводы и назначение оригинальной статьи. Используйте ясный и профессиональный язык:\n\n"
-            f"{combined_text}"
-        )
+        prompt = AnnotationService.build_final_prompt(
+            intermediate_annotations, max_length)
         try:
             return llm_provider.generate_response(prompt)
         except Exception as e:
@@ -88,17 +106,64 @@ class AnnotationService:
                 status_code=500, detail=f"Error generating final annotation: {str(e)}")
 
     @staticmethod
-    def generate_annotation(filename: str, provider: str, max_length: int, chunk_size: int) -> tuple[str, str]:
+    def get_concurrency_limit(provider_name: str) -> int:
+        return max(1, settings.LLM_PROVIDER_CONCURRENCY.get(
+            provider_name, settings.LLM_MAX_CONCURRENCY))
+
+    @staticmethod
+    def get_semaphore(provider_name: str) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        entry = AnnotationService._semaphores.get(provider_name)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Semaphore(
+                AnnotationService.get_concurrency_limit(provider_name)))
+            AnnotationService._semaphores[provider_name] = entry
+        return entry[1]
+
+    @staticmethod
+    async def gather_or_cancel(coroutines) -> list:
+        """asyncio.gather that cancels the outstanding LLM calls once one of them fails."""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def group_for_reduce(annotations: list[str], max_chars: int) -> list[list[str]]:
+        """Greedily pack consecutive annotations into groups that fit `max_chars`."""
+        groups = []
+        current = []
+        current_length = 0
+        for annotation in annotations:
+            if current and current_length + len(annotation) + 1 > max_chars:
+                groups.append(current)
+                current = []
+                current_length = 0
+            current.append(annotation)
+            current_length += len(annotation) + 1
+        if current:
+            groups.append(current)
+        return groups
+
+    @staticmethod
+    def needs_collapse(annotations: list[str], max_chars: int, reduce_mode: str) -> bool:
+        return (
+            reduce_mode == "tree"
+            and len(annotations) > 1
+            and len("\n".join(annotations)) > max_chars
+        )
+
+    @staticmethod
+    def generate_annotation(filename: str, provider: str, max_length: int, chunk_size: int, reduce_mode: str = "tree") -> tuple[str, str]:
         text = AnnotationService.extract_text(filename)
 
         llm_provider = AnnotationService.get_llm_provider(provider)
 
         if len(text) <= chunk_size:
-            prompt = (
-                f"Создайте лаконичную аннотацию (краткое изложение) следующей статьи не более чем в {max_length} слов. "
-                "Сосредоточьтесь на основных идеях, ключевых выводах и назначении статьи. Используйте ясный и профессиональный язык:\n\n"
-                f"{text}"
-            )
+            prompt = AnnotationService.build_article_prompt(text, max_length)
             try:
                 annotation = llm_provider.generate_response(prompt)
                 return annotation, provider
@@ -112,11 +177,23 @@ class AnnotationService:
             chunk_overlap=AnnotationService.DEFAULT_CHUNK_OVERLAP
         )
 
-        intermediate_annotations = []
-        for chunk in chunks:
-            annotation = AnnotationService.generate_intermediate_annotation(
-                chunk, llm_provider)
-            intermediate_annotations.append(annotation)
+        with ThreadPoolExecutor(max_workers=AnnotationService.get_concurrency_limit(provider)) as executor:
+            intermediate_annotations = list(executor.map(
+                lambda chunk: AnnotationService.generate_intermediate_annotation(
+                    chunk, llm_provider),
+                chunks
+            ))
+
+            while AnnotationService.needs_collapse(intermediate_annotations, chunk_size, reduce_mode):
+                groups = AnnotationService.group_for_reduce(
+                    intermediate_annotations, chunk_size)
+                if len(groups) == len(intermediate_annotations):
+                    break
+                intermediate_annotations = list(executor.map(
+                    lambda group: AnnotationService.generate_final_annotation(
+                        group, llm_provider, AnnotationService.INTERMEDIATE_ANNOTATION_LENGTH),
+                    groups
+                ))
 
         final_annotation = AnnotationService.generate_final_annotation(
             intermediate_annotations,
@@ -125,3 +202,160 @@ class AnnotationService:
         )
 
         return final_annotation, provider
+
+    @staticmethod
+    async def agenerate_intermediate_annotation(chunk: str, llm_provider: BaseLLMService) -> str:
+        prompt = AnnotationService.build_intermediate_prompt(chunk)
+        try:
+            return await llm_provider.agenerate_response(prompt)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error generating intermediate annotation: {str(e)}")
+
+    @staticmethod
+    async def agenerate_final_annotation(intermediate_annotations: list[str], llm_provider: BaseLLMService, max_length: int) -> str:
+        prompt = AnnotationService.build_final_prompt(
+            intermediate_annotations, max_length)
+        try:
+            return await llm_provider.agenerate_response(prompt)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error generating final annotation: {str(e)}")
+
+    @staticmethod
+    async def agenerate_annotation(filename: str, provider: str, max_length: int, chunk_size: int, reduce_mode: str = "tree") -> tuple[str, str]:
+        # Parsing and OCR are CPU bound, run them outside the event loop
+        text = await run_in_threadpool(AnnotationService.extract_text, filename)
+
+        llm_provider = AnnotationService.get_llm_provider(provider)
+
+        if len(text) <= chunk_size:
+            prompt = AnnotationService.build_article_prompt(text, max_length)
+            try:
+                annotation = await llm_provider.agenerate_response(prompt)
+                return annotation, provider
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500, detail=f"Error generating annotation: {str(e)}")
+
+        chunks = AnnotationService.split_text(
+            text,
+            chunk_size=chunk_size,
+            chunk_overlap=AnnotationService.DEFAULT_CHUNK_OVERLAP
+        )
+
+        semaphore = AnnotationService.get_semaphore(provider)
+
+        async def summarize(chunk: str) -> str:
+            async with semaphore:
+                return await AnnotationService.agenerate_intermediate_annotation(chunk, llm_provider)
+
+        async def collapse(group: list[str]) -> str:
+            async with semaphore:
+                return await AnnotationService.agenerate_final_annotation(
+                    group, llm_provider, AnnotationService.INTERMEDIATE_ANNOTATION_LENGTH)
+
+        # gather keeps results in chunk order regardless of completion order
+        intermediate_annotations = await AnnotationService.gather_or_cancel(
+            summarize(chunk) for chunk in chunks)
+
+        while AnnotationService.needs_collapse(intermediate_annotations, chunk_size, reduce_mode):
+            groups = AnnotationService.group_for_reduce(
+                intermediate_annotations, chunk_size)
+            if len(groups) == len(intermediate_annotations):
+                break
+            intermediate_annotations = await AnnotationService.gather_or_cancel(
+                collapse(group) for group in groups)
+
+        final_annotation = await AnnotationService.agenerate_final_annotation(
+            intermediate_annotations,
+            llm_provider,
+            max_length
+        )
+
+        return final_annotation, provider
+
+    @staticmethod
+    async def astream_tokens(prompt: str, llm_provider: BaseLLMService, error_message: str) -> AsyncIterator[dict]:
+        try:
+            async for token in llm_provider.astream_response(prompt):
+                yield {"type": "annotation_token", "content": token}
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"{error_message}: {str(e)}")
+
+    @staticmethod
+    async def astream_annotation(filename: str, provider: str, max_length: int, chunk_size: int,
+                                 reduce_mode: str = "tree") -> AsyncIterator[dict]:
+        """Annotate a file, yielding progress events as each step finishes.
+
+        Events: "extracted", one "chunk_summary" per chunk (in completion
+        order, with its index), "reduce_round" per tree-reduce level,
+        "annotation_token" while the final annotation streams, and "done".
+        """
+        text = await run_in_threadpool(AnnotationService.extract_text, filename)
+        llm_provider = AnnotationService.get_llm_provider(provider)
+
+        if len(text) <= chunk_size:
+            yield {"type": "extracted", "characters": len(text), "chunks": 1}
+            prompt = AnnotationService.build_article_prompt(text, max_length)
+            error_message = "Error generating annotation"
+        else:
+            chunks = AnnotationService.split_text(
+                text,
+                chunk_size=chunk_size,
+                chunk_overlap=AnnotationService.DEFAULT_CHUNK_OVERLAP
+            )
+            yield {"type": "extracted", "characters": len(text), "chunks": len(chunks)}
+
+            semaphore = AnnotationService.get_semaphore(provider)
+
+            async def summarize(index: int, chunk: str) -> tuple[int, str]:
+                async with semaphore:
+                    return index, await AnnotationService.agenerate_intermediate_annotation(chunk, llm_provider)
+
+            async def collapse(group: list[str]) -> str:
+                async with semaphore:
+                    return await AnnotationService.agenerate_final_annotation(
+                        group, llm_provider, AnnotationService.INTERMEDIATE_ANNOTATION_LENGTH)
+
+            tasks = [asyncio.create_task(summarize(index, chunk))
+                     for index, chunk in enumerate(chunks)]
+            intermediate_annotations = [None] * len(chunks)
+            try:
+                for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+                    index, summary = await task
+                    intermediate_annotations[index] = summary
+                    yield {
+                        "type": "chunk_summary",
+                        "index": index,
+                        "summary": summary,
+                        "completed": completed,
+                        "total": len(chunks),
+                    }
+            finally:
+                # Stop outstanding LLM calls if the client went away or a call failed
+                for task in tasks:
+                    task.cancel()
+
+            reduce_round = 0
+            while AnnotationService.needs_collapse(intermediate_annotations, chunk_size, reduce_mode):
+                groups = AnnotationService.group_for_reduce(
+                    intermediate_annotations, chunk_size)
+                if len(groups) == len(intermediate_annotations):
+                    break
+                reduce_round += 1
+                intermediate_annotations = await AnnotationService.gather_or_cancel(
+                    collapse(group) for group in groups)
+                yield {"type": "reduce_round", "round": reduce_round, "summaries": len(intermediate_annotations)}
+
+            prompt = AnnotationService.build_final_prompt(
+                intermediate_annotations, max_length)
+            error_message = "Error generating final annotation"
+
+        parts = []
+        async for event in AnnotationService.astream_tokens(prompt, llm_provider, error_message):
+            parts.append(event["content"])
+            yield event
+
+        yield {"type": "done", "annotation": "".join(parts), "provider": provider}
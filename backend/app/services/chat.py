@@ -1,38 +1,88 @@
+from typing import AsyncIterator
+from fastapi.concurrency import run_in_threadpool
 from app.services.llm.base import BaseLLMService
-from app.services.llm.chatgpt import ChatGPTService
-from app.services.llm.yandexgpt import YandexGPTService
-from app.services.llm.gigachat import GigaChatService
-from app.services.llm.deepseek import DeepSeekService
+from app.services.llm.registry import LLMServiceRegistry
 from app.schemas.chat import LLMProvider
 from app.services.rag.retrieval import RetrievalService
+from app.services.rag.context_packing import ContextPackingService
 
 
 class ChatService:
     @staticmethod
     def get_llm_service(provider: LLMProvider) -> BaseLLMService:
-        services = {
-            LLMProvider.CHATGPT: ChatGPTService(),
-            LLMProvider.YANDEXGPT: YandexGPTService(),
-            LLMProvider.GIGACHAT: GigaChatService(),
-            LLMProvider.DEEPSEEK: DeepSeekService(),
-        }
-        return services.get(provider, ChatGPTService())
+        if not LLMServiceRegistry.is_supported(provider):
+            provider = LLMProvider.CHATGPT
+        return LLMServiceRegistry.get(provider)
 
     @staticmethod
-    def generate_response(prompt: str, provider: LLMProvider, use_rag: bool = False, top_k: int = 5) -> tuple[str, str, list[str] | None]:
+    def augment_prompt(prompt: str, context: list[str] | None) -> str:
+        context_text = "\n\nContext:\n" + \
+            "\n".join([f"- {chunk}" for chunk in context]
+                      ) if context else ""
+        return f"{prompt}\n{context_text}"
+
+    @staticmethod
+    def retrieve_context(prompt: str, top_k: int, provider: LLMProvider, rerank: bool = False,
+                         collection: str | None = None) -> list[str]:
+        hits = RetrievalService.retrieve(prompt, top_k, rerank=rerank, collection=collection)
+        return ContextPackingService.pack(hits, provider)
+
+    @staticmethod
+    def generate_response(prompt: str, provider: LLMProvider, use_rag: bool = False, top_k: int = 5,
+                          cache_scope: str | None = None, rerank: bool = False,
+                          collection: str | None = None) -> tuple[str, str, list[str] | None]:
         llm_service = ChatService.get_llm_service(provider)
 
         context = None
         if use_rag:
-            context = RetrievalService.retrieve_relevant_chunks(
-                prompt, top_k, provider)
-            context_text = "\n\nContext:\n" + \
-                "\n".join([f"- {chunk}" for chunk in context]
-                          ) if context else ""
-            augmented_prompt = f"{prompt}\n{context_text}"
+            context = ChatService.retrieve_context(
+                prompt, top_k, provider, rerank=rerank, collection=collection)
+            augmented_prompt = ChatService.augment_prompt(prompt, context)
         else:
             augmented_prompt = prompt
 
-        response = llm_service.generate_response(augmented_prompt)
+        response = llm_service.generate_response(
+            augmented_prompt, cache_scope=cache_scope)
 
         return response, provider, context
+
+    @staticmethod
+    async def agenerate_response(prompt: str, provider: LLMProvider, use_rag: bool = False, top_k: int = 5,
+                                 cache_scope: str | None = None, rerank: bool = False,
+                                 collection: str | None = None) -> tuple[str, str, list[str] | None]:
+        llm_service = ChatService.get_llm_service(provider)
+
+        context = None
+        if use_rag:
+            # Retrieval embeds the query on CPU, keep it off the event loop
+            context = await run_in_threadpool(
+                ChatService.retrieve_context, prompt, top_k, provider, rerank=rerank, collection=collection)
+            augmented_prompt = ChatService.augment_prompt(prompt, context)
+        else:
+            augmented_prompt = prompt
+
+        response = await llm_service.agenerate_response(
+            augmented_prompt, cache_scope=cache_scope)
+
+        return response, provider, context
+
+    @staticmethod
+    async def astream_response(prompt: str, provider: LLMProvider, use_rag: bool = False, top_k: int = 5,
+                               cache_scope: str | None = None, rerank: bool = False,
+                               collection: str | None = None) -> AsyncIterator[dict]:
+        """Stream chat events: the retrieved context first, then tokens as they arrive."""
+        llm_service = ChatService.get_llm_service(provider)
+
+        context = None
+        if use_rag:
+            context = await run_in_threadpool(
+                ChatService.retrieve_context, prompt, top_k, provider, rerank=rerank, collection=collection)
+            augmented_prompt = ChatService.augment_prompt(prompt, context)
+        else:
+            augmented_prompt = prompt
+        yield {"type": "context", "context": context}
+
+        async for token in llm_service.astream_response(augmented_prompt, cache_scope=cache_scope):
+            yield {"type": "token", "content": token}
+
+        yield {"type": "done", "provider": llm_service.provider_name}
@@ -0,0 +1,197 @@
+import os
+import hashlib
+import logging
+import mimetypes
+import threading
+from datetime import datetime
+from fastapi import HTTPException
+
+from app.core.database import SessionLocal, init_db
+from app.models.file import File
+
+logger = logging.getLogger(__name__)
+
+
+class FileCatalogService:
+    """Records what is stored in the upload directory, so files never have
+    to be re-read, re-hashed or stat'ed to answer questions about them."""
+
+    SORT_FIELDS = {
+        "uploaded_at": File.uploaded_at,
+        "filename": File.filename,
+        "size": File.size,
+        "chunk_count": File.chunk_count,
+        "status": File.status,
+    }
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    @staticmethod
+    def to_dict(file: File) -> dict:
+        return {
+            "filename": file.filename,
+            "size": file.size,
+            "sha256": file.sha256,
+            "mime_type": file.mime_type,
+            "uploaded_at": file.uploaded_at,
+            "page_count": file.page_count,
+            "chunk_count": file.chunk_count,
+            "status": file.status,
+            "error": file.error,
+            "ingested_at": file.ingested_at,
+        }
+
+    @staticmethod
+    def get(filename: str) -> dict | None:
+        init_db()
+        with SessionLocal() as session:
+            file = session.get(File, filename)
+            return FileCatalogService.to_dict(file) if file is not None else None
+
+    @staticmethod
+    def get_hash(filename: str, file_path: str) -> str | None:
+        """The recorded SHA-256 of a file, if the file on disk still matches its entry."""
+        file = FileCatalogService.get(filename)
+        try:
+            if file is not None and os.path.getsize(file_path) == file["size"]:
+                return file["sha256"]
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def find_by_hash(sha256: str) -> dict | None:
+        init_db()
+        with SessionLocal() as session:
+            file = session.query(File).filter(File.sha256 == sha256).order_by(
+                File.uploaded_at).first()
+            return FileCatalogService.to_dict(file) if file is not None else None
+
+    @staticmethod
+    def add(filename: str, size: int, sha256: str, mime_type: str | None = None,
+            uploaded_at: datetime | None = None) -> dict:
+        init_db()
+        with SessionLocal() as session:
+            file = session.get(File, filename)
+            if file is None:
+                file = File(filename=filename)
+                session.add(file)
+            file.size = size
+            file.sha256 = sha256
+            file.mime_type = mime_type or mimetypes.guess_type(filename)[0]
+            file.uploaded_at = uploaded_at or datetime.utcnow()
+            # New content has not been ingested yet
+            file.page_count = None
+            file.chunk_count = 0
+            file.status = "uploaded"
+            file.error = None
+            file.ingested_at = None
+            session.commit()
+            return FileCatalogService.to_dict(file)
+
+    @staticmethod
+    def remove(filename: str) -> None:
+        init_db()
+        with SessionLocal() as session:
+            session.query(File).filter(File.filename == filename).delete()
+            session.commit()
+
+    @staticmethod
+    def update_status(filename: str, status: str, error: str | None = None, **fields) -> None:
+        """Record an ingestion state change; files missing from the catalog are ignored."""
+        init_db()
+        values = {"status": status, "error": error, **fields}
+        if status == "ingested":
+            values["ingested_at"] = datetime.utcnow()
+        with SessionLocal() as session:
+            session.query(File).filter(File.filename == filename).update(
+                values, synchronize_session=False)
+            session.commit()
+
+    @staticmethod
+    def reset_ingest(filenames: list[str]) -> None:
+        """Mark files as no longer ingested, e.g. after their collection was cleared."""
+        init_db()
+        with SessionLocal() as session:
+            for start in range(0, len(filenames), 500):
+                session.query(File).filter(File.filename.in_(filenames[start:start + 500])).update(
+                    {"status": "uploaded", "chunk_count": 0, "error": None, "ingested_at": None},
+                    synchronize_session=False)
+            session.commit()
+
+    @staticmethod
+    def list_files(offset: int = 0, limit: int = 100, sort: str = "uploaded_at",
+                   order: str = "desc", status: str | None = None) -> tuple[list[dict], int]:
+        """One page of catalog entries and the total number of matching entries."""
+        column = FileCatalogService.SORT_FIELDS.get(sort)
+        if column is None:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported sort field: {sort}")
+        if order not in ("asc", "desc"):
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported sort order: {order}")
+
+        init_db()
+        with SessionLocal() as session:
+            query = session.query(File)
+            if status:
+                query = query.filter(File.status == status)
+            total = query.count()
+            ordering = column.desc() if order == "desc" else column.asc()
+            # Filename breaks ties so pages are stable
+            files = query.order_by(ordering, File.filename.asc()).offset(offset).limit(limit).all()
+            return [FileCatalogService.to_dict(file) for file in files], total
+
+    @staticmethod
+    def sync(upload_dir: str, extensions: set[str]) -> dict:
+        """Reconcile the catalog with files already in `upload_dir`.
+
+        Only files missing from the catalog are stat'ed and hashed, so this
+        is cheap once the catalog is populated.
+        """
+        init_db()
+        # Read the catalog first: a file uploaded while the directory is
+        # listed then has no row yet, rather than a row that looks stale
+        with SessionLocal() as session:
+            known = {filename for (filename,) in session.query(File.filename)}
+        try:
+            on_disk = {name for name in os.listdir(upload_dir)
+                       if os.path.splitext(name)[1].lower() in extensions}
+        except FileNotFoundError:
+            on_disk = set()
+
+        added = 0
+        for filename in sorted(on_disk - known):
+            file_path = os.path.join(upload_dir, filename)
+            try:
+                if not os.path.isfile(file_path):
+                    continue
+                digest = hashlib.sha256()
+                with open(file_path, "rb") as f:
+                    for block in iter(lambda: f.read(FileCatalogService.HASH_BLOCK_SIZE), b""):
+                        digest.update(block)
+                stats = os.stat(file_path)
+                FileCatalogService.add(filename, stats.st_size, digest.hexdigest(),
+                                       uploaded_at=datetime.utcfromtimestamp(stats.st_mtime))
+                added += 1
+            except OSError as e:
+                logger.error(f"Could not catalog {filename}: {str(e)}")
+
+        missing = [filename for filename in sorted(known - on_disk)
+                   if not os.path.exists(os.path.join(upload_dir, filename))]
+        for filename in missing:
+            FileCatalogService.remove(filename)
+        if added or missing:
+            logger.info(f"File catalog sync: {added} added, {len(missing)} removed")
+        return {"added": added, "removed": len(missing)}
+
+    @staticmethod
+    def sync_in_background(upload_dir: str, extensions: set[str]) -> threading.Thread:
+        def run():
+            try:
+                FileCatalogService.sync(upload_dir, extensions)
+            except Exception as e:
+                logger.error(f"File catalog sync failed: {str(e)}", exc_info=True)
+
+        thread = threading.Thread(target=run, name="file-catalog-sync", daemon=True)
+        thread.start()
+        return thread
@@ -1,11 +1,13 @@
 import os
-import shutil
+import time
+import hashlib
 import logging
+import tempfile
 from fastapi import HTTPException, UploadFile
-from sqlalchemy.orm import Session
-# from app.models.file import File
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.services.file_manager.catalog import FileCatalogService
 from app.services.rag.vector_db import VectorDBService
-from datetime import datetime
 from typing import List, Dict
 
 logger = logging.getLogger(__name__)
@@ -14,60 +16,132 @@ logger = logging.getLogger(__name__)
 class FileService:
     UPLOAD_DIR = "uploads"
     SUPPORTED_EXTENSIONS = {".txt", ".pdf", ".docx"}
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    # Room for the multipart boundary and part headers around the file
+    MULTIPART_OVERHEAD = 64 * 1024
+    # Partial uploads older than this were left behind by a crash
+    PARTIAL_UPLOAD_MAX_AGE = 3600
 
     @staticmethod
-    async def upload_file(file: UploadFile) -> str:
+    async def upload_file(file: UploadFile) -> dict:
         try:
             logger.info(f"Starting file upload for {file.filename}")
-            file_path = FileService.save_file(file)
+            stored = await FileService.save_file(file)
             logger.info(
-                f"File {file.filename} uploaded successfully to {file_path}")
-            return file.filename  # Return only the filename instead of full path
+                f"File {file.filename} uploaded successfully as {stored['filename']}")
+            return stored  # Catalog entry, without the full path
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(
                 f"Error uploading file {file.filename}: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    def save_file(file: UploadFile) -> str:
-        try:
-            os.makedirs(FileService.UPLOAD_DIR, exist_ok=True)
-            logger.info(
-                f"Upload directory checked/created: {FileService.UPLOAD_DIR}")
+    def check_content_length(content_length: str | None) -> None:
+        """Reject a request whose declared size cannot fit UPLOAD_MAX_MB,
+        before its body is received."""
+        max_bytes = settings.UPLOAD_MAX_MB * 1024 * 1024 + FileService.MULTIPART_OVERHEAD
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise HTTPException(
+                status_code=413, detail=f"File exceeds {settings.UPLOAD_MAX_MB} MB")
 
-            # Sanitize filename
-            filename = file.filename.replace(" ", "_")
-            _, ext = os.path.splitext(filename)
-            if ext.lower() not in FileService.SUPPORTED_EXTENSIONS:
-                raise HTTPException(
-                    status_code=400, detail=f"Unsupported file extension: {ext}")
+    @staticmethod
+    def remove_partial_uploads() -> int:
+        """Delete temporary upload files left behind by an interrupted process."""
+        if not os.path.isdir(FileService.UPLOAD_DIR):
+            return 0
+        cutoff = time.time() - FileService.PARTIAL_UPLOAD_MAX_AGE
+        removed = 0
+        for entry in os.scandir(FileService.UPLOAD_DIR):
+            # Uploads still being written keep a fresh modification time
+            if entry.name.endswith(".part") and entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not remove partial upload {entry.path}: {e}")
+        if removed:
+            logger.info(f"Removed {removed} partial uploads")
+        return removed
 
-            file_path = os.path.join(FileService.UPLOAD_DIR, filename)
-            logger.info(f"Target file path: {file_path}")
+    @staticmethod
+    async def save_file(file: UploadFile) -> dict:
+        """Copy an upload into the upload directory.
+
+        Starlette has already spooled the request body to a temporary file
+        by the time this runs, so the content is still written twice. The
+        upload route only stops oversized requests early when they declare
+        a Content-Length (see `check_content_length`); chunked bodies are
+        capped here. The file is copied in chunks and hashed on the way,
+        without blocking the event loop. Content that is already stored
+        (under any name) is not stored twice; the catalog entry of the
+        existing file is returned instead.
+        """
+        max_bytes = settings.UPLOAD_MAX_MB * 1024 * 1024
+
+        # Sanitize filename
+        filename = os.path.basename(file.filename or "").replace(" ", "_")
+        _, ext = os.path.splitext(filename)
+        if ext.lower() not in FileService.SUPPORTED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported file extension: {ext}")
+        if file.size is not None and file.size > max_bytes:
+            raise HTTPException(
+                status_code=413, detail=f"File exceeds {settings.UPLOAD_MAX_MB} MB")
 
-            if os.path.exists(file_path):
-                raise HTTPException(
-                    status_code=400, detail="File already exists")
+        os.makedirs(FileService.UPLOAD_DIR, exist_ok=True)
+        file_path = os.path.join(FileService.UPLOAD_DIR, filename)
+        fd, tmp_path = tempfile.mkstemp(dir=FileService.UPLOAD_DIR, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while chunk := await file.read(FileService.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(
+                            status_code=413, detail=f"File exceeds {settings.UPLOAD_MAX_MB} MB")
+                    digest.update(chunk)
+                    await run_in_threadpool(buffer.write, chunk)
+            await file.close()
+            sha256 = digest.hexdigest()
+
+            existing = await run_in_threadpool(FileCatalogService.find_by_hash, sha256)
+            if existing is not None and os.path.exists(
+                    os.path.join(FileService.UPLOAD_DIR, existing["filename"])):
+                logger.info(
+                    f"Upload {filename} is identical to {existing['filename']}, keeping one copy")
+                return existing
 
             try:
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                file.file.close()
-                logger.info(f"File {filename} saved successfully")
-            except Exception as e:
-                logger.error(
-                    f"Error during file save: {str(e)}", exc_info=True)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info(f"Cleaned up partial file: {file_path}")
+                # Link instead of rename: fails rather than replacing a
+                # file that appeared at the target meanwhile
+                os.link(tmp_path, file_path)
+            except FileExistsError:
                 raise HTTPException(
-                    status_code=500, detail=f"Error saving file: {str(e)}")
-
-            return str(file_path)
+                    status_code=400, detail="File already exists")
+            except OSError:
+                # No hard links on this filesystem
+                if os.path.exists(file_path):
+                    raise HTTPException(
+                        status_code=400, detail="File already exists")
+                os.replace(tmp_path, file_path)
+            logger.info(f"File {filename} saved successfully ({size} bytes)")
+            # Browsers often send a generic type, the extension is more telling
+            mime_type = file.content_type if file.content_type not in (
+                None, "application/octet-stream") else None
+            return await run_in_threadpool(FileCatalogService.add, filename, size, sha256, mime_type)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(
-                f"Unexpected error in save_file: {str(e)}", exc_info=True)
-            raise
+                f"Error during file save: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500, detail=f"Error saving file: {str(e)}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     @staticmethod
     def delete_file(filename: str) -> None:
@@ -81,6 +155,7 @@ class FileService:
 
             try:
                 os.remove(file_path)
+                FileCatalogService.remove(filename)
                 logger.info(f"File deleted successfully: {file_path}")
                 VectorDBService.delete_chunks_by_filename(filename)
                 logger.info(f"Vector DB chunks deleted for file: {filename}")
@@ -97,41 +172,15 @@ class FileService:
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    def get_file_list() -> List[Dict]:
+    def get_file_list(offset: int = 0, limit: int = 100, sort: str = "uploaded_at",
+                      order: str = "desc", status: str | None = None) -> tuple[List[Dict], int]:
+        """A page of the file catalog and the total number of files."""
         try:
-            os.makedirs(FileService.UPLOAD_DIR, exist_ok=True)
-            logger.info("Getting file list from directory: %s",
-                        FileService.UPLOAD_DIR)
-
-            files = []
-            for filename in os.listdir(FileService.UPLOAD_DIR):
-                file_path = os.path.join(FileService.UPLOAD_DIR, filename)
-
-                if not os.path.isfile(file_path):
-                    continue
-
-                _, ext = os.path.splitext(filename)
-                if ext.lower() not in FileService.SUPPORTED_EXTENSIONS:
-                    continue
-
-                try:
-                    stats = os.stat(file_path)
-                    files.append({
-                        "filename": filename,
-                        "size": stats.st_size,
-                        "uploaded_at": datetime.fromtimestamp(stats.st_mtime).isoformat()
-                    })
-                    logger.debug(
-                        f"Added file to list: {filename}, size: {stats.st_size}, date: {datetime.fromtimestamp(stats.st_mtime).isoformat()}")
-                except Exception as e:
-                    logger.error(
-                        f"Error getting stats for file {filename}: {str(e)}", exc_info=True)
-                    continue
-
-            files.sort(key=lambda x: x["uploaded_at"], reverse=True)
-            logger.info(f"Found {len(files)} files")
-            return files
-
+            files, total = FileCatalogService.list_files(offset, limit, sort, order, status)
+            logger.info(f"Listed {len(files)} of {total} files")
+            return files, total
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error getting file list: {str(e)}", exc_info=True)
             raise HTTPException(
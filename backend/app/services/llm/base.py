@@ -1,20 +1,93 @@
+import threading
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from fastapi.concurrency import run_in_threadpool
 from langchain_core.prompts import ChatPromptTemplate
+from app.services.llm.response_cache import ResponseCache
 
 
 class BaseLLMService(ABC):
+    provider_name = ""
+    model_name = ""
+    temperature = 0.7
+
     def __init__(self):
         self.prompt_template = ChatPromptTemplate.from_messages([
             ("system", "You are a helpful assistant. Answer the user's question concisely and accurately."),
             ("user", "{prompt}")
         ])
+        self._chain = None
+        self._chain_lock = threading.Lock()
 
     @abstractmethod
     def get_llm(self):
+        """Build a new provider client. Use `chain` to get the shared one."""
         pass
 
-    def generate_response(self, prompt: str) -> str:
-        llm = self.get_llm()
-        chain = self.prompt_template | llm
-        response = chain.invoke({"prompt": prompt})
-        return response.content
+    @property
+    def chain(self):
+        # The client (and its HTTP pool / auth token) is built once per
+        # service instance and reused by every request.
+        if self._chain is None:
+            with self._chain_lock:
+                if self._chain is None:
+                    self._chain = self.prompt_template | self.get_llm()
+        return self._chain
+
+    @staticmethod
+    def response_text(response) -> str:
+        # Chat models return messages, completion LLMs (GigaChat, YandexGPT) return str
+        return getattr(response, "content", response)
+
+    @property
+    def cache_identity(self) -> str:
+        return ResponseCache.identity(self.provider_name, self.model_name, self.temperature)
+
+    def generate_response(self, prompt: str, cache_scope: str | None = None) -> str:
+        """`cache_scope` names the calling endpoint for the opt-in response cache."""
+        use_cache = ResponseCache.is_enabled(cache_scope)
+        if use_cache:
+            cached, vector = ResponseCache.lookup(cache_scope, self.cache_identity, prompt)
+            if cached is not None:
+                return cached
+
+        response = self.response_text(self.chain.invoke({"prompt": prompt}))
+
+        if use_cache:
+            ResponseCache.set(self.cache_identity, prompt, response, vector)
+        return response
+
+    async def agenerate_response(self, prompt: str, cache_scope: str | None = None) -> str:
+        use_cache = ResponseCache.is_enabled(cache_scope)
+        if use_cache:
+            # Semantic lookups embed the prompt, keep that off the event loop
+            cached, vector = await run_in_threadpool(
+                ResponseCache.lookup, cache_scope, self.cache_identity, prompt)
+            if cached is not None:
+                return cached
+
+        response = self.response_text(await self.chain.ainvoke({"prompt": prompt}))
+
+        if use_cache:
+            await run_in_threadpool(ResponseCache.set, self.cache_identity, prompt, response, vector)
+        return response
+
+    async def astream_response(self, prompt: str, cache_scope: str | None = None) -> AsyncIterator[str]:
+        """Yield the completion text piece by piece as the provider produces it."""
+        use_cache = ResponseCache.is_enabled(cache_scope)
+        if use_cache:
+            cached, vector = await run_in_threadpool(
+                ResponseCache.lookup, cache_scope, self.cache_identity, prompt)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        async for chunk in self.chain.astream({"prompt": prompt}):
+            text = self.response_text(chunk)
+            if text:
+                parts.append(text)
+                yield text
+
+        if use_cache:
+            await run_in_threadpool(ResponseCache.set, self.cache_identity, prompt, "".join(parts), vector)
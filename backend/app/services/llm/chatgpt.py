@@ -4,9 +4,12 @@ from app.core.config import settings
 
 
 class ChatGPTService(BaseLLMService):
+    provider_name = "chatgpt"
+    model_name = "gpt-3.5-turbo"
+
     def get_llm(self):
         return ChatOpenAI(
-            model="gpt-3.5-turbo",
+            model=self.model_name,
             api_key=settings.OPENAI_API_KEY,
-            temperature=0.7
+            temperature=self.temperature
         )
@@ -4,10 +4,13 @@ from app.core.config import settings
 
 
 class DeepSeekService(BaseLLMService):
+    provider_name = "deepseek"
+    model_name = "deepseek-chat"
+
     def get_llm(self):
         return ChatOpenAI(
-            model="deepseek-chat",
+            model=self.model_name,
             api_key=settings.DEEPSEEK_API_KEY,
             base_url="https://api.deepseek.com/v1",
-            temperature=0.7
+            temperature=self.temperature
         )
@@ -4,10 +4,13 @@ from app.core.config import settings
 
 
 class GigaChatService(BaseLLMService):
+    provider_name = "gigachat"
+    model_name = "GigaChat"
+
     def get_llm(self):
         return GigaChat(
             client_id=settings.GIGACHAT_CLIENT_ID,
             client_secret=settings.GIGACHAT_SECRET,
-            model="GigaChat",
-            temperature=0.7
+            model=self.model_name,
+            temperature=self.temperature
         )
@@ -0,0 +1,52 @@
+import threading
+from app.services.llm.base import BaseLLMService
+from app.services.llm.chatgpt import ChatGPTService
+from app.services.llm.yandexgpt import YandexGPTService
+from app.services.llm.gigachat import GigaChatService
+from app.services.llm.deepseek import DeepSeekService
+
+
+class LLMServiceRegistry:
+    """Process-wide provider services, created on first use and then reused."""
+
+    PROVIDERS = {
+        "chatgpt": ChatGPTService,
+        "yandexgpt": YandexGPTService,
+        "gigachat": GigaChatService,
+        "deepseek": DeepSeekService,
+    }
+
+    _services: dict[str, BaseLLMService] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def provider_key(provider_name) -> str:
+        # Accept both plain strings and LLMProvider members
+        return str(getattr(provider_name, "value", provider_name))
+
+    @staticmethod
+    def is_supported(provider_name) -> bool:
+        return LLMServiceRegistry.provider_key(provider_name) in LLMServiceRegistry.PROVIDERS
+
+    @staticmethod
+    def get(provider_name) -> BaseLLMService:
+        provider_name = LLMServiceRegistry.provider_key(provider_name)
+        service = LLMServiceRegistry._services.get(provider_name)
+        if service is not None:
+            return service
+
+        service_class = LLMServiceRegistry.PROVIDERS.get(provider_name)
+        if service_class is None:
+            raise ValueError(f"Unsupported LLM provider: {provider_name}")
+
+        with LLMServiceRegistry._lock:
+            service = LLMServiceRegistry._services.get(provider_name)
+            if service is None:
+                service = service_class()
+                LLMServiceRegistry._services[provider_name] = service
+            return service
+
+    @staticmethod
+    def clear() -> None:
+        with LLMServiceRegistry._lock:
+            LLMServiceRegistry._services.clear()
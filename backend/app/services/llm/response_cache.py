@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import threading
+from collections import deque
+import numpy as np
+
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Opt-in cache of LLM completions.
+
+    Exact matches are looked up by a hash of (provider, model, temperature,
+    prompt). When LLM_CACHE_SEMANTIC_THRESHOLD is set, prompts whose
+    embedding is at least that similar to a cached prompt for the same
+    model also hit.
+    """
+
+    exact = TTLCache(settings.LLM_CACHE_SIZE, settings.LLM_CACHE_TTL)
+    # (identity, unit embedding, exact key) of recent prompts, oldest first
+    _semantic_entries = deque(maxlen=settings.LLM_CACHE_SIZE)
+    _semantic_lock = threading.Lock()
+    _metrics: dict[str, dict[str, int]] = {}
+    _metrics_lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled(scope: str | None) -> bool:
+        return scope is not None and scope in settings.LLM_CACHE_ENDPOINTS
+
+    @staticmethod
+    def identity(provider: str, model: str, temperature: float) -> str:
+        return f"{provider}|{model}|{temperature}"
+
+    @staticmethod
+    def key(identity: str, prompt: str) -> str:
+        return hashlib.sha256(f"{identity}\n{prompt}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def record(scope: str, outcome: str) -> None:
+        with ResponseCache._metrics_lock:
+            counters = ResponseCache._metrics.setdefault(
+                scope, {"exact_hits": 0, "semantic_hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    @staticmethod
+    def embed(prompt: str) -> np.ndarray:
+        from app.services.rag.embeddings import EmbeddingModelRegistry
+
+        vector = np.asarray(EmbeddingModelRegistry.get(
+            settings.VECTORIZE_MODEL).embed_query(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def get(scope: str, identity: str, prompt: str) -> str | None:
+        return ResponseCache.lookup(scope, identity, prompt)[0]
+
+    @staticmethod
+    def lookup(scope: str, identity: str, prompt: str) -> tuple[str | None, np.ndarray | None]:
+        """Cached response for `prompt`, and the prompt's embedding if the
+        semantic lookup computed it; pass that on to `set()` after a miss."""
+        key = ResponseCache.key(identity, prompt)
+        response = ResponseCache.exact.get(key)
+        if response is not None:
+            ResponseCache.record(scope, "exact_hits")
+            return response, None
+
+        vector = None
+        if settings.LLM_CACHE_SEMANTIC_THRESHOLD > 0:
+            response, vector = ResponseCache.get_similar(identity, prompt)
+            if response is not None:
+                ResponseCache.record(scope, "semantic_hits")
+                return response, vector
+
+        ResponseCache.record(scope, "misses")
+        return None, vector
+
+    @staticmethod
+    def get_similar(identity: str, prompt: str) -> tuple[str | None, np.ndarray | None]:
+        with ResponseCache._semantic_lock:
+            entries = [(vector, key) for entry_identity, vector, key
+                       in ResponseCache._semantic_entries if entry_identity == identity]
+        if not entries:
+            return None, None
+
+        query = ResponseCache.embed(prompt)
+        scores = np.stack([vector for vector, _ in entries]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < settings.LLM_CACHE_SEMANTIC_THRESHOLD:
+            return None, query
+        # The exact entry may have expired or been evicted in the meantime
+        return ResponseCache.exact.get(entries[best][1]), query
+
+    @staticmethod
+    def set(identity: str, prompt: str, response: str, vector: np.ndarray | None = None) -> None:
+        """`vector` is the prompt embedding from `lookup()`, if it made one."""
+        key = ResponseCache.key(identity, prompt)
+        ResponseCache.exact.set(key, response)
+        if settings.LLM_CACHE_SEMANTIC_THRESHOLD > 0:
+            if vector is None:
+                try:
+                    vector = ResponseCache.embed(prompt)
+                except Exception as e:
+                    logger.warning(f"Could not embed prompt for response cache: {str(e)}")
+                    return
+            with ResponseCache._semantic_lock:
+                ResponseCache._semantic_entries.append((identity, vector, key))
+
+    @staticmethod
+    def clear() -> None:
+        ResponseCache.exact.clear()
+        with ResponseCache._semantic_lock:
+            ResponseCache._semantic_entries.clear()
+        with ResponseCache._metrics_lock:
+            ResponseCache._metrics.clear()
+
+    @staticmethod
+    def get_stats() -> dict:
+        with ResponseCache._metrics_lock:
+            endpoints = {scope: dict(counters)
+                         for scope, counters in ResponseCache._metrics.items()}
+        return {
+            "enabled_endpoints": sorted(settings.LLM_CACHE_ENDPOINTS),
+            "semantic_threshold": settings.LLM_CACHE_SEMANTIC_THRESHOLD,
+            "entries": ResponseCache.exact.stats(),
+            "endpoints": endpoints,
+        }
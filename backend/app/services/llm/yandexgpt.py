@@ -4,9 +4,13 @@ from app.core.config import settings
 
 
 class YandexGPTService(BaseLLMService):
+    provider_name = "yandexgpt"
+    model_name = "yandexgpt-lite"
+
     def get_llm(self):
         return YandexGPT(
             api_key=settings.YANDEX_API_KEY,
             folder_id=settings.YANDEX_FOLDER_ID,
-            temperature=0.7
+            model_name=self.model_name,
+            temperature=self.temperature
         )
@@ -0,0 +1,412 @@
+import os
+import time
+import queue
+import hashlib
+import logging
+import tempfile
+import threading
+import zipfile
+import multiprocessing
+from typing import BinaryIO, Callable
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.file_manager.file_service import FileService
+from app.services.file_manager.catalog import FileCatalogService
+from app.services.rag.chunking import ChunkingService
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.vector_store import VectorStoreManager
+from app.utils.pdf_parser import PDFParser
+
+logger = logging.getLogger(__name__)
+
+
+def init_parse_worker() -> None:
+    # The worker is already one of many processes, OCR its pages in place
+    PDFParser.OCR_INLINE = True
+
+
+def parse_worker(file_path: str, content_hash: str | None = None) -> tuple[str | None, int | None, str | None]:
+    """Parse one file in a worker process, returning (content, page count, error)."""
+    try:
+        return *ChunkingService.parse_file(file_path, content_hash), None
+    except HTTPException as e:
+        return None, None, str(e.detail)
+    except Exception as e:
+        return None, None, str(e)
+
+
+class BulkIngestionService:
+    """Ingests many files at once.
+
+    Files are parsed (and OCRed) on a process pool; their chunks are
+    embedded in shared batches that span files, and a single writer thread
+    stores them in Chroma. A failing file is reported and skipped without
+    aborting the rest of the batch.
+    """
+
+    COPY_BLOCK_SIZE = 1024 * 1024
+
+    @staticmethod
+    def get_worker_count() -> int:
+        if settings.BULK_PARSE_WORKERS > 0:
+            return settings.BULK_PARSE_WORKERS
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def get_parse_pool(workers: int):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_parse_worker
+        )
+
+    @staticmethod
+    def stage_stream(stream: BinaryIO, name: str) -> str:
+        """Copy `stream` into the upload directory as `name`, returning the stored filename.
+
+        An existing file with identical content is reused; a different one
+        is never overwritten.
+        """
+        filename = os.path.basename(name).replace(" ", "_")
+        _, ext = os.path.splitext(filename)
+        if ext.lower() not in ChunkingService.SUPPORTED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported file extension: {ext}")
+
+        os.makedirs(FileService.UPLOAD_DIR, exist_ok=True)
+        target = os.path.join(FileService.UPLOAD_DIR, filename)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=FileService.UPLOAD_DIR, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in iter(lambda: stream.read(BulkIngestionService.COPY_BLOCK_SIZE), b""):
+                    digest.update(block)
+                    size += len(block)
+                    f.write(block)
+
+            if os.path.exists(target):
+                existing = hashlib.sha256()
+                with open(target, "rb") as f:
+                    for block in iter(lambda: f.read(BulkIngestionService.COPY_BLOCK_SIZE), b""):
+                        existing.update(block)
+                if existing.hexdigest() != digest.hexdigest():
+                    raise HTTPException(
+                        status_code=409, detail="File already exists with different content")
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, target)
+                FileCatalogService.add(filename, size, digest.hexdigest())
+            return filename
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def stage_zip(archive: BinaryIO) -> tuple[list[str], list[dict]]:
+        """Unpack the supported files of a ZIP archive into the upload directory."""
+        max_bytes = settings.BULK_MAX_FILE_MB * 1024 * 1024
+        filenames, failures = [], []
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                members = [member for member in zf.infolist() if not member.is_dir()
+                           and os.path.splitext(member.filename)[1].lower()
+                           in ChunkingService.SUPPORTED_EXTENSIONS]
+                BulkIngestionService.check_file_count(len(members))
+                for member in members:
+                    try:
+                        if member.file_size > max_bytes:
+                            raise HTTPException(
+                                status_code=413, detail=f"File exceeds {settings.BULK_MAX_FILE_MB} MB")
+                        with zf.open(member) as stream:
+                            filenames.append(BulkIngestionService.stage_stream(stream, member.filename))
+                    except HTTPException as e:
+                        failures.append({"filename": member.filename, "error": str(e.detail)})
+                    except Exception as e:
+                        failures.append({"filename": member.filename, "error": str(e)})
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Uploaded file is not a valid ZIP archive")
+        return BulkIngestionService.deduplicate(filenames, failures)
+
+    @staticmethod
+    def stage_directory(directory: str) -> tuple[list[str], list[dict]]:
+        """Copy the supported files under a server-side directory into the upload directory.
+
+        Only directories inside BULK_INGEST_ROOT are accepted, and files
+        symlinked to somewhere outside it are skipped.
+        """
+        if not settings.BULK_INGEST_ROOT:
+            raise HTTPException(
+                status_code=403, detail="Server-side directory ingestion is disabled")
+        root = os.path.realpath(settings.BULK_INGEST_ROOT)
+        directory = os.path.realpath(os.path.join(root, directory))
+        if os.path.commonpath([root, directory]) != root:
+            raise HTTPException(
+                status_code=403, detail="Directory is outside the allowed ingestion root")
+        if not os.path.isdir(directory):
+            raise HTTPException(status_code=404, detail="Directory not found")
+
+        paths = []
+        for current, dirs, files in os.walk(directory):
+            dirs.sort()
+            paths.extend(os.path.join(current, name) for name in sorted(files)
+                         if os.path.splitext(name)[1].lower() in ChunkingService.SUPPORTED_EXTENSIONS)
+        BulkIngestionService.check_file_count(len(paths))
+
+        max_bytes = settings.BULK_MAX_FILE_MB * 1024 * 1024
+        filenames, failures = [], []
+        for path in paths:
+            relative = os.path.relpath(path, directory)
+            try:
+                real_path = os.path.realpath(path)
+                if os.path.commonpath([root, real_path]) != root:
+                    raise HTTPException(
+                        status_code=403, detail="File is outside the allowed ingestion root")
+                if os.path.getsize(real_path) > max_bytes:
+                    raise HTTPException(
+                        status_code=413, detail=f"File exceeds {settings.BULK_MAX_FILE_MB} MB")
+                with open(real_path, "rb") as stream:
+                    filenames.append(BulkIngestionService.stage_stream(stream, relative))
+            except HTTPException as e:
+                failures.append({"filename": relative, "error": str(e.detail)})
+            except OSError as e:
+                failures.append({"filename": relative, "error": str(e)})
+        return BulkIngestionService.deduplicate(filenames, failures)
+
+    @staticmethod
+    def check_file_count(count: int) -> None:
+        if count > settings.BULK_MAX_FILES:
+            raise HTTPException(
+                status_code=413, detail=f"Too many files: {count} > {settings.BULK_MAX_FILES}")
+        if not count:
+            raise HTTPException(status_code=400, detail="No supported files found")
+
+    @staticmethod
+    def deduplicate(filenames: list[str], failures: list[dict]) -> tuple[list[str], list[dict]]:
+        # Identical files under different folders flatten to one upload
+        return list(dict.fromkeys(filenames)), failures
+
+    @staticmethod
+    def ingest(filenames: list[str], collection: str | None = None, tags: list[str] | None = None,
+               failures: list[dict] | None = None, batch_size: int | None = None,
+               progress: Callable[[str, float], None] | None = None) -> dict:
+        """Ingest already uploaded files, returning aggregate throughput and per-file failures.
+
+        `progress(stage, fraction)` reports the share of files through each
+        stage; an exception raised from it aborts the batch after the
+        writer has flushed what was already embedded.
+        """
+        collection = VectorStoreManager.validate_collection_name(collection)
+        # Every file in the batch goes to one collection, embedded the same way
+        binding = CollectionBindingService.resolve(collection)
+        tags = ChunkingService.normalize_tags(tags)
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        progress = progress or (lambda stage, fraction: None)
+        started = time.perf_counter()
+        ingested_at = int(time.time())
+
+        state = {
+            "failed": {},
+            "finished": 0,
+            "finalized": set(),
+            "write_seconds": 0.0,
+        }
+        lock = threading.Lock()
+        plans = {}
+        writes = queue.Queue(maxsize=settings.BULK_WRITE_QUEUE_SIZE)
+
+        def fail(filename: str, error: str) -> None:
+            logger.warning(f"Bulk ingestion of {filename} failed: {error}")
+            with lock:
+                state["failed"][filename] = error
+
+        def writer() -> None:
+            # The only thread writing to Chroma for this batch
+            while True:
+                task = writes.get()
+                if task is None:
+                    return
+                write_started = time.perf_counter()
+                kind, payload = task
+                if kind == "chunks":
+                    items, embeddings = payload
+                    try:
+                        ChunkingService.write_chunks(
+                            collection, items, embeddings, tags, ingested_at, binding)
+                    except Exception as e:
+                        for filename in {item[0] for item in items}:
+                            fail(filename, f"Error writing chunks: {str(e)}")
+                else:
+                    plan = payload
+                    with lock:
+                        skip = plan["filename"] in state["failed"]
+                    if not skip:
+                        try:
+                            ChunkingService.finalize_ingest(plan, ingested_at)
+                            with lock:
+                                state["finalized"].add(plan["filename"])
+                        except Exception as e:
+                            fail(plan["filename"], f"Error finalizing ingest: {str(e)}")
+                with lock:
+                    state["write_seconds"] += time.perf_counter() - write_started
+                    if kind == "finalize":
+                        state["finished"] += 1
+
+        writer_thread = threading.Thread(target=writer, name="bulk-ingest-writer", daemon=True)
+        writer_thread.start()
+
+        timings = {"parse": 0.0, "split": 0.0, "embed": 0.0}
+        counts = {"parsed": 0, "embedded": 0, "unchanged": 0}
+        buffer = []
+        remaining = {}
+        embedding_model = ChunkingService.get_embedding_model(binding)
+        total = len(filenames)
+
+        def report() -> None:
+            if not total:
+                return
+            with lock:
+                finished = state["finished"]
+                done = counts["unchanged"] + len(state["failed"])
+            # Files failing late are counted twice, hence the clamping
+            progress("parse", counts["parsed"] / total)
+            progress("embed", min((counts["embedded"] + done) / total, 1.0))
+            progress("write", min((finished + done) / total, 1.0))
+
+        def flush(force: bool = False) -> None:
+            while buffer and (force or len(buffer) >= batch_size):
+                batch = buffer[:batch_size]
+                del buffer[:batch_size]
+                batch_files = {item[0] for item in batch}
+                embed_started = time.perf_counter()
+                try:
+                    embeddings = embedding_model.embed_documents([item[3] for item in batch])
+                    writes.put(("chunks", (batch, embeddings)))
+                except Exception as e:
+                    for filename in batch_files:
+                        fail(filename, f"Error embedding chunks: {str(e)}")
+                timings["embed"] += time.perf_counter() - embed_started
+                for item in batch:
+                    remaining[item[0]] -= 1
+                for filename in batch_files:
+                    if not remaining[filename]:
+                        counts["embedded"] += 1
+                        # Queued after the file's last chunk batch, so the
+                        # writer finalizes it only once its chunks are stored
+                        writes.put(("finalize", plans[filename]))
+
+        def handle(filename: str, content: str | None, page_count: int | None, error: str | None) -> None:
+            counts["parsed"] += 1
+            if error is not None:
+                fail(filename, error)
+                return
+            try:
+                split_started = time.perf_counter()
+                chunks = ChunkingService.split_content(content)
+                timings["split"] += time.perf_counter() - split_started
+                plan = ChunkingService.plan_ingest(filename, content, chunks, collection, tags)
+            except HTTPException as e:
+                fail(filename, str(e.detail))
+                return
+            except Exception as e:
+                fail(filename, str(e))
+                return
+
+            plan["page_count"] = page_count
+            plans[filename] = plan
+            if plan["unchanged"]:
+                counts["unchanged"] += 1
+            elif not plan["pending"]:
+                counts["embedded"] += 1
+                writes.put(("finalize", plan))
+            else:
+                remaining[filename] = len(plan["pending"])
+                buffer.extend((filename, i, chunk_id, chunk) for i, chunk_id, chunk in plan["pending"])
+                flush()
+
+        workers = BulkIngestionService.get_worker_count()
+        pool = BulkIngestionService.get_parse_pool(workers)
+        try:
+            queued = []
+            for filename in filenames:
+                FileCatalogService.update_status(filename, "processing")
+                try:
+                    file_path = ChunkingService.get_file_path(filename)
+                    queued.append((filename, file_path, FileCatalogService.get_hash(filename, file_path)))
+                except HTTPException as e:
+                    counts["parsed"] += 1
+                    fail(filename, str(e.detail))
+
+            # Keep a bounded number of parses in flight so parsed text
+            # does not pile up while embedding catches up
+            in_flight = {}
+            parse_started = time.perf_counter()
+            while queued or in_flight:
+                while queued and len(in_flight) < workers * 2:
+                    filename, file_path, content_hash = queued.pop(0)
+                    in_flight[pool.submit(parse_worker, file_path, content_hash)] = filename
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    filename = in_flight.pop(future)
+                    try:
+                        content, page_count, error = future.result()
+                    except Exception as e:
+                        content, page_count, error = None, None, f"Parser process failed: {str(e)}"
+                    handle(filename, content, page_count, error)
+                report()
+            timings["parse"] = time.perf_counter() - parse_started - timings["embed"] - timings["split"]
+            flush(force=True)
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            writes.put(None)
+            writer_thread.join()
+            # Files stored before the abort keep their result, the rest are
+            # marked so they are not left "processing"
+            for filename in filenames:
+                plan = plans.get(filename)
+                if plan is not None and (plan["unchanged"] or filename in state["finalized"]):
+                    FileCatalogService.update_status(
+                        filename, "ingested", chunk_count=len(plan["chunk_ids"]),
+                        page_count=plan["page_count"])
+                else:
+                    FileCatalogService.update_status(
+                        filename, "failed", error="Bulk ingestion aborted")
+            raise
+        pool.shutdown()
+        writes.put(None)
+        writer_thread.join()
+        report()
+
+        seconds = time.perf_counter() - started
+        failed = list(failures or []) + [{"filename": filename, "error": error}
+                                         for filename, error in state["failed"].items()]
+        succeeded = [plan for filename, plan in plans.items() if filename not in state["failed"]]
+        for plan in succeeded:
+            FileCatalogService.update_status(
+                plan["filename"], "ingested", chunk_count=len(plan["chunk_ids"]),
+                page_count=plan["page_count"])
+        for filename, error in state["failed"].items():
+            FileCatalogService.update_status(filename, "failed", error=error)
+        chunk_count = sum(len(plan["chunk_ids"]) for plan in succeeded)
+        timings["write"] = state["write_seconds"]
+        result = {
+            "files": total + len(failures or []),
+            "succeeded": len(succeeded),
+            "unchanged": counts["unchanged"],
+            "failed": failed,
+            "chunk_count": chunk_count,
+            "added": sum(len(plan["pending"]) for plan in succeeded),
+            "deleted": sum(len(plan["stale_ids"]) for plan in succeeded),
+            "timings": {stage: round(value, 3) for stage, value in timings.items()},
+            "seconds": round(seconds, 3),
+            "files_per_second": round(len(succeeded) / seconds, 2) if seconds else None,
+            "chunks_per_second": round(chunk_count / seconds, 1) if seconds else None,
+        }
+        logger.info(
+            f"Bulk ingested {result['succeeded']}/{result['files']} files "
+            f"({chunk_count} chunks) in {seconds:.2f}s, {len(failed)} failed")
+        return result
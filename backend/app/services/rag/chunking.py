@@ -1,20 +1,37 @@
 import os
 import re
+import time
+import hashlib
+import logging
+from typing import Callable
 from fastapi import HTTPException
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 
 from app.services.file_manager.file_service import FileService
+from app.services.file_manager.catalog import FileCatalogService
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.vector_store import VectorStoreManager
+from app.services.rag.manifest import ChunkManifestService
+from app.services.rag.lexical_index import LexicalIndexService
 from app.utils.pdf_parser import PDFParser
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class IngestionStopped(Exception):
+    """Raised from a progress callback to stop an ingest; parsing lets it through."""
+
 
 class ChunkingService:
-    VECTOR_DB_DIR = "chroma_db"
-    COLLECTION_NAME = "documents"
+    VECTOR_DB_DIR = settings.VECTOR_DB_DIR
+    COLLECTION_NAME = settings.VECTOR_COLLECTION_NAME
     SUPPORTED_EXTENSIONS = {".txt", ".pdf"}
     MIN_CHUNK_LENGTH = 20
+    TAG_PREFIX = "tag:"
+
+    # (collection, model) pairs already warned about diverging from VECTORIZE_MODEL
+    _warned_bindings: set[tuple[str, str]] = set()
 
     @staticmethod
     def clean_text(text: str) -> str:
@@ -30,11 +47,79 @@ class ChunkingService:
         )
 
     @staticmethod
-    def get_embedding_model():
-        return HuggingFaceEmbeddings(model_name=settings.VECTORIZE_MODEL)
+    def get_embedding_model(binding: dict | None = None):
+        """Document embedder for a collection binding (default collection if omitted)."""
+        return CollectionBindingService.get_embeddings(binding or CollectionBindingService.resolve())
+
+    @staticmethod
+    def content_hash(content: str, model_name: str, tags: list[str] | None = None) -> str:
+        splitter = ChunkingService.get_text_splitter()
+        digest = hashlib.sha256()
+        # Splitter settings and the model decide the stored vectors too,
+        # tags only the metadata
+        digest.update(
+            f"{model_name}|{splitter._chunk_size}|{splitter._chunk_overlap}|"
+            f"{ChunkingService.MIN_CHUNK_LENGTH}|{','.join(tags or [])}\n".encode("utf-8"))
+        digest.update(content.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def normalize_tags(tags: list[str] | None) -> list[str]:
+        return sorted({tag.strip() for tag in tags or [] if tag.strip()})
+
+    @staticmethod
+    def chunk_metadata(filename: str, chunk_index: int, tags: list[str], ingested_at: int) -> dict:
+        """Chroma metadata for a chunk; tags become boolean `tag:<name>` keys
+        because Chroma metadata values cannot be lists."""
+        metadata = {"filename": filename, "chunk_index": chunk_index, "ingested_at": ingested_at}
+        metadata.update({f"{ChunkingService.TAG_PREFIX}{tag}": True for tag in tags})
+        return metadata
+
+    @staticmethod
+    def chunk_ids(filename: str, chunks: list[str]) -> list[str]:
+        """Content-addressed ids; repeated chunks get an occurrence suffix."""
+        seen = {}
+        ids = []
+        for chunk in chunks:
+            digest = hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16]
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+            ids.append(f"{filename}_{digest}" if not occurrence else f"{filename}_{digest}_{occurrence}")
+        return ids
+
+    @staticmethod
+    def iter_batches(items: list, batch_size: int):
+        for start in range(0, len(items), batch_size):
+            yield items[start:start + batch_size]
 
     @staticmethod
     def process_file(filename: str) -> int:
+        return ChunkingService.ingest_file(filename)["chunk_count"]
+
+    @staticmethod
+    def parse_file(file_path: str, content_hash: str | None = None,
+                   progress: Callable[[float], None] | None = None) -> tuple[str, int | None]:
+        """Extract and clean the text of a supported file.
+
+        Returns the text and the page count (None for plain text).
+        `content_hash` is the file's known SHA-256, which saves hashing it
+        again for the extraction cache. `progress(fraction)` follows OCR.
+        """
+        _, ext = os.path.splitext(file_path)
+        try:
+            if ext.lower() == ".pdf":
+                pages = PDFParser.extract_pages(file_path, content_hash, progress)
+                return ChunkingService.clean_text(PDFParser.join_pages(file_path, pages)), len(pages)
+            with open(file_path, "r", encoding="utf-8") as f:
+                return ChunkingService.clean_text(f.read()), None
+        except IngestionStopped:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error reading file: {str(e)}")
+
+    @staticmethod
+    def get_file_path(filename: str) -> str:
         file_path = os.path.join(FileService.UPLOAD_DIR, filename)
 
         if not os.path.exists(file_path):
@@ -45,44 +130,231 @@ class ChunkingService:
         if ext.lower() not in ChunkingService.SUPPORTED_EXTENSIONS:
             raise HTTPException(
                 status_code=400, detail=f"Unsupported file extension: {ext}")
+        return file_path
 
-        try:
-            if ext.lower() == ".pdf":
-                content = PDFParser.extract_text_from_pdf(file_path)
-            else:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-            content = ChunkingService.clean_text(content)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error reading file: {str(e)}")
+    @staticmethod
+    def split_content(content: str) -> list[tuple[int, str]]:
+        """(position, text) of the chunks long enough to keep.
 
+        Positions count every chunk the splitter produced, including the
+        dropped short ones, so only consecutive positions are adjacent text.
+        """
         text_splitter = ChunkingService.get_text_splitter()
-        chunks = text_splitter.split_text(content)
-
-        chunks = [chunk for chunk in chunks if len(
-            chunk.strip()) >= ChunkingService.MIN_CHUNK_LENGTH]
+        chunks = [(position, chunk) for position, chunk in enumerate(text_splitter.split_text(content))
+                  if len(chunk.strip()) >= ChunkingService.MIN_CHUNK_LENGTH]
         if not chunks:
             raise HTTPException(
                 status_code=400, detail="No valid chunks extracted from file")
+        return chunks
+
+    @staticmethod
+    def plan_ingest(filename: str, content: str, chunks: list[tuple[int, str]], collection: str,
+                    tags: list[str]) -> dict:
+        """Work out which chunks need embedding, which are kept and which are stale."""
+        # The collection's binding decides the model, so a changed
+        # VECTORIZE_MODEL cannot mix embedding spaces in one collection
+        binding = CollectionBindingService.resolve(collection)
+        model_name = binding["embedding_model"]
+        if model_name != settings.VECTORIZE_MODEL and \
+                (collection, model_name) not in ChunkingService._warned_bindings:
+            ChunkingService._warned_bindings.add((collection, model_name))
+            logger.warning(
+                f"Collection {collection} is bound to {model_name}, not VECTORIZE_MODEL "
+                f"{settings.VECTORIZE_MODEL}; re-embed it to switch models")
+        content_hash = ChunkingService.content_hash(content, model_name, tags)
+        manifest = ChunkManifestService.get(filename, collection)
+        plan = {
+            "filename": filename,
+            "collection": collection,
+            "tags": tags,
+            "model_name": model_name,
+            "binding": binding,
+            "content_hash": content_hash,
+            "unchanged": False,
+        }
+
+        if manifest and manifest["content_hash"] == content_hash:
+            plan.update(unchanged=True, chunk_ids=manifest["chunk_ids"],
+                        kept=[], pending=[], stale_ids=[])
+            return plan
+
+        chunk_ids = ChunkingService.chunk_ids(filename, [text for _, text in chunks])
+        if manifest:
+            previous_ids = set(manifest["chunk_ids"])
+        else:
+            # No manifest yet (e.g. ingested before manifests existed), so
+            # take whatever the collection holds for this file
+            with VectorStoreManager.read(collection) as vector_store:
+                previous_ids = set(vector_store._collection.get(
+                    where={"filename": filename}, include=[])["ids"])
 
-        embedding_model = ChunkingService.get_embedding_model()
-        vector_store = Chroma(
-            collection_name=ChunkingService.COLLECTION_NAME,
-            embedding_function=embedding_model,
-            persist_directory=ChunkingService.VECTOR_DB_DIR
+        plan.update(
+            chunk_ids=chunk_ids,
+            stale_ids=sorted(previous_ids - set(chunk_ids)),
+            kept=[(position, chunk_id) for (position, _), chunk_id in zip(chunks, chunk_ids)
+                  if chunk_id in previous_ids],
+            pending=[(position, chunk_id, text) for (position, text), chunk_id in zip(chunks, chunk_ids)
+                     if chunk_id not in previous_ids],
         )
+        return plan
 
-        chunk_count = 0
-        for i, chunk in enumerate(chunks):
-            vector_id = f"{filename}_{i}"
-            vector_store.add_texts(
-                texts=[chunk],
-                metadatas=[{"filename": filename, "chunk_index": i}],
-                ids=[vector_id]
+    @staticmethod
+    def write_chunks(collection: str, items: list[tuple[str, int, str, str]], embeddings: list,
+                     tags: list[str], ingested_at: int, binding: dict) -> None:
+        """Upsert embedded (filename, chunk_index, chunk_id, text) items, possibly from several files.
+
+        `binding` is the one the embeddings were made with; the write is
+        rejected if the collection has been bound differently since.
+        """
+        with VectorStoreManager.write(collection) as vector_store:
+            if embeddings:
+                CollectionBindingService.record_write(collection, binding, len(embeddings[0]))
+            vector_store._collection.upsert(
+                ids=[chunk_id for _, _, chunk_id, _ in items],
+                embeddings=embeddings,
+                metadatas=[ChunkingService.chunk_metadata(filename, i, tags, ingested_at)
+                           for filename, i, _, _ in items],
+                documents=[text for _, _, _, text in items]
             )
-            chunk_count += 1
+            VectorStoreManager.record_changes(collection, [chunk_id for _, _, chunk_id, _ in items])
+            # Under the lock and before the version bump, so keyword results
+            # cached for the new version already include these chunks
+            by_file = {}
+            for filename, _, chunk_id, text in items:
+                by_file.setdefault(filename, []).append((chunk_id, text))
+            for filename, entries in by_file.items():
+                LexicalIndexService.add(
+                    [chunk_id for chunk_id, _ in entries], [text for _, text in entries],
+                    filename, collection)
+
+    @staticmethod
+    def finalize_ingest(plan: dict, ingested_at: int) -> None:
+        """Refresh kept chunks, drop stale ones and record the new manifest."""
+        filename, collection, tags = plan["filename"], plan["collection"], plan["tags"]
+        kept, stale_ids = plan["kept"], plan["stale_ids"]
+        with VectorStoreManager.write(collection) as vector_store:
+            chroma_collection = vector_store._collection
+            if kept:
+                # Unchanged chunks may have moved or been retagged, only
+                # their metadata needs updating. Chroma merges metadata on
+                # update, so dropped tags are switched off explicitly.
+                kept_ids = [chunk_id for _, chunk_id in kept]
+                previous = chroma_collection.get(ids=kept_ids, include=["metadatas"])
+                dropped = {chunk_id: {key: False for key in (metadata or {})
+                                      if key.startswith(ChunkingService.TAG_PREFIX)
+                                      and key[len(ChunkingService.TAG_PREFIX):] not in tags}
+                           for chunk_id, metadata in zip(previous["ids"], previous["metadatas"])}
+                chroma_collection.update(
+                    ids=kept_ids,
+                    metadatas=[{**dropped.get(chunk_id, {}),
+                                **ChunkingService.chunk_metadata(filename, i, tags, ingested_at)}
+                               for i, chunk_id in kept]
+                )
+            if stale_ids:
+                chroma_collection.delete(ids=stale_ids)
+                LexicalIndexService.remove(stale_ids, collection)
+            VectorStoreManager.record_changes(collection, [chunk_id for _, chunk_id in kept] + stale_ids)
+        ChunkManifestService.save(
+            filename, plan["content_hash"], plan["model_name"], plan["chunk_ids"], collection)
 
-        vector_store.persist()
+    @staticmethod
+    def ingest_file(filename: str, batch_size: int | None = None,
+                    progress: Callable[[str, float], None] | None = None,
+                    collection: str | None = None, tags: list[str] | None = None) -> dict:
+        """Parse, split, embed and store a file in `collection`.
+
+        `progress(stage, fraction)` is called as each stage advances; an
+        exception raised from it aborts the ingestion. The outcome is
+        recorded in the file catalog.
+        """
+        FileCatalogService.update_status(filename, "processing")
+        try:
+            result = ChunkingService.run_ingest(filename, batch_size, progress, collection, tags)
+        except Exception as e:
+            FileCatalogService.update_status(
+                filename, "failed", error=str(getattr(e, "detail", e)) or type(e).__name__)
+            raise
+        FileCatalogService.update_status(
+            filename, "ingested", chunk_count=result["chunk_count"], page_count=result["page_count"])
+        return result
+
+    @staticmethod
+    def run_ingest(filename: str, batch_size: int | None, progress: Callable[[str, float], None] | None,
+                   collection: str | None, tags: list[str] | None) -> dict:
+        collection = VectorStoreManager.validate_collection_name(collection)
+        tags = ChunkingService.normalize_tags(tags)
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        progress = progress or (lambda stage, fraction: None)
+        timings = {}
+        file_path = ChunkingService.get_file_path(filename)
+
+        progress("parse", 0.0)
+        started = time.perf_counter()
+        content, page_count = ChunkingService.parse_file(
+            file_path, FileCatalogService.get_hash(filename, file_path),
+            lambda fraction: progress("parse", fraction))
+        timings["parse"] = time.perf_counter() - started
+        progress("parse", 1.0)
+
+        started = time.perf_counter()
+        chunks = ChunkingService.split_content(content)
+        timings["split"] = time.perf_counter() - started
+        progress("split", 1.0)
+
+        plan = ChunkingService.plan_ingest(filename, content, chunks, collection, tags)
+        timings["embed"] = 0.0
+        timings["write"] = 0.0
+
+        if plan["unchanged"]:
+            logger.info(f"Skipping {filename}: content unchanged since last ingest")
+            progress("embed", 1.0)
+            progress("write", 1.0)
+            return ChunkingService.ingestion_result(
+                filename, len(plan["chunk_ids"]), timings, page_count=page_count,
+                added=0, deleted=0, unchanged=len(plan["chunk_ids"]))
+
+        pending = plan["pending"]
+        ingested_at = int(time.time())
+        embedding_model = ChunkingService.get_embedding_model(plan["binding"])
+        for batch_number, batch in enumerate(ChunkingService.iter_batches(pending, batch_size), start=1):
+            started = time.perf_counter()
+            embeddings = embedding_model.embed_documents([chunk for _, _, chunk in batch])
+            timings["embed"] += time.perf_counter() - started
+            done = min(batch_number * batch_size, len(pending))
+            progress("embed", done / len(pending))
+
+            started = time.perf_counter()
+            ChunkingService.write_chunks(
+                collection, [(filename, i, chunk_id, chunk) for i, chunk_id, chunk in batch],
+                embeddings, tags, ingested_at, plan["binding"])
+            timings["write"] += time.perf_counter() - started
+            progress("write", done / len(pending))
+
+        started = time.perf_counter()
+        ChunkingService.finalize_ingest(plan, ingested_at)
+        timings["write"] += time.perf_counter() - started
+        progress("embed", 1.0)
+        progress("write", 1.0)
+
+        return ChunkingService.ingestion_result(
+            filename, len(chunks), timings, page_count=page_count,
+            added=len(pending), deleted=len(plan["stale_ids"]), unchanged=len(plan["kept"]))
+
+    @staticmethod
+    def ingestion_result(filename: str, chunk_count: int, timings: dict, page_count: int | None = None,
+                         **changes) -> dict:
+        total = sum(timings.values())
+        timings = {stage: round(seconds, 3)
+                   for stage, seconds in timings.items()}
+        chunks_per_second = round(chunk_count / total, 1) if total else None
+        logger.info(
+            f"Ingested {filename}: {chunk_count} chunks in {total:.2f}s "
+            f"({chunks_per_second} chunks/s), stages: {timings}, changes: {changes}")
 
-        return chunk_count
+        return {
+            "chunk_count": chunk_count,
+            "page_count": page_count,
+            "timings": timings,
+            "chunks_per_second": chunks_per_second,
+            **changes,
+        }
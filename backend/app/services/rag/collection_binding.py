@@ -0,0 +1,233 @@
+import math
+import logging
+from collections import Counter
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.models.chunk_manifest import ChunkManifest
+from app.models.collection_binding import CollectionBinding
+from app.services.rag.embeddings import EmbeddingModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class BoundEmbeddings:
+    """Embeds documents and queries the way a collection binding prescribes."""
+
+    def __init__(self, binding: dict, backend: str | None = None):
+        self.binding = binding
+        self.model = EmbeddingModelRegistry.get(binding["embedding_model"], backend=backend)
+
+    def finish(self, vector: list[float]) -> list[float]:
+        if not self.binding["normalize"]:
+            return vector
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        prefix = self.binding["document_prefix"]
+        return [self.finish(vector) for vector in
+                self.model.embed_documents([prefix + text for text in texts])]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.finish(self.model.embed_query(self.binding["query_prefix"] + text))
+
+
+class CollectionBindingService:
+    """Records the embedding model, dimension and normalisation of each
+    vector collection, and which Chroma collection currently holds it.
+
+    Ingest and retrieval embed with the collection's binding instead of
+    VECTORIZE_MODEL, so changing the setting cannot mix embedding spaces.
+    """
+
+    # Fields that decide the stored vectors; writes must match them
+    SPACE_FIELDS = ("embedding_model", "normalize", "document_prefix")
+
+    @staticmethod
+    def default_prefixes(model_name: str) -> tuple[str, str]:
+        """(query, document) prefixes a model was trained with."""
+        # E5 models expect "query: " and "passage: " inputs
+        if "e5" in model_name.rsplit("/", 1)[-1].lower().split("-"):
+            return "query: ", "passage: "
+        return "", ""
+
+    @staticmethod
+    def spec(model_name: str | None = None, normalize: bool | None = None) -> dict:
+        model_name = model_name or settings.VECTORIZE_MODEL
+        query_prefix, document_prefix = CollectionBindingService.default_prefixes(model_name)
+        return {
+            "embedding_model": model_name,
+            "normalize": settings.EMBEDDING_NORMALIZE if normalize is None else normalize,
+            "query_prefix": query_prefix,
+            "document_prefix": document_prefix,
+        }
+
+    @staticmethod
+    def to_dict(binding: CollectionBinding) -> dict:
+        return {
+            "collection": binding.collection,
+            "physical_name": binding.physical_name,
+            "embedding_model": binding.embedding_model,
+            "dimension": binding.dimension,
+            "normalize": binding.normalize,
+            "query_prefix": binding.query_prefix,
+            "document_prefix": binding.document_prefix,
+            "migration_target": binding.migration_target,
+        }
+
+    @staticmethod
+    def same_space(first: dict, second: dict) -> bool:
+        return all(first[field] == second[field] for field in CollectionBindingService.SPACE_FIELDS)
+
+    @staticmethod
+    def resolve(collection: str | None = None) -> dict:
+        """Binding of `collection`.
+
+        Collections that were never written to get the current settings;
+        collections ingested before bindings existed are adopted with the
+        model recorded in their chunk manifests.
+        """
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        init_db()
+        with SessionLocal() as session:
+            binding = session.get(CollectionBinding, collection)
+            if binding is not None:
+                return CollectionBindingService.to_dict(binding)
+
+            # A first write may bind `collection` itself in the meantime
+            owner = session.query(CollectionBinding.collection).filter(
+                CollectionBinding.collection != collection,
+                or_(CollectionBinding.physical_name == collection,
+                    CollectionBinding.migration_target == collection)
+            ).first()
+            if owner is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Collection name {collection} is reserved by collection {owner[0]}")
+
+            models = Counter(model_name for (model_name,) in session.query(
+                ChunkManifest.embedding_model).filter(ChunkManifest.collection == collection))
+            if not models:
+                return {"collection": collection, "physical_name": collection, "dimension": None,
+                        "migration_target": None, **CollectionBindingService.spec()}
+
+            model_name = models.most_common(1)[0][0]
+            if len(models) > 1:
+                logger.warning(
+                    f"Collection {collection} mixes embeddings from {sorted(models)}; "
+                    f"binding it to {model_name}. Re-embed it to make retrieval consistent.")
+            # Ingest used neither prefixes nor normalisation before bindings
+            binding = CollectionBinding(
+                collection=collection, physical_name=collection, embedding_model=model_name,
+                normalize=False, query_prefix="", document_prefix="")
+            session.add(binding)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Adopted concurrently by another request
+                session.rollback()
+                binding = session.get(CollectionBinding, collection)
+            logger.info(f"Bound existing collection {collection} to {model_name}")
+            return CollectionBindingService.to_dict(binding)
+
+    @staticmethod
+    def get_embeddings(binding: dict, backend: str | None = None) -> BoundEmbeddings:
+        return BoundEmbeddings(binding, backend)
+
+    @staticmethod
+    def record_write(collection: str, binding: dict, dimension: int) -> dict:
+        """Check a write embedded with `binding` against the collection's
+        current binding, and bind the collection on its first write.
+
+        Called under the collection's write lock.
+        """
+        current = CollectionBindingService.resolve(collection)
+        if not CollectionBindingService.same_space(current, binding):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Collection {collection} is bound to {current['embedding_model']} "
+                       f"(normalize={current['normalize']}), not {binding['embedding_model']} "
+                       f"(normalize={binding['normalize']}); it may have been re-embedded meanwhile")
+        if current["dimension"] is not None:
+            if current["dimension"] != dimension:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Collection {collection} stores {current['dimension']}-dimensional "
+                           f"embeddings, got {dimension}")
+            return current
+
+        with SessionLocal() as session:
+            row = session.get(CollectionBinding, collection)
+            if row is None:
+                row = CollectionBinding(
+                    collection=collection, physical_name=current["physical_name"],
+                    **{field: current[field] for field in (
+                        "embedding_model", "normalize", "query_prefix", "document_prefix")})
+                session.add(row)
+            row.dimension = dimension
+            session.commit()
+            return CollectionBindingService.to_dict(row)
+
+    @staticmethod
+    def check_query(binding: dict, embedding: list[float]) -> None:
+        if binding["dimension"] is not None and len(embedding) != binding["dimension"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Query embedding from {binding['embedding_model']} has {len(embedding)} "
+                       f"dimensions, collection {binding['collection']} stores {binding['dimension']}")
+
+    @staticmethod
+    def list_bindings() -> list[dict]:
+        init_db()
+        with SessionLocal() as session:
+            return [CollectionBindingService.to_dict(binding) for binding in
+                    session.query(CollectionBinding).order_by(CollectionBinding.collection)]
+
+    @staticmethod
+    def remove(collection: str) -> None:
+        init_db()
+        with SessionLocal() as session:
+            session.query(CollectionBinding).filter(
+                CollectionBinding.collection == collection).delete()
+            session.commit()
+
+    @staticmethod
+    def start_migration(collection: str, target: str) -> dict:
+        """Reserve `target` as the Chroma collection a re-embed job fills."""
+        binding = CollectionBindingService.resolve(collection)
+        with SessionLocal() as session:
+            row = session.get(CollectionBinding, collection)
+            if row is None:
+                raise HTTPException(
+                    status_code=400, detail=f"Collection {collection} has no embedded chunks")
+            if row.migration_target not in (None, target):
+                raise HTTPException(
+                    status_code=409, detail=f"Collection {collection} is already being re-embedded")
+            row.migration_target = target
+            session.commit()
+            return {**binding, "migration_target": target}
+
+    @staticmethod
+    def finish_migration(collection: str, spec: dict, dimension: int | None) -> dict:
+        """Point `collection` at its migration target and the new embedding space."""
+        with SessionLocal() as session:
+            row = session.get(CollectionBinding, collection)
+            row.physical_name = row.migration_target
+            row.migration_target = None
+            row.dimension = dimension
+            for field, value in spec.items():
+                setattr(row, field, value)
+            session.commit()
+            return CollectionBindingService.to_dict(row)
+
+    @staticmethod
+    def abort_migration(collection: str) -> None:
+        with SessionLocal() as session:
+            row = session.get(CollectionBinding, collection)
+            if row is not None:
+                row.migration_target = None
+                session.commit()
@@ -0,0 +1,121 @@
+import logging
+
+from app.core.config import settings
+from app.utils.tokens import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+
+class ContextPackingService:
+    """Turns scored retrieval hits into prompt context within a token budget."""
+
+    # Chunks are written as "- {chunk}\n" by ChatService.augment_prompt
+    CHUNK_OVERHEAD_TOKENS = 2
+    # Must cover the splitter's chunk_overlap
+    MAX_OVERLAP_CHARS = 100
+
+    @staticmethod
+    def get_budget(provider) -> int:
+        provider = str(getattr(provider, "value", provider))
+        return settings.RAG_CONTEXT_TOKEN_BUDGETS.get(provider, settings.RAG_CONTEXT_TOKEN_BUDGET)
+
+    @staticmethod
+    def overlap_length(left: str, right: str) -> int:
+        """Length of the longest suffix of `left` that is a prefix of `right`."""
+        longest = min(len(left), len(right), ContextPackingService.MAX_OVERLAP_CHARS)
+        for size in range(longest, 0, -1):
+            if left.endswith(right[:size]):
+                return size
+        return 0
+
+    @staticmethod
+    def join(left: str, right: str) -> str:
+        overlap = ContextPackingService.overlap_length(left, right)
+        if overlap:
+            return left + right[overlap:]
+        return f"{left} {right}"
+
+    @staticmethod
+    def merge_adjacent(hits: list[dict]) -> list[dict]:
+        """Merge hits that are consecutive chunks of the same file.
+
+        `chunk_index` is the chunk's position in the splitter output before
+        short chunks are dropped, so consecutive indices are contiguous text.
+
+        A merged block keeps the best score of its members and the position
+        of its best member in the ranking.
+        """
+        blocks = []
+        by_position = {}
+        for rank, hit in enumerate(hits):
+            metadata = hit.get("metadata") or {}
+            filename, index = metadata.get("filename"), metadata.get("chunk_index")
+            if filename is None or index is None:
+                blocks.append({"rank": rank, "score": hit.get("score"), "text": hit["text"],
+                               "filename": filename, "start": None, "end": None})
+                continue
+            by_position.setdefault(filename, []).append((index, rank, hit))
+
+        for filename, entries in by_position.items():
+            entries.sort(key=lambda entry: entry[0])
+            current = None
+            for index, rank, hit in entries:
+                if current is not None and index == current["end"] + 1:
+                    current["text"] = ContextPackingService.join(current["text"], hit["text"])
+                    current["end"] = index
+                    current["rank"] = min(current["rank"], rank)
+                    current["score"] = max(current["score"], hit.get("score"),
+                                           key=lambda score: float("-inf") if score is None else score)
+                    continue
+                if current is not None and index == current["end"]:
+                    # Same chunk retrieved twice (e.g. by several rankers)
+                    continue
+                current = {"rank": rank, "score": hit.get("score"), "text": hit["text"],
+                           "filename": filename, "start": index, "end": index}
+                blocks.append(current)
+
+        return sorted(blocks, key=lambda block: block["rank"])
+
+    @staticmethod
+    def deduplicate(blocks: list[dict]) -> list[dict]:
+        """Drop blocks whose text is already contained in a better ranked block."""
+        kept = []
+        for block in blocks:
+            text = " ".join(block["text"].split())
+            if any(text in " ".join(other["text"].split()) for other in kept):
+                continue
+            kept.append(block)
+        return kept
+
+    @staticmethod
+    def pack(hits: list[dict], provider, max_tokens: int | None = None) -> list[str]:
+        """Fill `max_tokens` with the best ranked context blocks.
+
+        `hits` must be in ranking order, as returned by RetrievalService.retrieve.
+        """
+        provider = str(getattr(provider, "value", provider))
+        if max_tokens is None:
+            max_tokens = ContextPackingService.get_budget(provider)
+        blocks = ContextPackingService.deduplicate(
+            ContextPackingService.merge_adjacent(hits))
+
+        context = []
+        used = 0
+        for block in blocks:
+            tokens = TokenCounter.count(block["text"], provider) + \
+                ContextPackingService.CHUNK_OVERHEAD_TOKENS
+            if used + tokens <= max_tokens:
+                context.append(block["text"])
+                used += tokens
+            elif not context:
+                # Never send an empty context because the best block is too long
+                text = TokenCounter.truncate(
+                    block["text"], provider, max_tokens - ContextPackingService.CHUNK_OVERHEAD_TOKENS)
+                if text:
+                    context.append(text)
+                    used = max_tokens
+
+        logger.info(
+            f"Packed {len(context)} of {len(blocks)} context blocks "
+            f"({len(hits)} chunks) into ~{used}/{max_tokens} tokens for {provider}")
+        return context
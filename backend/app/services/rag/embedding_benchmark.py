@@ -0,0 +1,121 @@
+import time
+import logging
+import numpy as np
+from fastapi import HTTPException
+
+from app.services.rag.embeddings import EmbeddingModelRegistry
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.vector_store import VectorStoreManager
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBenchmarkService:
+    """Compares embedding backends on chunks of a stored collection.
+
+    Every backend embeds the same sample with the collection's binding.
+    Throughput is measured after a warm-up batch; recall@k is the overlap
+    of each backend's nearest chunks with those of the torch backend.
+    """
+
+    REFERENCE_BACKEND = "torch"
+    QUERY_WORDS = 12
+    WARMUP_TEXTS = 8
+
+    @staticmethod
+    def sample_queries(texts: list[str], count: int) -> list[str]:
+        """Pseudo-queries from the opening words of evenly spaced chunks."""
+        step = max(len(texts) // count, 1)
+        return [" ".join(text.split()[:EmbeddingBenchmarkService.QUERY_WORDS])
+                for text in texts[::step][:count]]
+
+    @staticmethod
+    def rank(query_vectors: np.ndarray, document_vectors: np.ndarray, top_k: int) -> np.ndarray:
+        """Indices of the `top_k` documents closest to each query by cosine similarity."""
+        queries = query_vectors / np.clip(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12, None)
+        documents = document_vectors / np.clip(
+            np.linalg.norm(document_vectors, axis=1, keepdims=True), 1e-12, None)
+        return np.argsort(-(queries @ documents.T), axis=1)[:, :top_k]
+
+    @staticmethod
+    def recall(ranking: np.ndarray, reference: np.ndarray) -> float:
+        return float(np.mean([len(set(row) & set(expected)) / len(expected)
+                              for row, expected in zip(ranking.tolist(), reference.tolist())]))
+
+    @staticmethod
+    def measure(binding: dict, backend: str, texts: list[str], queries: list[str]) -> dict:
+        started = time.perf_counter()
+        embedder = CollectionBindingService.get_embeddings(binding, backend)
+        load_seconds = time.perf_counter() - started
+        embedder.embed_documents(texts[:EmbeddingBenchmarkService.WARMUP_TEXTS])
+
+        started = time.perf_counter()
+        document_vectors = np.asarray(embedder.embed_documents(texts), dtype=np.float32)
+        document_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        query_vectors = np.asarray([embedder.embed_query(query) for query in queries], dtype=np.float32)
+        query_seconds = time.perf_counter() - started
+
+        return {
+            "backend": backend,
+            "loaded_backend": EmbeddingModelRegistry.get_backend(
+                binding["embedding_model"], backend=backend),
+            "load_seconds": round(load_seconds, 3),
+            "documents_per_second": round(len(texts) / document_seconds, 1) if document_seconds else None,
+            "query_ms": round(1000 * query_seconds / len(queries), 2) if queries else None,
+            "document_vectors": document_vectors,
+            "query_vectors": query_vectors,
+        }
+
+    @staticmethod
+    def run(collection: str | None = None, backends: list[str] | None = None, sample_size: int = 500,
+            queries: list[str] | None = None, query_count: int = 50, top_k: int = 10) -> dict:
+        collection = VectorStoreManager.validate_collection_name(collection)
+        backends = backends or list(EmbeddingModelRegistry.BACKENDS)
+        unknown = sorted(set(backends) - set(EmbeddingModelRegistry.BACKENDS))
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported embedding backends: {', '.join(unknown)}")
+        # The current path is always measured, as the baseline for recall
+        backends = [EmbeddingBenchmarkService.REFERENCE_BACKEND] + [
+            backend for backend in dict.fromkeys(backends)
+            if backend != EmbeddingBenchmarkService.REFERENCE_BACKEND]
+
+        binding = CollectionBindingService.resolve(collection)
+        with VectorStoreManager.read(collection) as vector_store:
+            texts = vector_store._collection.get(include=["documents"], limit=sample_size)["documents"]
+        if not texts:
+            raise HTTPException(
+                status_code=400, detail=f"Collection {collection} has no chunks to benchmark")
+        queries = queries or EmbeddingBenchmarkService.sample_queries(texts, query_count)
+        top_k = min(top_k, len(texts))
+
+        results = []
+        reference = None
+        for backend in backends:
+            result = EmbeddingBenchmarkService.measure(binding, backend, texts, queries)
+            document_vectors = result.pop("document_vectors")
+            ranking = EmbeddingBenchmarkService.rank(result.pop("query_vectors"), document_vectors, top_k)
+            if reference is None:
+                reference = (ranking, document_vectors)
+            else:
+                result["recall_at_k"] = round(EmbeddingBenchmarkService.recall(ranking, reference[0]), 4)
+                # How far the backend's vectors drift from the reference ones
+                result["mean_cosine_to_reference"] = round(float(np.mean(
+                    np.sum(document_vectors * reference[1], axis=1)
+                    / np.clip(np.linalg.norm(document_vectors, axis=1)
+                              * np.linalg.norm(reference[1], axis=1), 1e-12, None))), 4)
+                result["speedup"] = round(
+                    result["documents_per_second"] / results[0]["documents_per_second"], 2) \
+                    if result["documents_per_second"] and results[0]["documents_per_second"] else None
+            results.append(result)
+            logger.info(f"Embedding benchmark for {collection}: {result}")
+
+        return {
+            "collection": collection,
+            "embedding_model": binding["embedding_model"],
+            "documents": len(texts),
+            "queries": len(queries),
+            "top_k": top_k,
+            "results": results,
+        }
@@ -0,0 +1,127 @@
+import logging
+import os
+import resource
+import threading
+import time
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from app.core.config import settings
+from app.services.rag.onnx_embeddings import OnnxEmbeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size of the current process, in bytes."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, not the current value, but it is the best
+        # portable approximation when /proc is unavailable.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class EmbeddingModelRegistry:
+    """Process-wide registry of loaded embedding models.
+
+    Each (model name, device, backend) is loaded at most once and the same
+    instance is handed out to every caller. The onnx backend matches torch
+    up to floating point error; onnx-int8 is quantized, so its vectors
+    drift further and can reorder close neighbours. Compare recall with
+    the embedding benchmark before serving a collection with it.
+    """
+
+    BACKENDS = ("torch", "onnx", "onnx-int8")
+
+    _models: dict[tuple[str, str, str], object] = {}
+    _stats: dict[tuple[str, str, str], dict] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(model_name: str | None = None, device: str | None = None, backend: str | None = None):
+        model_name = model_name or settings.VECTORIZE_MODEL
+        device = device or settings.EMBEDDING_DEVICE
+        backend = backend or settings.EMBEDDING_BACKEND
+        if backend not in EmbeddingModelRegistry.BACKENDS:
+            raise ValueError(f"Unsupported embedding backend: {backend}")
+        key = (model_name, device, backend)
+
+        model = EmbeddingModelRegistry._models.get(key)
+        if model is not None:
+            return model
+
+        with EmbeddingModelRegistry._lock:
+            model = EmbeddingModelRegistry._models.get(key)
+            if model is None:
+                model = EmbeddingModelRegistry._load(model_name, device, backend)
+                EmbeddingModelRegistry._models[key] = model
+            return model
+
+    @staticmethod
+    def _load(model_name: str, device: str, backend: str = "torch"):
+        logger.info(f"Loading embedding model {model_name} on {device} ({backend})")
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+
+        model = None
+        loaded_backend = backend
+        if backend != "torch":
+            try:
+                model = OnnxEmbeddings(
+                    model_name, device, quantize=backend == "onnx-int8",
+                    threads=settings.EMBEDDING_THREADS, batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    batch_tokens=settings.EMBEDDING_BATCH_TOKENS)
+            except ImportError as e:
+                logger.warning(
+                    f"Embedding backend {backend} is unavailable ({str(e)}), using torch")
+                loaded_backend = "torch"
+        if model is None:
+            if settings.EMBEDDING_THREADS:
+                import torch
+
+                # Process-wide, torch has no per-model thread pool
+                torch.set_num_threads(settings.EMBEDDING_THREADS)
+            model = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={"device": device},
+                encode_kwargs={"batch_size": settings.EMBEDDING_BATCH_SIZE}
+            )
+
+        load_seconds = time.perf_counter() - started
+        memory_bytes = max(_current_rss_bytes() - rss_before, 0)
+        EmbeddingModelRegistry._stats[(model_name, device, backend)] = {
+            "model_name": model_name,
+            "device": device,
+            "backend": loaded_backend,
+            "load_seconds": round(load_seconds, 3),
+            "memory_mb": round(memory_bytes / (1024 * 1024), 1),
+            "loaded_at": time.time(),
+        }
+        logger.info(
+            f"Embedding model {model_name} loaded on {device} ({loaded_backend}) in {load_seconds:.2f}s "
+            f"(+{memory_bytes / (1024 * 1024):.1f} MB RSS)")
+        return model
+
+    @staticmethod
+    def preload(model_names: list[str] | None = None, device: str | None = None) -> None:
+        for model_name in model_names or [settings.VECTORIZE_MODEL]:
+            EmbeddingModelRegistry.get(model_name, device)
+
+    @staticmethod
+    def get_backend(model_name: str, device: str | None = None, backend: str | None = None) -> str | None:
+        """Backend a loaded model actually runs on, after any fallback to torch."""
+        key = (model_name, device or settings.EMBEDDING_DEVICE, backend or settings.EMBEDDING_BACKEND)
+        stats = EmbeddingModelRegistry._stats.get(key)
+        return stats["backend"] if stats else None
+
+    @staticmethod
+    def get_stats() -> list[dict]:
+        return list(EmbeddingModelRegistry._stats.values())
+
+    @staticmethod
+    def clear() -> None:
+        with EmbeddingModelRegistry._lock:
+            EmbeddingModelRegistry._models.clear()
+            EmbeddingModelRegistry._stats.clear()
@@ -0,0 +1,242 @@
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.models.ingestion_job import IngestionJob
+from app.services.rag.chunking import ChunkingService, IngestionStopped
+from app.services.rag.bulk_ingestion import BulkIngestionService
+from app.services.rag.reembedding import ReembeddingService
+from app.services.rag.vector_store import VectorStoreClosed
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionCancelled(IngestionStopped):
+    pass
+
+
+class IngestionSuspended(IngestionStopped):
+    """The process is shutting down; the job is resumed by the next start()."""
+
+
+class IngestionJobService:
+    """Runs /rag ingestion in the background on a bounded worker pool.
+
+    Jobs are persisted in the application database, so queued and
+    interrupted jobs are picked up again after a restart.
+    """
+
+    STAGE_WEIGHTS = {
+        "file": {"parse": 0.3, "split": 0.05, "embed": 0.5, "write": 0.15},
+        "bulk": {"parse": 0.4, "embed": 0.4, "write": 0.2},
+        "reembed": {"embed": 0.95, "switch": 0.05},
+    }
+    ACTIVE_STATUSES = ("queued", "running")
+
+    _executor: ThreadPoolExecutor | None = None
+    # Set by shutdown(); running jobs stop at their next progress report
+    _stopping = False
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_executor() -> ThreadPoolExecutor:
+        with IngestionJobService._lock:
+            if IngestionJobService._executor is None:
+                IngestionJobService._stopping = False
+                IngestionJobService._executor = ThreadPoolExecutor(
+                    max_workers=settings.INGEST_MAX_CONCURRENCY,
+                    thread_name_prefix="ingest"
+                )
+            return IngestionJobService._executor
+
+    @staticmethod
+    def start() -> int:
+        """Re-queue jobs that were pending or running when the process stopped."""
+        init_db()
+        with SessionLocal() as session:
+            jobs = session.query(IngestionJob).filter(
+                IngestionJob.status.in_(IngestionJobService.ACTIVE_STATUSES)
+            ).order_by(IngestionJob.created_at).all()
+            for job in jobs:
+                job.status = "queued"
+                job.started_at = None
+            session.commit()
+            job_ids = [job.id for job in jobs]
+
+        for job_id in job_ids:
+            IngestionJobService.get_executor().submit(IngestionJobService.run, job_id)
+        if job_ids:
+            logger.info(f"Resumed {len(job_ids)} ingestion jobs")
+        return len(job_ids)
+
+    @staticmethod
+    def shutdown() -> None:
+        with IngestionJobService._lock:
+            if IngestionJobService._executor is not None:
+                # Unfinished jobs stay queued/running in the database and
+                # are resumed by the next start()
+                IngestionJobService._stopping = True
+                IngestionJobService._executor.shutdown(
+                    wait=False, cancel_futures=True)
+                IngestionJobService._executor = None
+
+    @staticmethod
+    def to_dict(job: IngestionJob) -> dict:
+        return {
+            "job_id": job.id,
+            "kind": job.kind,
+            "filename": job.filename,
+            "status": job.status,
+            "stage": job.stage,
+            "progress": job.progress,
+            "stages": job.stages or {},
+            "result": job.result,
+            "error": job.error,
+            "cancel_requested": job.cancel_requested,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    @staticmethod
+    def submit(filename: str, kind: str = "file", options: dict | None = None) -> dict:
+        init_db()
+        with SessionLocal() as session:
+            job = IngestionJob(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                filename=filename,
+                options=options or {},
+                status="queued",
+                stages={},
+            )
+            session.add(job)
+            session.commit()
+            info = IngestionJobService.to_dict(job)
+
+        IngestionJobService.get_executor().submit(
+            IngestionJobService.run, info["job_id"])
+        logger.info(f"Queued ingestion job {info['job_id']} for {filename}")
+        return info
+
+    @staticmethod
+    def get(job_id: str) -> dict:
+        init_db()
+        with SessionLocal() as session:
+            job = session.get(IngestionJob, job_id)
+            if job is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Ingestion job not found: {job_id}")
+            return IngestionJobService.to_dict(job)
+
+    @staticmethod
+    def list_jobs(status: str | None = None, limit: int = 50) -> list[dict]:
+        init_db()
+        with SessionLocal() as session:
+            query = session.query(IngestionJob)
+            if status:
+                query = query.filter(IngestionJob.status == status)
+            jobs = query.order_by(
+                IngestionJob.created_at.desc()).limit(limit).all()
+            return [IngestionJobService.to_dict(job) for job in jobs]
+
+    @staticmethod
+    def cancel(job_id: str) -> dict:
+        init_db()
+        with SessionLocal() as session:
+            # Conditional updates, so a worker claiming the job meanwhile
+            # sees either the cancellation or the request
+            cancelled = session.query(IngestionJob).filter(
+                IngestionJob.id == job_id, IngestionJob.status == "queued"
+            ).update({IngestionJob.status: "cancelled", IngestionJob.finished_at: datetime.utcnow()},
+                     synchronize_session=False)
+            if not cancelled:
+                # Picked up by the running job at its next progress report
+                session.query(IngestionJob).filter(
+                    IngestionJob.id == job_id, IngestionJob.status == "running"
+                ).update({IngestionJob.cancel_requested: True}, synchronize_session=False)
+            session.commit()
+            job = session.get(IngestionJob, job_id)
+            if job is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Ingestion job not found: {job_id}")
+            return IngestionJobService.to_dict(job)
+
+    @staticmethod
+    def report_progress(job_id: str, stage: str, fraction: float) -> None:
+        if IngestionJobService._stopping:
+            raise IngestionSuspended()
+        with SessionLocal() as session:
+            job = session.get(IngestionJob, job_id)
+            if job.cancel_requested:
+                raise IngestionCancelled()
+            stages = dict(job.stages or {})
+            stages[stage] = round(min(max(fraction, 0.0), 1.0), 3)
+            job.stages = stages
+            job.stage = stage
+            job.progress = round(sum(
+                weight * stages.get(name, 0.0)
+                for name, weight in IngestionJobService.STAGE_WEIGHTS[job.kind].items()
+            ), 3)
+            session.commit()
+
+    @staticmethod
+    def finish(job_id: str, status: str, result: dict | None = None, error: str | None = None) -> None:
+        with SessionLocal() as session:
+            job = session.get(IngestionJob, job_id)
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            if status == "completed":
+                job.progress = 1.0
+            session.commit()
+
+    @staticmethod
+    def run(job_id: str) -> None:
+        with SessionLocal() as session:
+            # Only one of this worker, another worker or cancel() can move
+            # the job out of "queued"
+            claimed = session.query(IngestionJob).filter(
+                IngestionJob.id == job_id, IngestionJob.status == "queued"
+            ).update({IngestionJob.status: "running", IngestionJob.started_at: datetime.utcnow()},
+                     synchronize_session=False)
+            session.commit()
+            if not claimed:
+                return
+            job = session.get(IngestionJob, job_id)
+            filename = job.filename
+            kind = job.kind
+            options = dict(job.options or {})
+
+        def progress(stage: str, fraction: float) -> None:
+            IngestionJobService.report_progress(job_id, stage, fraction)
+
+        try:
+            if kind == "bulk":
+                result = BulkIngestionService.ingest(progress=progress, **options)
+            elif kind == "reembed":
+                result = ReembeddingService.reembed(progress=progress, **options)
+            else:
+                result = ChunkingService.ingest_file(
+                    filename, progress=progress, **options)
+            IngestionJobService.finish(job_id, "completed", result=result)
+            logger.info(f"Ingestion job {job_id} completed for {filename}")
+        except IngestionCancelled:
+            IngestionJobService.finish(job_id, "cancelled")
+            logger.info(f"Ingestion job {job_id} cancelled")
+        except (IngestionSuspended, VectorStoreClosed):
+            # Left running in the database, so the next start() re-queues it
+            logger.info(f"Ingestion job {job_id} interrupted by shutdown")
+        except HTTPException as e:
+            IngestionJobService.finish(job_id, "failed", error=str(e.detail))
+            logger.error(f"Ingestion job {job_id} failed: {e.detail}")
+        except Exception as e:
+            IngestionJobService.finish(job_id, "failed", error=str(e))
+            logger.error(
+                f"Ingestion job {job_id} failed: {str(e)}", exc_info=True)
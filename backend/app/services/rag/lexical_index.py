@@ -0,0 +1,289 @@
+import re
+import math
+import logging
+from collections import Counter
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.models.lexical_index import LexicalCollection, LexicalDocument, LexicalPosting, LexicalTerm
+
+logger = logging.getLogger(__name__)
+
+
+class LexicalIndexService:
+    """BM25 inverted index over the chunks stored in the vector collections.
+
+    Postings live in the application database and are updated together
+    with Chroma on ingest, delete and clear, along with each collection's
+    document count, total length and per-term document frequencies, so a
+    query only reads the postings of its own terms.
+    """
+
+    K1 = 1.5
+    B = 0.75
+    MAX_TERM_LENGTH = 128
+    TOKEN_PATTERN = re.compile(r"\w+")
+    # Frequent English and Russian function words; their postings are the
+    # longest and barely affect BM25 ranking
+    STOPWORDS = frozenset("""
+        a an and are as at be but by for from has have in is it its of on or that the this
+        to was were will with
+        а без бы в во вот все всё вы да для до его ее её если есть же за и из или им их к как
+        ко ли либо мы на над не ни но о об от по под при про с со та так также то тот у уже
+        что чтобы это эта эти этот я
+    """.replace("ё", "е").split())
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        text = text.casefold().replace("ё", "е")
+        return [token for token in LexicalIndexService.TOKEN_PATTERN.findall(text)
+                if len(token) <= LexicalIndexService.MAX_TERM_LENGTH
+                and token not in LexicalIndexService.STOPWORDS]
+
+    @staticmethod
+    def bm25_scores(postings: list[tuple[str, str, int, int]], document_frequency: dict[str, int],
+                    document_count: int, average_length: float) -> dict[str, float]:
+        """Score chunks from (term, chunk_id, tf, chunk_length) postings."""
+        scores = {}
+        for term, chunk_id, tf, length in postings:
+            df = document_frequency[term]
+            idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+            norm = LexicalIndexService.K1 * (
+                1 - LexicalIndexService.B + LexicalIndexService.B * length / (average_length or 1))
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + \
+                idf * tf * (LexicalIndexService.K1 + 1) / (tf + norm)
+        return scores
+
+    @staticmethod
+    def _ensure_stats(collection: str) -> None:
+        """Backfill the statistics of a collection indexed before they were kept."""
+        with SessionLocal() as session:
+            if session.get(LexicalCollection, collection) is not None:
+                return
+            document_count, total_length = session.query(
+                func.count(LexicalDocument.chunk_id), func.coalesce(func.sum(LexicalDocument.length), 0)
+            ).filter(LexicalDocument.collection == collection).one()
+            try:
+                session.add(LexicalCollection(
+                    collection=collection, document_count=document_count, total_length=total_length))
+                session.bulk_insert_mappings(LexicalTerm, [
+                    {"collection": collection, "term": term, "df": df}
+                    for term, df in session.query(LexicalPosting.term, func.count(LexicalPosting.chunk_id))
+                    .filter(LexicalPosting.collection == collection).group_by(LexicalPosting.term)])
+                session.commit()
+            except IntegrityError:
+                # Backfilled concurrently by another request
+                session.rollback()
+
+    @staticmethod
+    def _update_stats(session, collection: str, document_count: int, total_length: int) -> None:
+        # Incremented in SQL so concurrent writers do not overwrite each other
+        session.query(LexicalCollection).filter(LexicalCollection.collection == collection).update({
+            LexicalCollection.document_count: LexicalCollection.document_count + document_count,
+            LexicalCollection.total_length: LexicalCollection.total_length + total_length
+        }, synchronize_session=False)
+
+    @staticmethod
+    def _update_terms(session, collection: str, changes: Counter) -> None:
+        """Add `changes` to the document frequencies of their terms."""
+        terms = list(changes)
+        for start in range(0, len(terms), 500):
+            batch = terms[start:start + 500]
+            existing = {term for (term,) in session.query(LexicalTerm.term).filter(
+                LexicalTerm.collection == collection, LexicalTerm.term.in_(batch))}
+            by_delta = {}
+            for term in existing:
+                by_delta.setdefault(changes[term], []).append(term)
+            for delta, delta_terms in by_delta.items():
+                session.query(LexicalTerm).filter(
+                    LexicalTerm.collection == collection, LexicalTerm.term.in_(delta_terms)
+                ).update({LexicalTerm.df: LexicalTerm.df + delta}, synchronize_session=False)
+            session.bulk_insert_mappings(LexicalTerm, [
+                {"collection": collection, "term": term, "df": changes[term]}
+                for term in batch if term not in existing and changes[term] > 0])
+            session.query(LexicalTerm).filter(
+                LexicalTerm.collection == collection, LexicalTerm.term.in_(batch), LexicalTerm.df <= 0
+            ).delete(synchronize_session=False)
+
+    @staticmethod
+    def add(chunk_ids: list[str], texts: list[str], filename: str, collection: str | None = None) -> None:
+        if not chunk_ids:
+            return
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        documents = []
+        postings = []
+        for chunk_id, text in zip(chunk_ids, texts):
+            counts = Counter(LexicalIndexService.tokenize(text))
+            documents.append({"collection": collection, "chunk_id": chunk_id,
+                              "filename": filename, "length": sum(counts.values())})
+            postings.extend({"collection": collection, "term": term, "chunk_id": chunk_id, "tf": tf}
+                            for term, tf in counts.items())
+
+        LexicalIndexService._ensure_stats(collection)
+        with SessionLocal() as session:
+            # Upsert semantics: drop any previous postings for these chunks
+            LexicalIndexService._delete_chunks(session, collection, chunk_ids)
+            session.bulk_insert_mappings(LexicalDocument, documents)
+            session.bulk_insert_mappings(LexicalPosting, postings)
+            LexicalIndexService._update_stats(
+                session, collection, len(documents), sum(document["length"] for document in documents))
+            LexicalIndexService._update_terms(
+                session, collection, Counter(posting["term"] for posting in postings))
+            session.commit()
+
+    @staticmethod
+    def _delete_chunks(session, collection: str, chunk_ids: list[str]) -> None:
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            document_count, total_length = session.query(
+                func.count(LexicalDocument.chunk_id), func.coalesce(func.sum(LexicalDocument.length), 0)
+            ).filter(
+                LexicalDocument.collection == collection,
+                LexicalDocument.chunk_id.in_(batch)
+            ).one()
+            if not document_count:
+                continue
+            removed_terms = Counter(dict(session.query(
+                LexicalPosting.term, func.count(LexicalPosting.chunk_id)
+            ).filter(
+                LexicalPosting.collection == collection,
+                LexicalPosting.chunk_id.in_(batch)
+            ).group_by(LexicalPosting.term)))
+            session.query(LexicalPosting).filter(
+                LexicalPosting.collection == collection,
+                LexicalPosting.chunk_id.in_(batch)
+            ).delete(synchronize_session=False)
+            session.query(LexicalDocument).filter(
+                LexicalDocument.collection == collection,
+                LexicalDocument.chunk_id.in_(batch)
+            ).delete(synchronize_session=False)
+            LexicalIndexService._update_stats(session, collection, -document_count, -total_length)
+            LexicalIndexService._update_terms(
+                session, collection, Counter({term: -df for term, df in removed_terms.items()}))
+
+    @staticmethod
+    def remove(chunk_ids: list[str], collection: str | None = None) -> None:
+        if not chunk_ids:
+            return
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        LexicalIndexService._ensure_stats(collection)
+        with SessionLocal() as session:
+            LexicalIndexService._delete_chunks(session, collection, chunk_ids)
+            session.commit()
+
+    @staticmethod
+    def remove_file(filename: str, collection: str | None = None) -> None:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        LexicalIndexService._ensure_stats(collection)
+        with SessionLocal() as session:
+            chunk_ids = [chunk_id for (chunk_id,) in session.query(LexicalDocument.chunk_id).filter(
+                LexicalDocument.collection == collection,
+                LexicalDocument.filename == filename
+            )]
+            LexicalIndexService._delete_chunks(session, collection, chunk_ids)
+            session.commit()
+
+    @staticmethod
+    def clear(collection: str | None = None) -> None:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        with SessionLocal() as session:
+            session.query(LexicalPosting).filter(
+                LexicalPosting.collection == collection).delete(synchronize_session=False)
+            session.query(LexicalDocument).filter(
+                LexicalDocument.collection == collection).delete(synchronize_session=False)
+            session.query(LexicalTerm).filter(
+                LexicalTerm.collection == collection).delete(synchronize_session=False)
+            session.query(LexicalCollection).filter(
+                LexicalCollection.collection == collection).delete(synchronize_session=False)
+            session.commit()
+
+    @staticmethod
+    def search(query: str, top_k: int, collection: str | None = None,
+               filenames: list[str] | None = None) -> list[tuple[str, float]]:
+        terms = sorted(set(LexicalIndexService.tokenize(query)))
+        if not terms:
+            return []
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        if not filenames:
+            LexicalIndexService._ensure_stats(collection)
+        with SessionLocal() as session:
+            if filenames:
+                # BM25 statistics are computed within those files
+                document_count, total_length = session.query(
+                    func.count(LexicalDocument.chunk_id), func.sum(LexicalDocument.length)
+                ).filter(
+                    LexicalDocument.collection == collection,
+                    LexicalDocument.filename.in_(filenames)
+                ).one()
+                document_frequency = dict(session.query(
+                    LexicalPosting.term, func.count(LexicalPosting.chunk_id)
+                ).join(
+                    LexicalDocument,
+                    (LexicalDocument.collection == LexicalPosting.collection)
+                    & (LexicalDocument.chunk_id == LexicalPosting.chunk_id)
+                ).filter(
+                    LexicalPosting.collection == collection,
+                    LexicalPosting.term.in_(terms),
+                    LexicalDocument.filename.in_(filenames)
+                ).group_by(LexicalPosting.term))
+            else:
+                stats = session.get(LexicalCollection, collection)
+                document_count, total_length = (
+                    (stats.document_count, stats.total_length) if stats else (0, 0))
+                document_frequency = dict(session.query(LexicalTerm.term, LexicalTerm.df).filter(
+                    LexicalTerm.collection == collection, LexicalTerm.term.in_(terms)))
+            if not document_count:
+                return []
+
+            postings = []
+            for term, df in document_frequency.items():
+                query = session.query(
+                    LexicalPosting.chunk_id, LexicalPosting.tf, LexicalDocument.length
+                ).join(
+                    LexicalDocument,
+                    (LexicalDocument.collection == LexicalPosting.collection)
+                    & (LexicalDocument.chunk_id == LexicalPosting.chunk_id)
+                ).filter(
+                    LexicalPosting.collection == collection,
+                    LexicalPosting.term == term
+                )
+                if filenames:
+                    query = query.filter(LexicalDocument.filename.in_(filenames))
+                if df > settings.LEXICAL_MAX_POSTINGS:
+                    # A term this common has a low idf, so its lowest-tf
+                    # postings barely move the ranking
+                    query = query.order_by(LexicalPosting.tf.desc()).limit(settings.LEXICAL_MAX_POSTINGS)
+                postings.extend((term, *row) for row in query)
+
+        scores = LexicalIndexService.bm25_scores(
+            postings, document_frequency, document_count, total_length / document_count)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    @staticmethod
+    def rebuild(collection_handle, collection: str | None = None, page_size: int = 1000) -> int:
+        """Re-index every chunk stored in a Chroma collection."""
+        LexicalIndexService.clear(collection)
+        indexed = 0
+        offset = 0
+        while True:
+            page = collection_handle.get(
+                include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            by_file = {}
+            for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                by_file.setdefault((metadata or {}).get("filename", ""), []).append((chunk_id, document))
+            for filename, entries in by_file.items():
+                LexicalIndexService.add([chunk_id for chunk_id, _ in entries],
+                                        [document for _, document in entries], filename, collection)
+            indexed += len(page["ids"])
+            offset += page_size
+        logger.info(f"Rebuilt lexical index with {indexed} chunks")
+        return indexed
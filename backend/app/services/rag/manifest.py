@@ -0,0 +1,69 @@
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.models.chunk_manifest import ChunkManifest
+
+
+class ChunkManifestService:
+    @staticmethod
+    def get(filename: str, collection: str | None = None) -> dict | None:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        with SessionLocal() as session:
+            manifest = session.get(ChunkManifest, (collection, filename))
+            if manifest is None:
+                return None
+            return {
+                "content_hash": manifest.content_hash,
+                "embedding_model": manifest.embedding_model,
+                "chunk_ids": list(manifest.chunk_ids or []),
+            }
+
+    @staticmethod
+    def save(filename: str, content_hash: str, embedding_model: str, chunk_ids: list[str],
+             collection: str | None = None) -> None:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        with SessionLocal() as session:
+            manifest = session.get(ChunkManifest, (collection, filename))
+            if manifest is None:
+                manifest = ChunkManifest(collection=collection, filename=filename)
+                session.add(manifest)
+            manifest.content_hash = content_hash
+            manifest.embedding_model = embedding_model
+            manifest.chunk_ids = chunk_ids
+            session.commit()
+
+    @staticmethod
+    def delete(filename: str, collection: str | None = None) -> None:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        with SessionLocal() as session:
+            session.query(ChunkManifest).filter(
+                ChunkManifest.collection == collection,
+                ChunkManifest.filename == filename
+            ).delete()
+            session.commit()
+
+    @staticmethod
+    def clear(collection: str | None = None) -> None:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        with SessionLocal() as session:
+            session.query(ChunkManifest).filter(
+                ChunkManifest.collection == collection).delete()
+            session.commit()
+
+    @staticmethod
+    def collections_for(filename: str) -> list[str]:
+        init_db()
+        with SessionLocal() as session:
+            return [collection for (collection,) in session.query(ChunkManifest.collection).filter(
+                ChunkManifest.filename == filename)]
+
+    @staticmethod
+    def filenames(collection: str | None = None) -> list[str]:
+        init_db()
+        collection = collection or settings.VECTOR_COLLECTION_NAME
+        with SessionLocal() as session:
+            return [filename for (filename,) in session.query(ChunkManifest.filename).filter(
+                ChunkManifest.collection == collection)]
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import logging
+import threading
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmbeddings:
+    """Sentence-transformers model exported to ONNX and run with ONNX Runtime.
+
+    The export, and its int8 dynamically quantized variant, is cached under
+    EMBEDDING_ONNX_DIR. Pooling, normalisation and sequence length follow
+    the model's sentence-transformers configuration, so vectors match the
+    torch backend up to numerical (or quantization) error.
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", quantize: bool = False,
+                 threads: int = 0, batch_size: int = 64, batch_tokens: int = 16384):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        model_dir, model_file = OnnxEmbeddings.export(model_name, quantize)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        # Fast tokenizers fail with "Already borrowed" when used from two
+        # threads at once; the ONNX session itself is thread-safe
+        self.tokenizer_lock = threading.Lock()
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        if device.startswith("cuda"):
+            providers.insert(0, "CUDAExecutionProvider")
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=providers)
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.pooling, self.normalize, max_length = OnnxEmbeddings.read_pipeline(model_name)
+        self.max_length = min(max_length or self.tokenizer.model_max_length, 512)
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+
+    @staticmethod
+    def export(model_name: str, quantize: bool = False) -> tuple[str, str]:
+        """Export `model_name` to ONNX once and return (directory, model file)."""
+        model_dir = os.path.join(
+            settings.EMBEDDING_ONNX_DIR, re.sub(r"[^A-Za-z0-9._-]+", "--", model_name))
+        if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            from transformers import AutoTokenizer
+
+            logger.info(f"Exporting embedding model {model_name} to ONNX in {model_dir}")
+            ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+        if not quantize:
+            return model_dir, "model.onnx"
+
+        if not os.path.exists(os.path.join(model_dir, "model_int8.onnx")):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing ONNX export of {model_name} to int8")
+            quantize_dynamic(os.path.join(model_dir, "model.onnx"),
+                             os.path.join(model_dir, "model_int8.onnx"), weight_type=QuantType.QInt8)
+        return model_dir, "model_int8.onnx"
+
+    @staticmethod
+    def read_config(model_name: str, filename: str):
+        """A JSON file of a local or Hugging Face Hub model, or None."""
+        if os.path.isdir(model_name):
+            path = os.path.join(model_name, filename)
+            if not os.path.exists(path):
+                return None
+        else:
+            try:
+                from huggingface_hub import hf_hub_download
+                path = hf_hub_download(model_name, filename)
+            except Exception:
+                return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def read_pipeline(model_name: str) -> tuple[str, bool, int | None]:
+        """(pooling mode, normalize, max sequence length) from the model's
+        sentence-transformers modules; plain transformers models get mean pooling."""
+        modules = OnnxEmbeddings.read_config(model_name, "modules.json") or []
+        pooling = "mean"
+        for module in modules:
+            if module.get("type", "").endswith("Pooling"):
+                config = OnnxEmbeddings.read_config(
+                    model_name, f"{module['path']}/config.json") or {}
+                if config.get("pooling_mode_cls_token"):
+                    pooling = "cls"
+                elif config.get("pooling_mode_max_tokens"):
+                    pooling = "max"
+        normalize = any(module.get("type", "").endswith("Normalize") for module in modules)
+        max_length = (OnnxEmbeddings.read_config(model_name, "sentence_bert_config.json") or {}).get(
+            "max_seq_length")
+        return pooling, normalize, max_length
+
+    @staticmethod
+    def plan_batches(lengths: list[int], max_batch_size: int, max_batch_tokens: int) -> list[list[int]]:
+        """Group text indices into batches of similar token length.
+
+        Each batch is padded to its longest text only, so sorting by length
+        keeps padding small. A batch closes at `max_batch_size` texts or
+        when its padded size would exceed `max_batch_tokens`.
+        """
+        batches = []
+        batch = []
+        for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            # Ascending order: text i sets the batch's padded length
+            if batch and (len(batch) >= max_batch_size
+                          or (len(batch) + 1) * lengths[i] > max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        elif self.pooling == "max":
+            pooled = np.where(mask > 0, hidden, -np.inf).max(axis=1)
+        else:
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        with self.tokenizer_lock:
+            encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = [len(input_ids) for input_ids in encoded["input_ids"]]
+        vectors = [None] * len(texts)
+        for batch in OnnxEmbeddings.plan_batches(lengths, self.batch_size, self.batch_tokens):
+            with self.tokenizer_lock:
+                features = self.tokenizer.pad(
+                    {key: [encoded[key][i] for i in batch] for key in encoded.keys()}, return_tensors="np")
+            inputs = {}
+            for name in self.input_names:
+                if name in features:
+                    inputs[name] = features[name].astype(np.int64)
+                elif name == "token_type_ids":
+                    inputs[name] = np.zeros_like(features["input_ids"], dtype=np.int64)
+            hidden = self.session.run(None, inputs)[0]
+            for i, vector in zip(batch, self.pool(hidden, features["attention_mask"])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.encode(texts) if texts else []
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.encode([text])[0]
@@ -0,0 +1,208 @@
+import time
+import uuid
+import logging
+from typing import Callable
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.manifest import ChunkManifestService
+from app.services.rag.vector_store import VectorStoreManager
+
+logger = logging.getLogger(__name__)
+
+
+class ReembeddingService:
+    """Moves a collection to another embedding model in the background.
+
+    Chunks are copied and re-embedded into a new Chroma collection while
+    the current one keeps serving reads and writes. Writers record the ids
+    they touch meanwhile; the copy catches up with them without blocking,
+    and only the last few are applied under the collection's write lock
+    before the name is switched over to the new Chroma collection and the
+    old one is dropped.
+    """
+
+    # Unlocked catch-up passes before the rest is applied under the write lock
+    MAX_CATCH_UP_PASSES = 5
+
+    @staticmethod
+    def target_name(collection: str) -> str:
+        # Stays within Chroma's 63 character limit
+        return f"{collection[:50]}.{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def prepare(collection: str, model_name: str, normalize: bool | None = None) -> dict:
+        """Validate a re-embed request and return the options for its job."""
+        collection = VectorStoreManager.validate_collection_name(collection)
+        binding = CollectionBindingService.resolve(collection)
+        spec = CollectionBindingService.spec(model_name, normalize)
+        if binding["migration_target"]:
+            raise HTTPException(
+                status_code=409, detail=f"Collection {collection} is already being re-embedded")
+        if not ChunkManifestService.filenames(collection):
+            raise HTTPException(
+                status_code=400, detail=f"Collection {collection} has no ingested files")
+        if all(binding[field] == value for field, value in spec.items()):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Collection {collection} is already embedded with {model_name}")
+        return {"collection": collection, "target": ReembeddingService.target_name(collection), **spec}
+
+    @staticmethod
+    def read_metadata(chroma_collection, page_size: int) -> dict[str, dict]:
+        records = {}
+        offset = 0
+        while True:
+            page = chroma_collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                return records
+            records.update(zip(page["ids"], page["metadatas"]))
+            offset += len(page["ids"])
+
+    @staticmethod
+    def sync(source, destination, chunk_ids, embedder, batch_size: int) -> dict:
+        """Make `chunk_ids` in `destination` match `source`: re-embed new
+        chunks, update changed metadata and delete removed chunks."""
+        changes = {"added": 0, "deleted": 0, "updated": 0}
+        chunk_ids = sorted(chunk_ids)
+        for start in range(0, len(chunk_ids), batch_size):
+            batch = chunk_ids[start:start + batch_size]
+            current = source.get(ids=batch, include=["documents", "metadatas"])
+            copied = destination.get(ids=batch, include=["metadatas"])
+            copied = dict(zip(copied["ids"], copied["metadatas"]))
+            missing = [i for i, chunk_id in enumerate(current["ids"]) if chunk_id not in copied]
+            # Ids are content-addressed, so a kept id only ever changes metadata
+            changed = [i for i, chunk_id in enumerate(current["ids"])
+                       if chunk_id in copied and copied[chunk_id] != current["metadatas"][i]]
+            removed = [chunk_id for chunk_id in copied if chunk_id not in set(current["ids"])]
+            if missing:
+                destination.upsert(
+                    ids=[current["ids"][i] for i in missing],
+                    embeddings=embedder.embed_documents([current["documents"][i] for i in missing]),
+                    metadatas=[current["metadatas"][i] for i in missing],
+                    documents=[current["documents"][i] for i in missing]
+                )
+            if changed:
+                destination.update(ids=[current["ids"][i] for i in changed],
+                                    metadatas=[current["metadatas"][i] for i in changed])
+            if removed:
+                destination.delete(ids=removed)
+            changes["added"] += len(missing)
+            changes["updated"] += len(changed)
+            changes["deleted"] += len(removed)
+        return changes
+
+    @staticmethod
+    def copy(collection: str, destination, embedder, batch_size: int,
+             progress: Callable[[str, float], None]) -> int:
+        """Re-embed every chunk of `collection` into `destination`.
+
+        The read lock is only held while a page is fetched. Chunks already
+        in `destination` (from an interrupted run) are skipped.
+        """
+        with VectorStoreManager.read(collection) as vector_store:
+            total = vector_store._collection.count()
+        offset = 0
+        embedded = 0
+        while True:
+            with VectorStoreManager.read(collection) as vector_store:
+                page = vector_store._collection.get(
+                    include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                return embedded
+            offset += len(page["ids"])
+            existing = set(destination.get(ids=page["ids"], include=[])["ids"])
+            todo = [i for i, chunk_id in enumerate(page["ids"]) if chunk_id not in existing]
+            if todo:
+                destination.upsert(
+                    ids=[page["ids"][i] for i in todo],
+                    embeddings=embedder.embed_documents([page["documents"][i] for i in todo]),
+                    metadatas=[page["metadatas"][i] for i in todo],
+                    documents=[page["documents"][i] for i in todo]
+                )
+                embedded += len(todo)
+            progress("embed", min(offset / total, 1.0) if total else 1.0)
+
+    @staticmethod
+    def catch_up(source, destination, embedder, batch_size: int) -> dict:
+        """Apply the differences between `source` and `destination`.
+
+        Catches chunks the paged copy missed as writes shifted its pages;
+        writes made while it runs are recorded and applied afterwards.
+        """
+        source_records = ReembeddingService.read_metadata(source, batch_size)
+        target_records = ReembeddingService.read_metadata(destination, batch_size)
+        differing = [chunk_id for chunk_id, metadata in source_records.items()
+                     if target_records.get(chunk_id) != metadata]
+        differing.extend(chunk_id for chunk_id in target_records if chunk_id not in source_records)
+        return ReembeddingService.sync(source, destination, differing, embedder, batch_size)
+
+    @staticmethod
+    def add_changes(total: dict, changes: dict) -> dict:
+        return {key: total[key] + changes[key] for key in total}
+
+    @staticmethod
+    def reembed(collection: str, target: str, batch_size: int | None = None,
+                progress: Callable[[str, float], None] | None = None, **spec) -> dict:
+        """Re-embed `collection` into the Chroma collection `target` with the
+        binding fields in `spec`, then switch the collection over to it."""
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        progress = progress or (lambda stage, fraction: None)
+        started = time.perf_counter()
+        binding = CollectionBindingService.start_migration(collection, target)
+        logger.info(
+            f"Re-embedding collection {collection} from {binding['embedding_model']} "
+            f"to {spec['embedding_model']} into {target}")
+
+        switched = False
+        VectorStoreManager.track_changes(collection)
+        try:
+            embedder = CollectionBindingService.get_embeddings({**binding, **spec})
+            destination = VectorStoreManager.get_physical(target)
+            embedded = ReembeddingService.copy(collection, destination, embedder, batch_size, progress)
+            progress("embed", 1.0)
+
+            # Writes so far are covered by the full comparison
+            VectorStoreManager.take_changes(collection)
+            source = VectorStoreManager.get_physical(binding["physical_name"])
+            changes = ReembeddingService.catch_up(source, destination, embedder, batch_size)
+            pending = VectorStoreManager.take_changes(collection)
+            for _ in range(ReembeddingService.MAX_CATCH_UP_PASSES):
+                if len(pending) <= batch_size:
+                    break
+                changes = ReembeddingService.add_changes(changes, ReembeddingService.sync(
+                    source, destination, pending, embedder, batch_size))
+                pending = VectorStoreManager.take_changes(collection)
+
+            with VectorStoreManager.write(collection) as vector_store:
+                pending |= VectorStoreManager.take_changes(collection)
+                changes = ReembeddingService.add_changes(changes, ReembeddingService.sync(
+                    vector_store._collection, destination, pending, embedder, batch_size))
+                sample = destination.get(limit=1, include=["embeddings"])["embeddings"]
+                dimension = len(sample[0]) if sample is not None and len(sample) else None
+                current = CollectionBindingService.finish_migration(collection, spec, dimension)
+                switched = True
+                VectorStoreManager.drop_physical(binding["physical_name"])
+            progress("switch", 1.0)
+        except BaseException:
+            if not switched:
+                CollectionBindingService.abort_migration(collection)
+                VectorStoreManager.drop_physical(target)
+            raise
+        finally:
+            VectorStoreManager.stop_tracking(collection)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Re-embedded collection {collection} with {spec['embedding_model']} in {elapsed:.2f}s, "
+            f"catch-up: {changes}")
+        return {
+            "collection": collection,
+            "previous_model": binding["embedding_model"],
+            "embedding_model": current["embedding_model"],
+            "dimension": current["dimension"],
+            "chunk_count": destination.count(),
+            "embedded": embedded + changes["added"],
+            "seconds": round(elapsed, 3),
+        }
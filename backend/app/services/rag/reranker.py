@@ -0,0 +1,126 @@
+import time
+import logging
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RerankerService:
+    """Re-scores retrieval candidates with a local cross-encoder.
+
+    Re-ranking is best effort: when the model cannot be loaded or scoring
+    runs over the latency budget, the first-stage order is kept.
+    """
+
+    _models: dict[tuple[str, str], object] = {}
+    # Monotonic time of the last failed load, so a broken model is not
+    # reloaded on every request
+    _load_failures: dict[tuple[str, str], float] = {}
+    _stats = {"reranked": 0, "fallbacks": 0, "budget_exceeded": 0, "seconds": 0.0}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_model(model_name: str | None = None, device: str | None = None):
+        model_name = model_name or settings.RERANK_MODEL
+        device = device or settings.RERANK_DEVICE
+        key = (model_name, device)
+
+        model = RerankerService._models.get(key)
+        if model is not None:
+            return model
+
+        with RerankerService._lock:
+            model = RerankerService._models.get(key)
+            if model is None:
+                failed_at = RerankerService._load_failures.get(key)
+                if failed_at is not None and \
+                        time.monotonic() - failed_at < settings.RERANK_RETRY_SECONDS:
+                    raise RuntimeError(f"Cross-encoder {model_name} failed to load recently")
+                started = time.perf_counter()
+                try:
+                    from sentence_transformers import CrossEncoder
+
+                    model = CrossEncoder(model_name, device=device, max_length=512)
+                except Exception:
+                    RerankerService._load_failures[key] = time.monotonic()
+                    raise
+                RerankerService._load_failures.pop(key, None)
+                RerankerService._models[key] = model
+                logger.info(
+                    f"Loaded cross-encoder {model_name} on {device} in "
+                    f"{time.perf_counter() - started:.2f}s")
+            return model
+
+    @staticmethod
+    def score(query: str, texts: list[str], budget_seconds: float | None = None) -> list[float] | None:
+        """Cross-encoder scores for `texts`, or None if the budget ran out
+        before the last batch. A batch already started is always finished and used."""
+        model = RerankerService.get_model()
+        batch_size = settings.RERANK_BATCH_SIZE
+        # Model loading is a one-off cost and is not charged to the budget
+        started = time.perf_counter()
+        scores = []
+        for start in range(0, len(texts), batch_size):
+            if budget_seconds is not None and start and time.perf_counter() - started > budget_seconds:
+                return None
+            batch = texts[start:start + batch_size]
+            scores.extend(float(score) for score in model.predict(
+                [(query, text) for text in batch], batch_size=batch_size))
+        return scores
+
+    @staticmethod
+    def rerank(query: str, hits: list[dict], top_k: int,
+               budget_ms: int | None = None) -> tuple[list[dict], bool]:
+        """Return the `top_k` best hits by cross-encoder score, and whether
+        they were actually re-ranked rather than kept in retrieval order."""
+        if budget_ms is None:
+            budget_ms = settings.RERANK_BUDGET_MS
+        if len(hits) <= 1:
+            return hits[:top_k], True
+
+        started = time.perf_counter()
+        try:
+            scores = RerankerService.score(
+                query, [hit["text"] for hit in hits],
+                budget_ms / 1000 if budget_ms else None)
+        except Exception as e:
+            logger.warning(f"Re-ranking failed, keeping retrieval order: {str(e)}")
+            RerankerService.record("fallbacks", started)
+            return hits[:top_k], False
+
+        if scores is None:
+            logger.warning(
+                f"Re-ranking {len(hits)} candidates exceeded {budget_ms}ms, "
+                f"keeping retrieval order")
+            RerankerService.record("budget_exceeded", started)
+            return hits[:top_k], False
+
+        RerankerService.record("reranked", started)
+        reranked = [{**hit, "retrieval_score": hit.get("score"), "score": score}
+                    for hit, score in zip(hits, scores)]
+        return sorted(reranked, key=lambda hit: hit["score"], reverse=True)[:top_k], True
+
+    @staticmethod
+    def record(outcome: str, started: float) -> None:
+        with RerankerService._lock:
+            RerankerService._stats[outcome] += 1
+            RerankerService._stats["seconds"] += time.perf_counter() - started
+
+    @staticmethod
+    def get_stats() -> dict:
+        with RerankerService._lock:
+            stats = dict(RerankerService._stats)
+        calls = stats["reranked"] + stats["fallbacks"] + stats["budget_exceeded"]
+        stats["seconds"] = round(stats["seconds"], 3)
+        stats["avg_ms"] = round(stats["seconds"] * 1000 / calls, 1) if calls else None
+        return stats
+
+    @staticmethod
+    def clear() -> None:
+        with RerankerService._lock:
+            RerankerService._models.clear()
+            RerankerService._load_failures.clear()
+            RerankerService._stats.update(
+                reranked=0, fallbacks=0, budget_exceeded=0, seconds=0.0)
@@ -1,28 +1,192 @@
+import json
+import unicodedata
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from app.core.config import settings
+from app.services.rag.collection_binding import CollectionBindingService
 from app.services.rag.chunking import ChunkingService
+from app.services.rag.vector_store import VectorStoreManager
+from app.services.rag.lexical_index import LexicalIndexService
+from app.services.rag.reranker import RerankerService
+from app.utils.cache import TTLCache
 
 
 class RetrievalService:
+    SEARCH_MODES = ("vector", "keyword", "hybrid")
+
+    _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval")
+
+    query_embedding_cache = TTLCache(
+        settings.QUERY_EMBEDDING_CACHE_SIZE, settings.QUERY_EMBEDDING_CACHE_TTL)
+    result_cache = TTLCache(
+        settings.RETRIEVAL_CACHE_SIZE, settings.RETRIEVAL_CACHE_TTL)
+
     @staticmethod
-    def get_embedding_model():
-        return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    def get_embedding_model(binding: dict):
+        return CollectionBindingService.get_embeddings(binding)
 
     @staticmethod
-    def retrieve_relevant_chunks(query: str, top_k: int, provider: str) -> list[str]:
-        try:
-            vector_store = Chroma(
-                collection_name=ChunkingService.COLLECTION_NAME,
-                embedding_function=RetrievalService.get_embedding_model(),
-                persist_directory=ChunkingService.VECTOR_DB_DIR
-            )
+    def normalize_query(query: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", query).split())
+
+    @staticmethod
+    def embed_query(query: str, binding: dict) -> list[float]:
+        """Embed `query` into the embedding space of a collection binding."""
+        # Quantized backends give slightly different vectors for the same model
+        key = (binding["embedding_model"], settings.EMBEDDING_BACKEND, binding["normalize"],
+               binding["query_prefix"], query)
+        embedding = RetrievalService.query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = RetrievalService.get_embedding_model(binding).embed_query(query)
+            RetrievalService.query_embedding_cache.set(key, embedding)
+        CollectionBindingService.check_query(binding, embedding)
+        return embedding
+
+    @staticmethod
+    def build_where(filenames: list[str] | None = None, tags: list[str] | None = None,
+                    ingested_after: datetime | None = None,
+                    ingested_before: datetime | None = None) -> dict | None:
+        """Chroma `where` clause for the metadata written at ingest time."""
+        clauses = []
+        if filenames:
+            clauses.append({"filename": {"$in": sorted(set(filenames))}})
+        for tag in sorted(set(tags or [])):
+            clauses.append({f"{ChunkingService.TAG_PREFIX}{tag}": True})
+        if ingested_after is not None:
+            clauses.append({"ingested_at": {"$gte": int(ingested_after.timestamp())}})
+        if ingested_before is not None:
+            clauses.append({"ingested_at": {"$lte": int(ingested_before.timestamp())}})
+
+        if not clauses:
+            return None
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
+
+    @staticmethod
+    def vector_search(query: str, k: int, collection: str | None = None,
+                      where: dict | None = None) -> list[dict]:
+        with VectorStoreManager.read(collection) as vector_store:
+            # Resolved under the read lock, so a re-embed cannot switch the
+            # collection between embedding the query and searching it
+            binding = CollectionBindingService.resolve(collection)
+            embedding = RetrievalService.embed_query(query, binding)
+            results = vector_store._collection.query(
+                query_embeddings=[embedding], n_results=k, where=where,
+                include=["documents", "metadatas", "distances"])
+
+        return [
+            {"id": chunk_id, "text": text, "metadata": metadata or {}, "score": -distance}
+            for chunk_id, text, metadata, distance in zip(
+                results["ids"][0], results["documents"][0],
+                results["metadatas"][0], results["distances"][0])
+        ]
+
+    @staticmethod
+    def keyword_search(query: str, k: int, collection: str | None = None,
+                       where: dict | None = None, filenames: list[str] | None = None) -> list[dict]:
+        # Filenames are filtered in the lexical index itself; any other
+        # condition is applied by Chroma, so over-fetch to still fill k
+        post_filtered = where is not None and where != RetrievalService.build_where(filenames)
+        fetch_k = k * settings.HYBRID_CANDIDATE_MULTIPLIER if post_filtered else k
+        ranked = LexicalIndexService.search(query, fetch_k, collection, filenames)
+        if not ranked:
+            return []
+        with VectorStoreManager.read(collection) as vector_store:
+            results = vector_store._collection.get(
+                ids=[chunk_id for chunk_id, _ in ranked], where=where,
+                include=["documents", "metadatas"])
 
-            results = vector_store.similarity_search(query, k=top_k)
+        stored = {chunk_id: (text, metadata) for chunk_id, text, metadata in zip(
+            results["ids"], results["documents"], results["metadatas"])}
+        return [
+            {"id": chunk_id, "text": stored[chunk_id][0],
+             "metadata": stored[chunk_id][1] or {}, "score": score}
+            for chunk_id, score in ranked if chunk_id in stored
+        ][:k]
 
-            chunks = [doc.page_content for doc in results]
+    @staticmethod
+    def reciprocal_rank_fusion(rankings: list[list[dict]], k: int | None = None) -> list[dict]:
+        """Merge ranked lists by summing 1 / (k + rank) per chunk id."""
+        k = k or settings.RRF_K
+        fused = {}
+        for ranking in rankings:
+            for rank, hit in enumerate(ranking, start=1):
+                entry = fused.setdefault(hit["id"], {**hit, "score": 0.0})
+                entry["score"] += 1.0 / (k + rank)
+        return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)
+
+    @staticmethod
+    def hybrid_search(query: str, k: int, collection: str | None = None,
+                      where: dict | None = None, filenames: list[str] | None = None) -> list[dict]:
+        candidates = k * settings.HYBRID_CANDIDATE_MULTIPLIER
+        # Embedding the query dominates the vector side, so run the
+        # lexical lookup alongside it
+        vector_future = RetrievalService._executor.submit(
+            RetrievalService.vector_search, query, candidates, collection, where)
+        keyword_future = RetrievalService._executor.submit(
+            RetrievalService.keyword_search, query, candidates, collection, where, filenames)
+        return RetrievalService.reciprocal_rank_fusion(
+            [vector_future.result(), keyword_future.result()])[:k]
+
+    @staticmethod
+    def retrieve(query: str, top_k: int, mode: str = "vector", rerank: bool = False,
+                 collection: str | None = None, filenames: list[str] | None = None,
+                 tags: list[str] | None = None, ingested_after: datetime | None = None,
+                 ingested_before: datetime | None = None) -> list[dict]:
+        """Return the `top_k` best chunks as dicts with id, text, metadata and score.
+
+        The search is limited to `collection` and to chunks matching the
+        filename, tag and ingestion date filters. With `rerank`,
+        RERANK_CANDIDATES chunks are fetched and re-scored by the
+        cross-encoder before the top `top_k` are kept.
+        """
+        if mode not in RetrievalService.SEARCH_MODES:
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported retrieval mode: {mode}")
+        collection = VectorStoreManager.validate_collection_name(collection)
+        where = RetrievalService.build_where(filenames, tags, ingested_after, ingested_before)
 
-            return chunks
+        query = RetrievalService.normalize_query(query)
+        # The collection version changes on every write and re-embed,
+        # which invalidates cached results for the old contents.
+        key = (collection, VectorStoreManager.get_version(collection), mode, rerank,
+               json.dumps(where, sort_keys=True), query, top_k)
+        hits = RetrievalService.result_cache.get(key)
+        if hits is not None:
+            return [dict(hit) for hit in hits]
+
+        fetch_k = max(top_k, settings.RERANK_CANDIDATES) if rerank else top_k
+        if mode == "keyword":
+            hits = RetrievalService.keyword_search(query, fetch_k, collection, where, filenames)
+        elif mode == "hybrid":
+            hits = RetrievalService.hybrid_search(query, fetch_k, collection, where, filenames)
+        else:
+            hits = RetrievalService.vector_search(query, fetch_k, collection, where)
+        reranked = True
+        if rerank:
+            hits, reranked = RerankerService.rerank(query, hits, top_k)
+
+        # A fallback to retrieval order is not cached as the re-ranked result
+        if reranked:
+            RetrievalService.result_cache.set(key, hits)
+        return [dict(hit) for hit in hits]
+
+    @staticmethod
+    def retrieve_relevant_chunks(query: str, top_k: int, provider: str, mode: str = "vector",
+                                 rerank: bool = False, **filters) -> list[str]:
+        try:
+            return [hit["text"] for hit in RetrievalService.retrieve(query, top_k, mode, rerank, **filters)]
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error retrieving chunks: {str(e)}")
+
+    @staticmethod
+    def get_cache_stats() -> dict:
+        return {
+            "query_embeddings": RetrievalService.query_embedding_cache.stats(),
+            "results": RetrievalService.result_cache.stats(),
+        }
@@ -1,49 +1,86 @@
 from fastapi import HTTPException
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from app.core.config import settings
+from app.services.rag.vector_store import VectorStoreManager
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.manifest import ChunkManifestService
+from app.services.rag.lexical_index import LexicalIndexService
+from app.services.file_manager.catalog import FileCatalogService
 
 
 class VectorDBService:
-    VECTOR_DB_DIR = "chroma_db"
-    COLLECTION_NAME = "documents"
+    @staticmethod
+    def get_vector_store(collection: str | None = None) -> Chroma:
+        return VectorStoreManager.get_store(collection)
+
+    @staticmethod
+    def list_collections() -> list[str]:
+        try:
+            return VectorStoreManager.list_collections()
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error listing collections: {str(e)}")
 
     @staticmethod
-    def get_vector_store():
-        embedding_model = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2")
-        return Chroma(
-            collection_name=VectorDBService.COLLECTION_NAME,
-            embedding_function=embedding_model,
-            persist_directory=VectorDBService.VECTOR_DB_DIR
-        )
+    def describe_collection(collection: str | None = None) -> dict:
+        collection = VectorStoreManager.validate_collection_name(collection)
+        return CollectionBindingService.resolve(collection)
 
     @staticmethod
-    def clear_collection():
+    def clear_collection(collection: str | None = None):
+        collection = VectorStoreManager.validate_collection_name(collection)
         try:
-            vector_store = VectorDBService.get_vector_store()
-            vector_store.delete_collection()
-            vector_store = VectorDBService.get_vector_store()
-            vector_store.persist()
-            return {"message": "Vector database collection cleared successfully"}
+            filenames = ChunkManifestService.filenames(collection)
+            VectorStoreManager.reset_collection(collection)
+            ChunkManifestService.clear(collection)
+            LexicalIndexService.clear(collection)
+            FileCatalogService.reset_ingest(filenames)
+            return {"message": f"Vector database collection {collection} cleared successfully"}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error clearing vector database: {str(e)}")
 
     @staticmethod
-    def delete_chunks_by_filename(filename: str):
+    def delete_chunks_by_filename(filename: str, collection: str | None = None):
+        """Delete a file's chunks from `collection`, or from every collection
+        it was ingested into when no collection is given."""
+        if collection is None:
+            collections = sorted(set(ChunkManifestService.collections_for(filename))
+                                 | {settings.VECTOR_COLLECTION_NAME})
+        else:
+            collections = [VectorStoreManager.validate_collection_name(collection)]
+
         try:
-            vector_store = VectorDBService.get_vector_store()
-            collection = vector_store._collection
-            all_docs = collection.get()
-            ids_to_delete = [
-                id for id, metadata in zip(all_docs["ids"], all_docs["metadatas"])
-                if metadata.get("filename") == filename
-            ]
-            if not ids_to_delete:
+            deleted = 0
+            for name in collections:
+                with VectorStoreManager.write(name) as vector_store:
+                    chroma_collection = vector_store._collection
+                    # Filter server-side so only this file's ids are materialised.
+                    matches = chroma_collection.get(
+                        where={"filename": filename}, include=[])
+                    ids_to_delete = matches["ids"]
+                    ChunkManifestService.delete(filename, name)
+                    LexicalIndexService.remove_file(filename, name)
+                    if ids_to_delete:
+                        chroma_collection.delete(ids=ids_to_delete)
+                        VectorStoreManager.record_changes(name, ids_to_delete)
+                        deleted += len(ids_to_delete)
+            if not deleted:
                 return {"message": f"No chunks found for filename: {filename}"}
-            collection.delete(ids=ids_to_delete)
-            vector_store.persist()
-            return {"message": f"Deleted {len(ids_to_delete)} chunks for filename: {filename}"}
+            return {"message": f"Deleted {deleted} chunks for filename: {filename}"}
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error deleting chunks for {filename}: {str(e)}")
+
+    @staticmethod
+    def rebuild_lexical_index(collection: str | None = None):
+        collection = VectorStoreManager.validate_collection_name(collection)
+        try:
+            with VectorStoreManager.write(collection) as vector_store:
+                indexed = LexicalIndexService.rebuild(vector_store._collection, collection)
+            return {"message": f"Rebuilt lexical index with {indexed} chunks"}
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error rebuilding lexical index: {str(e)}")
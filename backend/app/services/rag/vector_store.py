@@ -0,0 +1,286 @@
+import re
+import logging
+import threading
+from contextlib import contextmanager
+from fastapi import HTTPException
+from langchain_community.vectorstores import Chroma
+
+from app.core.config import settings
+from app.services.rag.embeddings import EmbeddingModelRegistry
+from app.services.rag.collection_binding import CollectionBindingService
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStoreClosed(RuntimeError):
+    pass
+
+
+class ReadWriteLock:
+    """Many concurrent readers or a single writer."""
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._writer:
+                self._condition.wait()
+            self._writer = True
+            while self._readers:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class VectorStoreManager:
+    """Owns the single persistent Chroma client used by the RAG services.
+
+    The client is opened once (normally from the application lifespan) and
+    every service goes through `read()` / `write()` to get a store handle.
+    Services address collections by name; the Chroma collection behind a
+    name comes from its binding and changes when it is re-embedded.
+    """
+
+    # Chroma's own rule: 3-63 characters, alphanumerics at both ends
+    COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{1,61}[A-Za-z0-9]$")
+
+    _client = None
+    _legacy_client = False
+    # Set by close(), so work still running at shutdown cannot reopen the client
+    _closed = False
+    _stores: dict[tuple[str, str], Chroma] = {}
+    # Bumped on every write so caches can tell when a collection changed
+    _versions: dict[str, int] = {}
+    # Ids written to a collection while it is re-embedded
+    _changes: dict[str, set[str]] = {}
+    _lock = threading.Lock()
+    _persist_lock = threading.Lock()
+    # One lock per collection name, so a long write only blocks its own collection
+    _rw_locks: dict[str, ReadWriteLock] = {}
+
+    @staticmethod
+    def open():
+        with VectorStoreManager._lock:
+            VectorStoreManager._closed = False
+            return VectorStoreManager._connect()
+
+    @staticmethod
+    def _connect():
+        """Create the client if needed; the caller holds `_lock`."""
+        if VectorStoreManager._client is None:
+            VectorStoreManager._client = VectorStoreManager._create_client()
+            logger.info(
+                f"Opened vector store at {settings.VECTOR_DB_DIR}")
+        return VectorStoreManager._client
+
+    @staticmethod
+    def _create_client():
+        import chromadb
+
+        if hasattr(chromadb, "PersistentClient"):
+            return chromadb.PersistentClient(path=settings.VECTOR_DB_DIR)
+
+        # chromadb < 0.4 only offers the duckdb+parquet backend, which has
+        # to be flushed to disk explicitly
+        from chromadb.config import Settings as ChromaSettings
+        VectorStoreManager._legacy_client = True
+        return chromadb.Client(ChromaSettings(
+            chroma_db_impl="duckdb+parquet",
+            persist_directory=settings.VECTOR_DB_DIR
+        ))
+
+    @staticmethod
+    def close():
+        with VectorStoreManager._lock:
+            if VectorStoreManager._client is None:
+                return
+            VectorStoreManager._persist_client()
+            VectorStoreManager._stores.clear()
+            VectorStoreManager._client = None
+            VectorStoreManager._closed = True
+            logger.info("Closed vector store")
+
+    @staticmethod
+    def get_client():
+        client = VectorStoreManager._client
+        if client is not None:
+            return client
+        with VectorStoreManager._lock:
+            if VectorStoreManager._closed:
+                raise VectorStoreClosed("Vector store is closed")
+            return VectorStoreManager._connect()
+
+    @staticmethod
+    def get_lock(collection_name: str | None = None) -> ReadWriteLock:
+        collection_name = collection_name or settings.VECTOR_COLLECTION_NAME
+        with VectorStoreManager._lock:
+            return VectorStoreManager._rw_locks.setdefault(collection_name, ReadWriteLock())
+
+    @staticmethod
+    def validate_collection_name(collection_name: str | None) -> str:
+        if collection_name is None:
+            return settings.VECTOR_COLLECTION_NAME
+        if not VectorStoreManager.COLLECTION_NAME_PATTERN.match(collection_name) or ".." in collection_name:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid collection name: {collection_name}")
+        return collection_name
+
+    @staticmethod
+    def list_collections() -> list[str]:
+        client = VectorStoreManager.get_client()
+        # chromadb >= 0.6 returns names, older versions Collection objects
+        names = [getattr(collection, "name", collection)
+                 for collection in client.list_collections()]
+        bindings = CollectionBindingService.list_bindings()
+        aliases = {binding["physical_name"]: binding["collection"] for binding in bindings}
+        hidden = {binding["migration_target"] for binding in bindings}
+        return sorted({aliases.get(name, name) for name in names if name not in hidden})
+
+    @staticmethod
+    def get_store(collection_name: str | None = None, model_name: str | None = None) -> Chroma:
+        binding = CollectionBindingService.resolve(collection_name)
+        physical_name = binding["physical_name"]
+        model_name = model_name or binding["embedding_model"]
+        key = (physical_name, model_name)
+
+        store = VectorStoreManager._stores.get(key)
+        if store is not None:
+            return store
+
+        client = VectorStoreManager.get_client()
+        with VectorStoreManager._lock:
+            store = VectorStoreManager._stores.get(key)
+            if store is None:
+                store = Chroma(
+                    client=client,
+                    collection_name=physical_name,
+                    embedding_function=EmbeddingModelRegistry.get(model_name),
+                    persist_directory=settings.VECTOR_DB_DIR
+                )
+                VectorStoreManager._stores[key] = store
+            return store
+
+    @staticmethod
+    @contextmanager
+    def read(collection_name: str | None = None, model_name: str | None = None):
+        with VectorStoreManager.get_lock(collection_name).read():
+            yield VectorStoreManager.get_store(collection_name, model_name)
+
+    @staticmethod
+    @contextmanager
+    def write(collection_name: str | None = None, model_name: str | None = None):
+        with VectorStoreManager.get_lock(collection_name).write():
+            try:
+                yield VectorStoreManager.get_store(collection_name, model_name)
+            finally:
+                VectorStoreManager.bump_version(collection_name)
+            VectorStoreManager._persist_client()
+
+    @staticmethod
+    def get_version(collection_name: str | None = None) -> int:
+        collection_name = collection_name or settings.VECTOR_COLLECTION_NAME
+        return VectorStoreManager._versions.get(collection_name, 0)
+
+    @staticmethod
+    def bump_version(collection_name: str | None = None) -> None:
+        collection_name = collection_name or settings.VECTOR_COLLECTION_NAME
+        with VectorStoreManager._lock:
+            VectorStoreManager._versions[collection_name] = \
+                VectorStoreManager._versions.get(collection_name, 0) + 1
+
+    @staticmethod
+    def track_changes(collection_name: str) -> None:
+        """Start recording the ids written to `collection_name`."""
+        with VectorStoreManager._lock:
+            VectorStoreManager._changes[collection_name] = set()
+
+    @staticmethod
+    def record_changes(collection_name: str | None, chunk_ids) -> None:
+        """Called by writers, under the write lock, with the ids they upserted,
+        updated or deleted."""
+        collection_name = collection_name or settings.VECTOR_COLLECTION_NAME
+        with VectorStoreManager._lock:
+            changes = VectorStoreManager._changes.get(collection_name)
+            if changes is not None:
+                changes.update(chunk_ids)
+
+    @staticmethod
+    def take_changes(collection_name: str) -> set[str]:
+        """Ids recorded since the last call, if changes are being tracked."""
+        with VectorStoreManager._lock:
+            changes = VectorStoreManager._changes.get(collection_name)
+            if changes is None:
+                return set()
+            VectorStoreManager._changes[collection_name] = set()
+            return changes
+
+    @staticmethod
+    def stop_tracking(collection_name: str) -> None:
+        with VectorStoreManager._lock:
+            VectorStoreManager._changes.pop(collection_name, None)
+
+    @staticmethod
+    def get_physical(physical_name: str):
+        """Raw Chroma collection, bypassing name resolution and locking."""
+        return VectorStoreManager.get_client().get_or_create_collection(physical_name)
+
+    @staticmethod
+    def drop_physical(physical_name: str) -> None:
+        """Delete a Chroma collection; callers hold the write lock of the
+        collection it serves, or it serves none."""
+        try:
+            VectorStoreManager.get_client().delete_collection(physical_name)
+        except Exception:
+            # Collection did not exist yet
+            pass
+        with VectorStoreManager._lock:
+            for key in [key for key in VectorStoreManager._stores if key[0] == physical_name]:
+                del VectorStoreManager._stores[key]
+
+    @staticmethod
+    def reset_collection(collection_name: str | None = None) -> None:
+        """Empty a collection; it is bound afresh to the current settings
+        on its next write."""
+        collection_name = collection_name or settings.VECTOR_COLLECTION_NAME
+        binding = CollectionBindingService.resolve(collection_name)
+        if binding["migration_target"]:
+            raise HTTPException(
+                status_code=409, detail=f"Collection {collection_name} is being re-embedded")
+        client = VectorStoreManager.get_client()
+        with VectorStoreManager.get_lock(collection_name).write():
+            VectorStoreManager.drop_physical(binding["physical_name"])
+            VectorStoreManager.drop_physical(collection_name)
+            CollectionBindingService.remove(collection_name)
+            client.get_or_create_collection(collection_name)
+            VectorStoreManager.bump_version(collection_name)
+            VectorStoreManager._persist_client()
+
+    @staticmethod
+    def _persist_client() -> None:
+        client = VectorStoreManager._client
+        if client is not None and VectorStoreManager._legacy_client:
+            # Writers of different collections may finish together
+            with VectorStoreManager._persist_lock:
+                client.persist()
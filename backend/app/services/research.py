@@ -4,8 +4,8 @@ from app.schemas.chat import LLMProvider
 
 class ResearchPlanService:
     @staticmethod
-    def generate_research_plan(topic: str, provider: LLMProvider) -> dict:
-        prompt = f"""
+    def build_prompt(topic: str) -> str:
+        return f"""
         Вы являетесь экспертным ассистентом по исследованиям. Опираясь на предоставленную тему исследования, создайте:
         1. Четкую и ёмкую цель исследования (одно предложение).
         2. Список из 3–5 конкретных задач для достижения этой цели.
@@ -22,9 +22,8 @@ class ResearchPlanService:
         - [Задача 5]
         """
 
-        response, provider_name, _ = ChatService.generate_response(
-            prompt, provider)
-
+    @staticmethod
+    def parse_research_plan(response: str, provider_name: str) -> dict:
         lines = response.strip().split("\n")
         goal = ""
         tasks = []
@@ -44,3 +43,15 @@ class ResearchPlanService:
             "tasks": tasks,
             "provider": provider_name
         }
+
+    @staticmethod
+    def generate_research_plan(topic: str, provider: LLMProvider) -> dict:
+        response, provider_name, _ = ChatService.generate_response(
+            ResearchPlanService.build_prompt(topic), provider, cache_scope="plan")
+        return ResearchPlanService.parse_research_plan(response, provider_name)
+
+    @staticmethod
+    async def agenerate_research_plan(topic: str, provider: LLMProvider) -> dict:
+        response, provider_name, _ = await ChatService.agenerate_response(
+            ResearchPlanService.build_prompt(topic), provider, cache_scope="plan")
+        return ResearchPlanService.parse_research_plan(response, provider_name)
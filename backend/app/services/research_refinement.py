@@ -4,8 +4,8 @@ from app.schemas.chat import LLMProvider
 
 class ResearchRefinementService:
     @staticmethod
-    def refine_research_topic(topic: str, provider: LLMProvider) -> tuple[str, str]:
-        prompt = f"""
+    def build_prompt(topic: str) -> str:
+        return f"""
         Вы являетесь экспертным консультантом по исследованиям. Ваша задача — взять заданную тему исследования и уточнить её, сделав более конкретной, привлекательной и инновационной. Уточнённая тема должна:
         - Быть ясной и сфокусированной.
         - Внести новую перспективу или направление.
@@ -18,9 +18,8 @@ class ResearchRefinementService:
         Уточнённая тема: [Ваша уточнённая тема]
         """
 
-        response, provider_name, _ = ChatService.generate_response(
-            prompt, provider)
-
+    @staticmethod
+    def parse_refined_topic(response: str) -> str:
         lines = response.strip().split("\n")
         refined_topic = ""
 
@@ -33,4 +32,16 @@ class ResearchRefinementService:
         if not refined_topic:
             raise ValueError("Failed to parse refined topic from LLM response")
 
-        return refined_topic, provider_name
+        return refined_topic
+
+    @staticmethod
+    def refine_research_topic(topic: str, provider: LLMProvider) -> tuple[str, str]:
+        response, provider_name, _ = ChatService.generate_response(
+            ResearchRefinementService.build_prompt(topic), provider, cache_scope="topic")
+        return ResearchRefinementService.parse_refined_topic(response), provider_name
+
+    @staticmethod
+    async def arefine_research_topic(topic: str, provider: LLMProvider) -> tuple[str, str]:
+        response, provider_name, _ = await ChatService.agenerate_response(
+            ResearchRefinementService.build_prompt(topic), provider, cache_scope="topic")
+        return ResearchRefinementService.parse_refined_topic(response), provider_name
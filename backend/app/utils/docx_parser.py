@@ -1,14 +1,23 @@
 import logging
 from docx import Document
 from fastapi import HTTPException
+from app.utils.extraction_cache import ExtractionCache
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
 class DOCXParser:
+    # Bump when parsing output changes to invalidate cached extractions
+    VERSION = 1
+
+    @staticmethod
+    def extract_text_from_docx(file_path: str, content_hash: str | None = None) -> str:
+        return ExtractionCache.cached(
+            file_path, "docx", DOCXParser.VERSION, DOCXParser.parse_docx, content_hash)
+
     @staticmethod
-    def extract_text_from_docx(file_path: str) -> str:
+    def parse_docx(file_path: str) -> str:
         try:
             doc = Document(file_path)
             text = ""
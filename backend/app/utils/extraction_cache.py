@@ -0,0 +1,135 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """On-disk cache of parser output keyed by file content hash and parser version."""
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+    # Bytes cached per directory, counted up by put() so the directory is
+    # only scanned once it goes over EXTRACTION_CACHE_MAX_MB. Other processes
+    # writing the same directory are only seen at that scan.
+    _sizes: dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(ExtractionCache.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def entry_path(content_hash: str, parser: str, version: int) -> str:
+        return os.path.join(settings.EXTRACTION_CACHE_DIR, f"{parser}-v{version}-{content_hash}.json")
+
+    @staticmethod
+    def get(content_hash: str, parser: str, version: int):
+        path = ExtractionCache.entry_path(content_hash, parser, version)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # Touch on hit so eviction drops the least recently used entries
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable extraction cache entry {path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def put(content_hash: str, parser: str, version: int, value) -> None:
+        os.makedirs(settings.EXTRACTION_CACHE_DIR, exist_ok=True)
+        path = ExtractionCache.entry_path(content_hash, parser, version)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=settings.EXTRACTION_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        max_bytes = settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+        with ExtractionCache._lock:
+            directory = settings.EXTRACTION_CACHE_DIR
+            if directory in ExtractionCache._sizes:
+                ExtractionCache._sizes[directory] += os.path.getsize(path) - replaced
+            else:
+                ExtractionCache._sizes[directory] = sum(
+                    size for _, size, _ in ExtractionCache.list_entries(directory))
+            over_limit = ExtractionCache._sizes[directory] > max_bytes
+        if over_limit:
+            ExtractionCache.evict(max_bytes)
+
+    @staticmethod
+    def list_entries(directory: str) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every entry in a cache directory."""
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stats = entry.stat()
+                entries.append((stats.st_mtime, stats.st_size, entry.path))
+        return entries
+
+    @staticmethod
+    def evict(max_bytes: int | None = None) -> int:
+        """Remove least recently used entries until the cache fits `max_bytes`."""
+        if max_bytes is None:
+            max_bytes = settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+
+        with ExtractionCache._lock:
+            directory = settings.EXTRACTION_CACHE_DIR
+            entries = ExtractionCache.list_entries(directory)
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            ExtractionCache._sizes[directory] = total
+
+        if removed:
+            logger.info(f"Evicted {removed} extraction cache entries")
+        return removed
+
+    @staticmethod
+    def cached(file_path: str, parser: str, version: int, extract: Callable[[str], object], content_hash: str | None = None):
+        """Return `extract(file_path)`, served from the cache when possible."""
+        if not settings.EXTRACTION_CACHE_ENABLED:
+            return extract(file_path)
+
+        content_hash = content_hash or ExtractionCache.file_hash(file_path)
+        value = ExtractionCache.get(content_hash, parser, version)
+        if value is not None:
+            logger.info(f"Extraction cache hit for {file_path} ({parser})")
+            return value
+
+        value = extract(file_path)
+        try:
+            ExtractionCache.put(content_hash, parser, version, value)
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache entry for {file_path}: {str(e)}")
+        return value
@@ -1,16 +1,111 @@
+import os
 import re
+import hashlib
 import logging
+import threading
+import multiprocessing
+from typing import Callable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import pdfplumber
 from fastapi import HTTPException
 from pdf2image import convert_from_path
 import pytesseract
+from app.utils.extraction_cache import ExtractionCache
+from app.core.config import settings
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
+def ocr_page(file_path: str, page_number: int, dpi: int, lang: str) -> str:
+    """Rasterise and OCR a single page. Runs inside an OCR worker process."""
+    images = convert_from_path(
+        file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    return "\n".join(pytesseract.image_to_string(image, lang=lang) for image in images)
+
+
 class PDFParser:
+    # Bump when parsing output changes to invalidate cached extractions
+    VERSION = 2
+    OCR_LANGUAGES = "eng+rus"
+    # Pages in flight per OCR worker, bounds memory held by pending results
+    OCR_PAGES_PER_WORKER = 2
+    # Set in processes that are already pool workers (bulk ingestion) to
+    # OCR in-process instead of spawning a nested pool
+    OCR_INLINE = False
+
+    _ocr_pool = None
+    _ocr_pool_lock = threading.Lock()
+
+    @staticmethod
+    def get_ocr_worker_count() -> int:
+        if settings.OCR_WORKERS > 0:
+            return settings.OCR_WORKERS
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def get_ocr_pool() -> ProcessPoolExecutor:
+        with PDFParser._ocr_pool_lock:
+            if PDFParser._ocr_pool is None:
+                PDFParser._ocr_pool = ProcessPoolExecutor(
+                    max_workers=PDFParser.get_ocr_worker_count(),
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return PDFParser._ocr_pool
+
+    @staticmethod
+    def shutdown_ocr_pool() -> None:
+        with PDFParser._ocr_pool_lock:
+            if PDFParser._ocr_pool is not None:
+                PDFParser._ocr_pool.shutdown(cancel_futures=True)
+                PDFParser._ocr_pool = None
+
+    @staticmethod
+    def ocr_pages(file_path: str, page_numbers: list[int],
+                  progress: Callable[[float], None] | None = None) -> list[str]:
+        """OCR the given 1-based pages on the process pool, returning text in page order.
+
+        At most `window` pages are in flight at once, which bounds the
+        rasterised pages held in memory regardless of document length; a
+        new page is submitted as soon as any in-flight page completes.
+        `progress(fraction)` is called after every page; an exception
+        raised from it stops the OCR.
+        """
+        progress = progress or (lambda fraction: None)
+        if PDFParser.OCR_INLINE:
+            texts = []
+            for page_number in page_numbers:
+                texts.append(ocr_page(file_path, page_number, settings.OCR_DPI, PDFParser.OCR_LANGUAGES))
+                progress(len(texts) / len(page_numbers))
+            return texts
+
+        pool = PDFParser.get_ocr_pool()
+        window = PDFParser.get_ocr_worker_count() * PDFParser.OCR_PAGES_PER_WORKER
+        texts = [None] * len(page_numbers)
+        pending = {}
+        next_index = 0
+        done = 0
+        try:
+            while done < len(page_numbers):
+                while next_index < len(page_numbers) and len(pending) < window:
+                    future = pool.submit(ocr_page, file_path, page_numbers[next_index],
+                                         settings.OCR_DPI, PDFParser.OCR_LANGUAGES)
+                    pending[future] = next_index
+                    next_index += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    texts[pending.pop(future)] = future.result()
+                    done += 1
+                    progress(done / len(page_numbers))
+        finally:
+            # Pages not started yet are dropped when OCR stops early
+            for future in pending:
+                future.cancel()
+        return texts
+
     @staticmethod
     def clean_text(text: str) -> str:
         """Minimally clean extracted text to remove only obvious artifacts."""
@@ -35,31 +130,87 @@ class PDFParser:
         return text
 
     @staticmethod
-    def extract_text_from_pdf(file_path: str) -> str:
-        """Extract and minimally clean text from a PDF file using pdfplumber or OCR if necessary."""
-        try:
-            # First try pdfplumber for text-based PDFs
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-
-            if text.strip():
-                cleaned_text = PDFParser.clean_text(text)
-                if cleaned_text:
-                    return cleaned_text
-
-            # If no text extracted, try OCR
+    def classify_page(text: str, has_images: bool) -> str:
+        """Pick the extraction method for a page: "text", "ocr" or "empty"."""
+        stripped = text.strip()
+        if stripped:
+            meaningful = sum(1 for char in stripped if char.isalnum())
+            if (len(stripped) >= settings.PDF_MIN_PAGE_CHARS
+                    and meaningful / len(stripped) >= settings.PDF_MIN_ALNUM_RATIO):
+                return "text"
+        if has_images:
+            return "ocr"
+        return "text" if stripped else "empty"
+
+    @staticmethod
+    def parse_pages(file_path: str, progress: Callable[[float], None] | None = None) -> list[dict]:
+        """Extract every page, using the text layer where usable and OCR elsewhere.
+
+        Returns one {"page", "method", "text"} record per page, in page order.
+        `progress(fraction)` follows the OCR pages.
+        """
+        pages = []
+        with pdfplumber.open(file_path) as pdf:
+            for number, page in enumerate(pdf.pages, start=1):
+                page_text = page.extract_text() or ""
+                pages.append({
+                    "page": number,
+                    "method": PDFParser.classify_page(page_text, bool(page.images)),
+                    "text": page_text,
+                })
+
+        ocr_targets = [page for page in pages if page["method"] == "ocr"]
+        if ocr_targets:
             logger.info(
-                f"No text extracted with pdfplumber for {file_path}, attempting OCR...")
-            images = convert_from_path(file_path)
-            text = ""
-            for image in images:
-                page_text = pytesseract.image_to_string(image, lang='eng+rus')
-                text += page_text + "\n"
+                f"OCR needed for {len(ocr_targets)} of {len(pages)} pages in {file_path}")
+            ocr_texts = PDFParser.ocr_pages(
+                file_path, [page["page"] for page in ocr_targets], progress)
+            for page, ocr_text in zip(ocr_targets, ocr_texts):
+                # Keep a short text layer if OCR found even less on the page
+                if len(ocr_text.strip()) >= len(page["text"].strip()):
+                    page["text"] = ocr_text
+                else:
+                    page["method"] = "text"
+
+        return pages
+
+    @staticmethod
+    def cache_parser() -> str:
+        """Parser name for the extraction cache, covering the settings that change its output."""
+        options = (f"{settings.OCR_DPI}:{PDFParser.OCR_LANGUAGES}:"
+                   f"{settings.PDF_MIN_PAGE_CHARS}:{settings.PDF_MIN_ALNUM_RATIO}")
+        return f"pdf-{hashlib.sha256(options.encode()).hexdigest()[:12]}"
+
+    @staticmethod
+    def extract_pages(file_path: str, content_hash: str | None = None,
+                      progress: Callable[[float], None] | None = None) -> list[dict]:
+        """Per-page extraction records, reusing the cached result for previously parsed content."""
+        return ExtractionCache.cached(
+            file_path, PDFParser.cache_parser(), PDFParser.VERSION,
+            lambda path: PDFParser.parse_pages(path, progress), content_hash)
+
+    @staticmethod
+    def extract_text_from_pdf(file_path: str, content_hash: str | None = None) -> str:
+        """Extract and minimally clean text from a PDF file, OCRing only the pages that need it."""
+        try:
+            pages = PDFParser.extract_pages(file_path, content_hash)
+        except Exception as e:
+            logger.error(
+                f"Error parsing PDF {file_path}: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500, detail=f"Error parsing PDF: {str(e)}")
+        return PDFParser.join_pages(file_path, pages)
+
+    @staticmethod
+    def join_pages(file_path: str, pages: list[dict]) -> str:
+        """Cleaned text of extracted page records."""
+        try:
+            methods = {}
+            for page in pages:
+                methods[page["method"]] = methods.get(page["method"], 0) + 1
+            logger.info(f"Extracted {file_path} by page method: {methods}")
 
+            text = "".join(page["text"] + "\n" for page in pages if page["text"])
             if not text.strip():
                 raise HTTPException(
                     status_code=400, detail="No text could be extracted from the PDF")
@@ -0,0 +1,34 @@
+import json
+import logging
+from typing import AsyncIterator
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+async def ndjson_lines(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Serialise events as newline-delimited JSON.
+
+    Once streaming has started the status code can no longer change, so
+    failures are reported as a final {"type": "error"} event.
+    """
+    try:
+        async for event in events:
+            yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+    except HTTPException as e:
+        yield json.dumps({"type": "error", "status_code": e.status_code, "detail": e.detail},
+                         ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error(f"Error while streaming response: {str(e)}", exc_info=True)
+        yield json.dumps({"type": "error", "status_code": 500, "detail": str(e)},
+                         ensure_ascii=False) + "\n"
+
+
+def ndjson_response(events: AsyncIterator[dict]) -> StreamingResponse:
+    return StreamingResponse(
+        ndjson_lines(events),
+        media_type="application/x-ndjson",
+        # Stop proxies such as nginx from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
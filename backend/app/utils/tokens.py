@@ -0,0 +1,63 @@
+import math
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """Per-provider prompt token counting.
+
+    OpenAI and DeepSeek are counted with tiktoken (DeepSeek's own tokenizer
+    is not shipped, cl100k_base is a close approximation). GigaChat and
+    YandexGPT tokenizers are not available locally, so they use a
+    character heuristic tuned to stay on the safe side for Russian text.
+    """
+
+    TIKTOKEN_ENCODINGS = {
+        "chatgpt": "cl100k_base",
+        "openai": "cl100k_base",
+        "deepseek": "cl100k_base",
+    }
+    HEURISTIC_CHARS_PER_TOKEN = 3.0
+
+    _encodings: dict = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_encoding(provider: str):
+        name = TokenCounter.TIKTOKEN_ENCODINGS.get(provider)
+        if name is None:
+            return None
+        if name in TokenCounter._encodings:
+            return TokenCounter._encodings[name] or None
+        with TokenCounter._lock:
+            if name not in TokenCounter._encodings:
+                try:
+                    import tiktoken
+                    TokenCounter._encodings[name] = tiktoken.get_encoding(name)
+                except Exception as e:
+                    # Missing package or offline BPE download: fall back to the heuristic
+                    logger.warning(f"tiktoken encoding {name} unavailable: {str(e)}")
+                    TokenCounter._encodings[name] = False
+            return TokenCounter._encodings[name] or None
+
+    @staticmethod
+    def count(text: str, provider: str) -> int:
+        provider = str(getattr(provider, "value", provider))
+        encoding = TokenCounter.get_encoding(provider)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / TokenCounter.HEURISTIC_CHARS_PER_TOKEN)
+
+    @staticmethod
+    def truncate(text: str, provider: str, max_tokens: int) -> str:
+        """Cut `text` down to at most `max_tokens` tokens."""
+        if max_tokens <= 0:
+            return ""
+        provider = str(getattr(provider, "value", provider))
+        encoding = TokenCounter.get_encoding(provider)
+        if encoding is not None:
+            tokens = encoding.encode(text, disallowed_special=())
+            return encoding.decode(tokens[:max_tokens])
+        return text[:int(max_tokens * TokenCounter.HEURISTIC_CHARS_PER_TOKEN)]
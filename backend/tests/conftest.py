@@ -0,0 +1,107 @@
+import pytest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from sqlalchemy import create_engine
+from app.core import database
+from app.core.database import Base, SessionLocal
+from app.services.file_manager.file_service import FileService
+from app.services.rag.chunking import ChunkingService
+from app.services.rag.vector_store import VectorStoreManager
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the application database at a throwaway SQLite file."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    original_bind = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=engine)
+    monkeypatch.setattr(database, "_initialized", False)
+    database.init_db()
+    yield engine
+    SessionLocal.configure(bind=original_bind)
+    Base.metadata.drop_all(bind=engine)
+    monkeypatch.setattr(database, "_initialized", False)
+
+
+class FakeCollection:
+    """In-memory stand-in for a Chroma collection."""
+
+    def __init__(self):
+        self.records = {}
+        self.upserted = []
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        selected = [chunk_id for chunk_id in (ids if ids is not None else self.records)
+                    if chunk_id in self.records
+                    and all(self.records[chunk_id]["metadata"].get(key) == value
+                            for key, value in (where or {}).items())]
+        selected = selected[offset or 0:][:limit]
+        include = ["metadatas", "documents"] if include is None else include
+        fields = {"metadatas": "metadata", "documents": "document", "embeddings": "embedding"}
+        return {"ids": selected, **{
+            name: [self.records[chunk_id][field] for chunk_id in selected] if name in include else None
+            for name, field in fields.items()}}
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.upserted.extend(ids)
+        for chunk_id, embedding, metadata, document in zip(ids, embeddings, metadatas, documents):
+            self.records[chunk_id] = {"embedding": embedding, "metadata": dict(metadata),
+                                      "document": document}
+
+    def update(self, ids, metadatas):
+        # Chroma merges updated metadata into the stored one
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.records[chunk_id]["metadata"] = {
+                **self.records[chunk_id]["metadata"], **metadata}
+
+    def delete(self, ids):
+        # Like Chroma, unknown ids are ignored
+        for chunk_id in ids:
+            self.records.pop(chunk_id, None)
+
+    def count(self):
+        return len(self.records)
+
+
+class FakeClient:
+    """In-memory stand-in for the Chroma client."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+    def list_collections(self):
+        return list(self.collections)
+
+
+class FakeEmbeddingModel:
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [[0.0] for _ in texts]
+
+
+@pytest.fixture
+def fake_store(temp_db, tmp_path, monkeypatch):
+    """In-memory Chroma collection and embedder, with uploads in tmp_path."""
+    collection = FakeCollection()
+    model = FakeEmbeddingModel()
+
+    @contextmanager
+    def handle(*args, **kwargs):
+        yield SimpleNamespace(_collection=collection)
+
+    monkeypatch.setattr(VectorStoreManager, "read", staticmethod(handle))
+    monkeypatch.setattr(VectorStoreManager, "write", staticmethod(handle))
+    monkeypatch.setattr(ChunkingService, "get_embedding_model",
+                        staticmethod(lambda binding=None: model))
+    monkeypatch.setattr(FileService, "UPLOAD_DIR", str(tmp_path))
+    return collection, model
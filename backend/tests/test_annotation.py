@@ -0,0 +1,186 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from langchain_core.language_models import FakeListChatModel
+from app.services.annotation import AnnotationService
+from app.services.llm.base import BaseLLMService
+
+
+class FakeLLMService(BaseLLMService):
+    def __init__(self, responses):
+        super().__init__()
+        self.llm = FakeListChatModel(responses=responses)
+
+    def get_llm(self):
+        return self.llm
+
+
+@pytest.fixture
+def long_text(monkeypatch):
+    text = " ".join(f"sentence{i}." for i in range(600))
+    monkeypatch.setattr(AnnotationService, "extract_text",
+                        staticmethod(lambda filename: text))
+    return text
+
+
+def test_agenerate_response():
+    service = FakeLLMService(["hello"])
+    assert asyncio.run(service.agenerate_response("hi")) == "hello"
+
+
+def test_agenerate_annotation_short_text(monkeypatch):
+    monkeypatch.setattr(AnnotationService, "extract_text",
+                        staticmethod(lambda filename: "short article"))
+    service = FakeLLMService(["summary"])
+    monkeypatch.setattr(AnnotationService, "get_llm_provider",
+                        staticmethod(lambda provider: service))
+
+    annotation, provider = asyncio.run(AnnotationService.agenerate_annotation(
+        "paper.pdf", "chatgpt", max_length=100, chunk_size=1000))
+
+    assert annotation == "summary"
+    assert provider == "chatgpt"
+
+
+def test_agenerate_annotation_map_reduce(monkeypatch, long_text):
+    chunks = AnnotationService.split_text(
+        long_text, 1000, AnnotationService.DEFAULT_CHUNK_OVERLAP)
+    service = FakeLLMService(["partial"] * len(chunks) + ["final"])
+    monkeypatch.setattr(AnnotationService, "get_llm_provider",
+                        staticmethod(lambda provider: service))
+
+    annotation, _ = asyncio.run(AnnotationService.agenerate_annotation(
+        "paper.pdf", "chatgpt", max_length=100, chunk_size=1000))
+
+    assert annotation == "final"
+
+
+class SlowEchoLLMService(BaseLLMService):
+    """Echoes the last line of each prompt and tracks peak concurrency."""
+
+    def __init__(self, reply_length=40):
+        super().__init__()
+        self.reply_length = reply_length
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def get_llm(self):
+        return None
+
+    async def agenerate_response(self, prompt: str) -> str:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01 * (self.calls % 3))
+        self.active -= 1
+        return prompt.splitlines()[-1][:self.reply_length].ljust(self.reply_length)
+
+
+def test_map_phase_is_concurrent_and_ordered(monkeypatch, long_text):
+    service = SlowEchoLLMService()
+    monkeypatch.setattr(AnnotationService, "get_llm_provider",
+                        staticmethod(lambda provider: service))
+    monkeypatch.setattr(AnnotationService, "get_concurrency_limit",
+                        staticmethod(lambda provider: 3))
+    captured = {}
+    original = AnnotationService.build_final_prompt
+
+    def capture(annotations, max_length):
+        captured["annotations"] = annotations
+        return original(annotations, max_length)
+
+    monkeypatch.setattr(AnnotationService, "build_final_prompt",
+                        staticmethod(capture))
+
+    asyncio.run(AnnotationService.agenerate_annotation(
+        "paper.pdf", "chatgpt", max_length=100, chunk_size=1000, reduce_mode="single"))
+
+    chunks = AnnotationService.split_text(
+        long_text, 1000, AnnotationService.DEFAULT_CHUNK_OVERLAP)
+    assert captured["annotations"] == [
+        chunk.splitlines()[-1][:40].ljust(40) for chunk in chunks]
+    assert service.peak == 3
+
+
+class FailFastLLMService(BaseLLMService):
+    """Fails the first call while the others are still waiting on the provider."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.cancelled = 0
+
+    def get_llm(self):
+        return None
+
+    async def agenerate_response(self, prompt: str) -> str:
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider error")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return "partial"
+
+
+def test_failed_map_call_cancels_the_others(monkeypatch, long_text):
+    service = FailFastLLMService()
+    monkeypatch.setattr(AnnotationService, "get_llm_provider",
+                        staticmethod(lambda provider: service))
+    monkeypatch.setattr(AnnotationService, "get_concurrency_limit",
+                        staticmethod(lambda provider: 100))
+
+    async def run():
+        with pytest.raises(HTTPException):
+            await AnnotationService.agenerate_annotation(
+                "paper.pdf", "chatgpt", max_length=100, chunk_size=1000)
+        await asyncio.sleep(0)
+        return service.cancelled
+
+    assert asyncio.run(run()) == service.calls - 1 > 0
+
+
+def test_group_for_reduce():
+    groups = AnnotationService.group_for_reduce(["aaaa", "bbbb", "cccc"], 10)
+    assert groups == [["aaaa", "bbbb"], ["cccc"]]
+
+
+def test_tree_reduce_collapses_overflowing_summaries(monkeypatch, long_text):
+    service = SlowEchoLLMService(reply_length=300)
+    monkeypatch.setattr(AnnotationService, "get_llm_provider",
+                        staticmethod(lambda provider: service))
+
+    asyncio.run(AnnotationService.agenerate_annotation(
+        "paper.pdf", "chatgpt", max_length=100, chunk_size=1000, reduce_mode="tree"))
+    chunk_count = len(AnnotationService.split_text(
+        long_text, 1000, AnnotationService.DEFAULT_CHUNK_OVERLAP))
+
+    # map + at least one collapse round + final reduce
+    assert service.calls > chunk_count + 1
+
+
+def test_astream_annotation_reports_each_chunk(monkeypatch, long_text):
+    chunks = AnnotationService.split_text(
+        long_text, 1000, AnnotationService.DEFAULT_CHUNK_OVERLAP)
+    service = FakeLLMService(["partial"] * len(chunks) + ["final annotation"])
+    monkeypatch.setattr(AnnotationService, "get_llm_provider",
+                        staticmethod(lambda provider: service))
+
+    async def collect():
+        return [event async for event in AnnotationService.astream_annotation(
+            "paper.pdf", "chatgpt", max_length=100, chunk_size=1000, reduce_mode="single")]
+
+    events = asyncio.run(collect())
+
+    assert events[0] == {"type": "extracted",
+                         "characters": len(long_text), "chunks": len(chunks)}
+    summaries = [event for event in events if event["type"] == "chunk_summary"]
+    assert sorted(event["index"] for event in summaries) == list(range(len(chunks)))
+    assert summaries[-1]["completed"] == len(chunks)
+    assert events[-1] == {"type": "done",
+                          "annotation": "final annotation", "provider": "chatgpt"}
+    assert any(event["type"] == "annotation_token" for event in events)
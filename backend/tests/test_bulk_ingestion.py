@@ -0,0 +1,102 @@
+import io
+import zipfile
+import pytest
+from fastapi import HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from app.services.rag.bulk_ingestion import BulkIngestionService
+from app.core.config import settings
+from app.services.rag.chunking import ChunkingService
+from tests.conftest import FakeEmbeddingModel
+
+
+class BatchRecordingModel(FakeEmbeddingModel):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def bulk_store(fake_store, monkeypatch):
+    collection, _ = fake_store
+    model = BatchRecordingModel()
+    monkeypatch.setattr(ChunkingService, "get_embedding_model",
+                        staticmethod(lambda binding=None: model))
+    # Threads instead of spawned processes keep the test fast
+    monkeypatch.setattr(BulkIngestionService, "get_parse_pool",
+                        staticmethod(lambda workers: ThreadPoolExecutor(workers)))
+    return collection, model
+
+
+def test_bulk_ingest_shares_batches_and_reports_failures(bulk_store, tmp_path):
+    collection, model = bulk_store
+    for i in range(3):
+        (tmp_path / f"paper{i}.txt").write_text(
+            f"Paper {i} studies topic {i}. " * 30, encoding="utf-8")
+    (tmp_path / "empty.txt").write_text("tiny", encoding="utf-8")
+
+    result = BulkIngestionService.ingest(
+        ["paper0.txt", "empty.txt", "paper1.txt", "missing.txt", "paper2.txt"],
+        batch_size=4, failures=[{"filename": "bad.zip/x.txt", "error": "corrupt"}])
+
+    assert result["files"] == 6
+    assert result["succeeded"] == 3
+    assert sorted(item["filename"] for item in result["failed"]) == \
+        ["bad.zip/x.txt", "empty.txt", "missing.txt"]
+    assert result["added"] == result["chunk_count"] == len(collection.records)
+    # Batches are filled across file boundaries
+    assert all(size == 4 for size in model.batches[:-1])
+    assert sum(model.batches) == result["added"]
+
+    again = BulkIngestionService.ingest(["paper0.txt", "paper1.txt"], batch_size=4)
+    assert again["unchanged"] == 2
+    assert sum(model.batches) == result["added"]
+
+
+def test_stage_zip_flattens_and_rejects_conflicts(temp_db, tmp_path, monkeypatch):
+    from app.services.file_manager.file_service import FileService
+    monkeypatch.setattr(FileService, "UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "taken.txt").write_text("other content", encoding="utf-8")
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("lab/a paper.txt", "alpha")
+        zf.writestr("lab/nested/b.pdf", b"%PDF-1.4")
+        zf.writestr("lab/notes.exe", b"ignored")
+        zf.writestr("lab/taken.txt", "new content")
+    archive.seek(0)
+
+    filenames, failures = BulkIngestionService.stage_zip(archive)
+    assert filenames == ["a_paper.txt", "b.pdf"]
+    assert (tmp_path / "a_paper.txt").read_text(encoding="utf-8") == "alpha"
+    assert failures == [{"filename": "lab/taken.txt",
+                         "error": "File already exists with different content"}]
+    assert (tmp_path / "taken.txt").read_text(encoding="utf-8") == "other content"
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_stage_directory_stays_inside_the_ingestion_root(temp_db, tmp_path, monkeypatch):
+    from app.services.file_manager.file_service import FileService
+    root, outside, uploads = tmp_path / "root", tmp_path / "outside", tmp_path / "uploads"
+    (root / "lab").mkdir(parents=True)
+    outside.mkdir()
+    uploads.mkdir()
+    (root / "lab" / "a.txt").write_text("alpha", encoding="utf-8")
+    (root / "b.txt").write_text("beta", encoding="utf-8")
+    (outside / "secret.txt").write_text("secret", encoding="utf-8")
+    (root / "lab" / "secret.txt").symlink_to(outside / "secret.txt")
+    (root / "lab" / "linked.txt").symlink_to(root / "b.txt")
+    monkeypatch.setattr(settings, "BULK_INGEST_ROOT", str(root))
+    monkeypatch.setattr(FileService, "UPLOAD_DIR", str(uploads))
+
+    filenames, failures = BulkIngestionService.stage_directory("lab")
+    assert filenames == ["a.txt", "linked.txt"]
+    assert failures == [{"filename": "secret.txt", "error": "File is outside the allowed ingestion root"}]
+    assert not (uploads / "secret.txt").exists()
+
+    with pytest.raises(HTTPException) as error:
+        BulkIngestionService.stage_directory("../outside")
+    assert error.value.status_code == 403
@@ -0,0 +1,80 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models import FakeListChatModel
+from app.main import app
+from app.services.llm.base import BaseLLMService
+from app.services.llm.registry import LLMServiceRegistry
+from app.services.rag.retrieval import RetrievalService
+
+client = TestClient(app)
+
+
+class FakeLLMService(BaseLLMService):
+    provider_name = "chatgpt"
+    model_name = "fake"
+
+    def get_llm(self):
+        return FakeListChatModel(responses=["Hi there"])
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    service = FakeLLMService()
+    monkeypatch.setattr(LLMServiceRegistry, "get",
+                        staticmethod(lambda provider: service))
+    monkeypatch.setattr(RetrievalService, "retrieve", staticmethod(
+        lambda query, top_k, **options: [{"id": "a", "text": "ctx 1", "score": 1.0},
+                                         {"id": "b", "text": "ctx 2", "score": 0.5}]))
+    return service
+
+
+def read_events(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_stream_sends_context_then_tokens(fake_llm):
+    response = client.post("/api/v1/research/chat/stream",
+                           json={"prompt": "Hello!", "use_rag": True, "top_k": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    events = read_events(response)
+    assert events[0] == {"type": "context", "context": ["ctx 1", "ctx 2"]}
+    tokens = [event["content"] for event in events if event["type"] == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Hi there"
+    assert events[-1] == {"type": "done", "provider": "chatgpt"}
+
+
+def test_stream_reports_errors_as_events(fake_llm, monkeypatch):
+    def broken_retrieval(query, top_k, **options):
+        raise RuntimeError("vector store offline")
+
+    monkeypatch.setattr(RetrievalService, "retrieve", staticmethod(broken_retrieval))
+    response = client.post("/api/v1/research/chat/stream",
+                           json={"prompt": "Hello!", "use_rag": True})
+
+    events = read_events(response)
+    assert events[-1]["type"] == "error"
+    assert "vector store offline" in events[-1]["detail"]
+
+
+def test_stream_rejects_bad_requests_before_streaming(fake_llm):
+    response = client.post("/api/v1/research/chat/stream",
+                           json={"prompt": "Hello!", "use_rag": True, "collection": "a"})
+    assert response.status_code == 400
+    assert "Invalid collection name" in response.json()["detail"]
+
+
+def test_annotation_stream_rejects_bad_requests_before_streaming(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "notes.txt").write_text("text", encoding="utf-8")
+
+    response = client.post("/api/v1/annotations/generate/stream",
+                           json={"filename": "missing.pdf", "provider": "chatgpt"})
+    assert response.status_code == 404
+    response = client.post("/api/v1/annotations/generate/stream",
+                           json={"filename": "notes.txt", "provider": "chatgpt"})
+    assert response.status_code == 400
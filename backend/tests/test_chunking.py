@@ -91,3 +91,86 @@ def test_process_invalid_file():
             os.remove(file_path)
         if os.path.exists(test_dir):
             os.rmdir(test_dir)
+
+
+def test_iter_batches():
+    batches = list(ChunkingService.iter_batches(list(range(7)), 3))
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_chunk_ids_are_content_addressed():
+    ids = ChunkingService.chunk_ids("a.txt", ["alpha", "beta", "alpha"])
+    assert ids[0] != ids[1]
+    assert ids[2] == ids[0] + "_1"
+    assert ChunkingService.chunk_ids("a.txt", ["beta"])[0] == ids[1]
+
+
+def test_split_positions_skip_dropped_short_chunks(monkeypatch):
+    class FixedSplitter:
+        def split_text(self, content):
+            return ["A long enough first chunk of text.", "tiny", "A long enough third chunk of text."]
+
+    monkeypatch.setattr(ChunkingService, "get_text_splitter", staticmethod(FixedSplitter))
+    # The gap keeps the first and third chunks from being merged as adjacent
+    assert [position for position, _ in ChunkingService.split_content("ignored")] == [0, 2]
+
+
+def test_reingest_only_embeds_changed_chunks(fake_store, tmp_path):
+    collection, model = fake_store
+    paragraphs = [f"Paragraph {i} " + "lorem ipsum dolor sit amet " * 15
+                  for i in range(6)]
+    path = tmp_path / "notes.txt"
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+    first = ChunkingService.ingest_file("notes.txt")
+    assert first["added"] == first["chunk_count"]
+
+    unchanged = ChunkingService.ingest_file("notes.txt")
+    assert unchanged["added"] == 0
+    assert model.embedded == first["chunk_count"]
+
+    path.write_text("\n\n".join(paragraphs[:4]), encoding="utf-8")
+    shrunk = ChunkingService.ingest_file("notes.txt")
+    assert shrunk["deleted"] > 0
+    assert len(collection.records) == shrunk["chunk_count"]
+    assert model.embedded - first["chunk_count"] == shrunk["added"]
+    assert sorted(record["metadata"]["chunk_index"]
+                  for record in collection.records.values()) == list(range(shrunk["chunk_count"]))
+
+
+def test_retagging_updates_metadata_without_embedding(fake_store, tmp_path):
+    collection, model = fake_store
+    (tmp_path / "paper.txt").write_text(
+        "Graph neural networks for molecules. " * 40, encoding="utf-8")
+
+    first = ChunkingService.ingest_file("paper.txt", tags=["chemistry", "gnn"])
+    retagged = ChunkingService.ingest_file("paper.txt", tags=["gnn"])
+    assert retagged["added"] == 0
+    assert retagged["unchanged"] == first["chunk_count"]
+    assert model.embedded == first["chunk_count"]
+
+    metadata = next(iter(collection.records.values()))["metadata"]
+    assert metadata["tag:gnn"] is True
+    assert metadata["tag:chemistry"] is False
+    assert isinstance(metadata["ingested_at"], int)
+
+
+def test_ingest_outcome_is_recorded_in_catalog(fake_store, tmp_path):
+    from app.services.file_manager.catalog import FileCatalogService
+
+    path = tmp_path / "paper.txt"
+    path.write_text("Catalogued paper text. " * 40, encoding="utf-8")
+    FileCatalogService.add("paper.txt", path.stat().st_size, "0" * 64)
+    (tmp_path / "empty.txt").write_text("tiny", encoding="utf-8")
+    FileCatalogService.add("empty.txt", 4, "1" * 64)
+
+    result = ChunkingService.ingest_file("paper.txt")
+    entry = FileCatalogService.get("paper.txt")
+    assert entry["status"] == "ingested"
+    assert entry["chunk_count"] == result["chunk_count"]
+
+    with pytest.raises(HTTPException):
+        ChunkingService.ingest_file("empty.txt")
+    entry = FileCatalogService.get("empty.txt")
+    assert entry["status"] == "failed"
+    assert entry["error"] == "No valid chunks extracted from file"
@@ -0,0 +1,176 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.file_manager.file_service import FileService
+from app.services.rag.chunking import ChunkingService
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.manifest import ChunkManifestService
+from app.services.rag.reembedding import ReembeddingService
+from app.services.rag.vector_store import VectorStoreManager
+from tests.conftest import FakeClient
+
+
+class SizedEmbeddings:
+    """Embeds every text as a vector whose length depends on the model."""
+
+    DIMENSIONS = {"old-model": 2, "new-model": 3}
+
+    def __init__(self, binding):
+        self.dimension = SizedEmbeddings.DIMENSIONS[binding["embedding_model"]]
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] * self.dimension for text in texts]
+
+    def embed_query(self, text):
+        return [1.0] * self.dimension
+
+
+@pytest.fixture
+def memory_store(temp_db, tmp_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(VectorStoreManager, "_client", client)
+    monkeypatch.setattr(VectorStoreManager, "get_store", staticmethod(
+        lambda collection=None, model_name=None: SimpleNamespace(
+            _collection=client.get_or_create_collection(
+                CollectionBindingService.resolve(collection)["physical_name"]))))
+    monkeypatch.setattr(CollectionBindingService, "get_embeddings", staticmethod(SizedEmbeddings))
+    monkeypatch.setattr(settings, "VECTORIZE_MODEL", "old-model")
+    monkeypatch.setattr(FileService, "UPLOAD_DIR", str(tmp_path))
+    return client
+
+
+def write_file(tmp_path, name, text):
+    (tmp_path / name).write_text((text + " ") * 30, encoding="utf-8")
+
+
+def test_first_write_binds_and_later_ingests_keep_the_model(memory_store, tmp_path, monkeypatch):
+    write_file(tmp_path, "a.txt", "First paper about embeddings.")
+    ChunkingService.ingest_file("a.txt")
+    binding = CollectionBindingService.resolve()
+    assert binding["embedding_model"] == "old-model"
+    assert binding["dimension"] == 2
+
+    # Changing the setting does not move an existing collection
+    monkeypatch.setattr(settings, "VECTORIZE_MODEL", "new-model")
+    write_file(tmp_path, "b.txt", "Second paper about retrieval.")
+    ChunkingService.ingest_file("b.txt")
+    stored = memory_store.collections["documents"].records.values()
+    assert {len(record["embedding"]) for record in stored} == {2}
+
+
+def test_writes_from_another_embedding_space_are_rejected(memory_store, tmp_path):
+    write_file(tmp_path, "a.txt", "First paper about embeddings.")
+    ChunkingService.ingest_file("a.txt")
+    with pytest.raises(HTTPException) as error:
+        ChunkingService.write_chunks(
+            "documents", [("a.txt", 0, "x", "text")], [[1.0, 1.0, 1.0]], [], 0,
+            CollectionBindingService.spec("new-model"))
+    assert error.value.status_code == 409
+
+    binding = CollectionBindingService.resolve()
+    with pytest.raises(HTTPException) as error:
+        CollectionBindingService.check_query(binding, [1.0, 1.0, 1.0])
+    assert error.value.status_code == 409
+
+
+def test_collections_from_before_bindings_are_adopted(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "VECTORIZE_MODEL", "new-model")
+    ChunkManifestService.save("a.txt", "hash", "old-model", ["a_1"], "legacy")
+    binding = CollectionBindingService.resolve("legacy")
+    assert binding["embedding_model"] == "old-model"
+    assert (binding["normalize"], binding["query_prefix"]) == (False, "")
+
+
+def test_e5_models_get_their_prefixes():
+    spec = CollectionBindingService.spec("intfloat/multilingual-e5-small", normalize=True)
+    assert (spec["query_prefix"], spec["document_prefix"]) == ("query: ", "passage: ")
+    assert CollectionBindingService.default_prefixes("sentence-transformers/all-MiniLM-L6-v2") == ("", "")
+
+
+def test_reembed_switches_collection_after_catching_up(memory_store, tmp_path):
+    write_file(tmp_path, "a.txt", "First paper about embeddings.")
+    write_file(tmp_path, "b.txt", "Second paper about retrieval.")
+    ChunkingService.ingest_file("a.txt")
+    ChunkingService.ingest_file("b.txt")
+    write_file(tmp_path, "c.txt", "Third paper, added while re-embedding.")
+
+    def progress(stage, fraction):
+        # Writes keep going to the old collection during the copy
+        if stage == "embed" and not ChunkManifestService.get("c.txt"):
+            ChunkingService.ingest_file("c.txt")
+            assert "c.txt" in {record["metadata"]["filename"]
+                               for record in memory_store.collections["documents"].records.values()}
+            assert CollectionBindingService.resolve()["embedding_model"] == "old-model"
+
+    options = ReembeddingService.prepare("documents", "new-model", normalize=True)
+    result = ReembeddingService.reembed(progress=progress, batch_size=1, **options)
+
+    binding = CollectionBindingService.resolve()
+    assert binding["embedding_model"] == "new-model"
+    assert binding["dimension"] == 3
+    assert binding["physical_name"] == options["target"]
+    assert binding["migration_target"] is None
+    assert "documents" not in memory_store.collections
+    assert VectorStoreManager.list_collections() == ["documents"]
+
+    records = memory_store.collections[options["target"]].records
+    assert {record["metadata"]["filename"] for record in records.values()} == {"a.txt", "b.txt", "c.txt"}
+    assert {len(record["embedding"]) for record in records.values()} == {3}
+    assert result["chunk_count"] == len(records)
+
+    with pytest.raises(HTTPException):
+        ReembeddingService.prepare("documents", "new-model", normalize=True)
+
+
+def test_failed_reembed_keeps_the_old_collection(memory_store, tmp_path):
+    write_file(tmp_path, "a.txt", "First paper about embeddings.")
+    ChunkingService.ingest_file("a.txt")
+    options = ReembeddingService.prepare("documents", "missing-model")
+
+    with pytest.raises(KeyError):
+        ReembeddingService.reembed(**options)
+    binding = CollectionBindingService.resolve()
+    assert binding["embedding_model"] == "old-model"
+    assert binding["migration_target"] is None
+    assert options["target"] not in memory_store.collections
+
+
+def test_reembed_catches_up_without_blocking_writers(memory_store, tmp_path, monkeypatch):
+    write_file(tmp_path, "a.txt", "First paper about embeddings.")
+    ChunkingService.ingest_file("a.txt")
+    write_file(tmp_path, "b.txt", "Second paper, added during the catch-up.")
+    catch_up = ReembeddingService.catch_up
+
+    def ingest_during_catch_up(*args):
+        changes = catch_up(*args)
+        # Writers are not blocked, and what they write after the comparison is recorded
+        assert not VectorStoreManager.get_lock("documents")._writer
+        ChunkingService.ingest_file("b.txt")
+        return changes
+
+    monkeypatch.setattr(ReembeddingService, "catch_up", staticmethod(ingest_during_catch_up))
+    options = ReembeddingService.prepare("documents", "new-model")
+    ReembeddingService.reembed(**options)
+
+    records = memory_store.collections[options["target"]].records
+    assert {record["metadata"]["filename"] for record in records.values()} == {"a.txt", "b.txt"}
+    assert VectorStoreManager.take_changes("documents") == set()
+
+
+def test_resolve_racing_a_first_write_does_not_reserve_the_name(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "VECTORIZE_MODEL", "old-model")
+    CollectionBindingService.record_write("documents", CollectionBindingService.spec(), 2)
+    get = Session.get
+    misses = []
+
+    def get_after_first_write(session, *args, **kwargs):
+        # The primary-key read happens just before the first write commits
+        if not misses:
+            misses.append(args)
+            return None
+        return get(session, *args, **kwargs)
+
+    monkeypatch.setattr(Session, "get", get_after_first_write)
+    assert CollectionBindingService.resolve("documents")["collection"] == "documents"
@@ -0,0 +1,41 @@
+from app.services.rag.context_packing import ContextPackingService
+from app.utils.tokens import TokenCounter
+
+
+def hit(chunk_id, text, score, filename=None, index=None):
+    metadata = {"filename": filename, "chunk_index": index} if filename else {}
+    return {"id": chunk_id, "text": text, "score": score, "metadata": metadata}
+
+
+def test_adjacent_chunks_are_merged_without_overlap():
+    hits = [
+        hit("a1", "gradient descent converges when the step is small", 0.9, "a.pdf", 1),
+        hit("b0", "attention is all you need", 0.8, "b.pdf", 0),
+        hit("a0", "we study optimisation methods. gradient descent", 0.7, "a.pdf", 0),
+    ]
+    blocks = ContextPackingService.merge_adjacent(hits)
+    assert [block["text"] for block in blocks] == [
+        "we study optimisation methods. gradient descent converges when the step is small",
+        "attention is all you need",
+    ]
+    assert blocks[0]["score"] == 0.9
+
+
+def test_duplicates_are_dropped():
+    hits = [hit("a", "long passage about retrieval augmented generation", 0.9),
+            hit("b", "retrieval  augmented generation", 0.8)]
+    assert ContextPackingService.pack(hits, "gigachat", 1000) == [
+        "long passage about retrieval augmented generation"]
+
+
+def test_pack_fills_budget_in_score_order():
+    hits = [hit("a", "x" * 300, 0.9), hit("b", "y" * 600, 0.8), hit("c", "z" * 90, 0.7)]
+    # 300 chars ~ 100 tokens with the heuristic counter, plus the bullet overhead
+    context = ContextPackingService.pack(hits, "yandexgpt", 150)
+    assert context == ["x" * 300, "z" * 90]
+
+
+def test_pack_truncates_single_oversized_block():
+    context = ContextPackingService.pack([hit("a", "w" * 900, 0.9)], "gigachat", 52)
+    assert context == ["w" * 150]
+    assert TokenCounter.count(context[0], "gigachat") == 50
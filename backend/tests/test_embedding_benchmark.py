@@ -0,0 +1,50 @@
+import numpy as np
+from contextlib import contextmanager
+from types import SimpleNamespace
+from app.services.rag.collection_binding import CollectionBindingService
+from app.services.rag.embedding_benchmark import EmbeddingBenchmarkService
+from app.services.rag.vector_store import VectorStoreManager
+
+TEXTS = [f"chunk {i} about topic {i % 7} " + "word " * i for i in range(40)]
+
+
+class HashEmbeddings:
+    """Deterministic vectors; the quantized stand-in adds a little noise."""
+
+    def __init__(self, binding, backend=None):
+        self.noise = 0.01 if backend == "onnx-int8" else 0.0
+
+    def vector(self, text):
+        rng = np.random.default_rng(sum(map(ord, text)))
+        return (rng.normal(size=16) + self.noise).tolist()
+
+    def embed_documents(self, texts):
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.vector(text)
+
+
+def test_benchmark_reports_recall_against_torch(temp_db, monkeypatch):
+    @contextmanager
+    def read(*args, **kwargs):
+        yield SimpleNamespace(_collection=SimpleNamespace(
+            get=lambda include, limit: {"documents": TEXTS[:limit]}))
+
+    monkeypatch.setattr(VectorStoreManager, "read", staticmethod(read))
+    monkeypatch.setattr(CollectionBindingService, "get_embeddings", staticmethod(HashEmbeddings))
+
+    report = EmbeddingBenchmarkService.run(backends=["onnx-int8"], sample_size=30, query_count=5, top_k=3)
+    assert report["documents"] == 30
+    assert report["queries"] == 5
+    assert [result["backend"] for result in report["results"]] == ["torch", "onnx-int8"]
+    quantized = report["results"][1]
+    assert quantized["recall_at_k"] > 0.9
+    assert 0.99 < quantized["mean_cosine_to_reference"] <= 1.0
+    assert "recall_at_k" not in report["results"][0]
+
+
+def test_rank_uses_cosine_similarity():
+    documents = np.array([[1.0, 0.0], [0.0, 10.0], [1.0, 1.0]])
+    queries = np.array([[0.0, 1.0]])
+    assert EmbeddingBenchmarkService.rank(queries, documents, 2).tolist() == [[1, 2]]
@@ -0,0 +1,134 @@
+import time
+import pytest
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from app.services.rag import embeddings
+from app.services.rag.embeddings import EmbeddingModelRegistry
+from app.services.rag.onnx_embeddings import OnnxEmbeddings
+
+
+class FakeEmbeddings:
+    instances = 0
+
+    def __init__(self, model_name, model_kwargs=None, encode_kwargs=None):
+        FakeEmbeddings.instances += 1
+        self.model_name = model_name
+        self.model_kwargs = model_kwargs or {}
+
+
+@pytest.fixture
+def fake_registry(monkeypatch):
+    FakeEmbeddings.instances = 0
+    monkeypatch.setattr(embeddings, "HuggingFaceEmbeddings", FakeEmbeddings)
+    EmbeddingModelRegistry.clear()
+    yield EmbeddingModelRegistry
+    EmbeddingModelRegistry.clear()
+
+
+def test_model_is_loaded_once(fake_registry):
+    first = fake_registry.get("model-a", "cpu")
+    second = fake_registry.get("model-a", "cpu")
+    assert first is second
+    assert FakeEmbeddings.instances == 1
+
+
+def test_models_are_keyed_by_name_and_device(fake_registry):
+    cpu_model = fake_registry.get("model-a", "cpu")
+    cuda_model = fake_registry.get("model-a", "cuda")
+    other_model = fake_registry.get("model-b", "cpu")
+    assert len({id(cpu_model), id(cuda_model), id(other_model)}) == 3
+    assert cuda_model.model_kwargs == {"device": "cuda"}
+
+
+def test_load_stats_are_recorded(fake_registry):
+    fake_registry.preload(["model-a"], "cpu")
+    stats = fake_registry.get_stats()
+    assert len(stats) == 1
+    assert stats[0]["model_name"] == "model-a"
+    assert stats[0]["load_seconds"] >= 0
+    assert stats[0]["memory_mb"] >= 0
+
+
+def test_unavailable_backend_falls_back_to_torch(fake_registry, monkeypatch):
+    def missing_onnx(*args, **kwargs):
+        raise ImportError("No module named 'onnxruntime'")
+
+    monkeypatch.setattr(embeddings, "OnnxEmbeddings", missing_onnx)
+    model = fake_registry.get("model-a", "cpu", "onnx-int8")
+    assert isinstance(model, FakeEmbeddings)
+    assert fake_registry.get_backend("model-a", "cpu", "onnx-int8") == "torch"
+    with pytest.raises(ValueError):
+        fake_registry.get("model-a", "cpu", "tensorrt")
+
+
+def test_batches_group_texts_of_similar_length():
+    lengths = [5, 50, 6, 48, 7]
+    assert OnnxEmbeddings.plan_batches(lengths, 2, 1000) == [[0, 2], [4, 3], [1]]
+    # Capped by padded tokens: a fourth text would pad the batch to 4 * 100
+    assert OnnxEmbeddings.plan_batches([10, 10, 10, 100], 10, 120) == [[0, 1, 2], [3]]
+
+
+class WordTokenizer:
+    """Fails like a Hugging Face fast tokenizer when used by two threads at once."""
+
+    def __init__(self):
+        self.busy = False
+
+    def borrow(self):
+        if self.busy:
+            raise RuntimeError("Already borrowed")
+        self.busy = True
+        time.sleep(0.001)
+        self.busy = False
+
+    def __call__(self, texts, truncation=True, max_length=None):
+        self.borrow()
+        input_ids = [([1] * len(text.split()))[:max_length] for text in texts]
+        return {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, features, return_tensors="np"):
+        self.borrow()
+        width = max(len(ids) for ids in features["input_ids"])
+        return {key: np.array([row + [0] * (width - len(row)) for row in rows])
+                for key, rows in features.items()}
+
+
+class CountingSession:
+    """Hidden state of every real token is the number of real tokens in its text."""
+
+    def __init__(self):
+        self.shapes = []
+
+    def run(self, outputs, inputs):
+        mask = inputs["attention_mask"]
+        self.shapes.append(mask.shape)
+        return [np.repeat((mask * mask.sum(axis=1, keepdims=True))[..., None], 2, axis=2).astype(np.float32)]
+
+
+def make_onnx_model():
+    model = OnnxEmbeddings.__new__(OnnxEmbeddings)
+    model.tokenizer = WordTokenizer()
+    model.tokenizer_lock = threading.Lock()
+    model.session = CountingSession()
+    model.input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    model.pooling, model.normalize, model.max_length = "mean", False, 512
+    model.batch_size, model.batch_tokens = 2, 10000
+    return model
+
+
+def test_onnx_encoding_pads_per_batch_and_keeps_order():
+    model = make_onnx_model()
+    texts = ["one two three four", "one", "one two three", "one two"]
+    vectors = model.embed_documents(texts)
+    assert [vector[0] for vector in vectors] == [4.0, 1.0, 3.0, 2.0]
+    # Short texts are batched together instead of padding to the longest
+    assert model.session.shapes == [(2, 2), (2, 4)]
+
+
+def test_onnx_encoding_is_safe_from_several_threads():
+    model = make_onnx_model()
+    texts = [" ".join(["word"] * (i % 7 + 1)) for i in range(40)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(model.embed_query, texts))
+    assert [vector[0] for vector in results] == [float(i % 7 + 1) for i in range(40)]
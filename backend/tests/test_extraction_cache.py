@@ -0,0 +1,79 @@
+import os
+import pytest
+from app.core.config import settings
+from app.utils.extraction_cache import ExtractionCache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "cache"
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_DIR", str(directory))
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_ENABLED", True)
+    return directory
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "paper.txt"
+    path.write_text("original content", encoding="utf-8")
+    return str(path)
+
+
+def test_repeat_extraction_is_served_from_cache(cache_dir, source_file):
+    calls = []
+
+    def extract(file_path):
+        calls.append(file_path)
+        return "parsed text"
+
+    assert ExtractionCache.cached(source_file, "txt", 1, extract) == "parsed text"
+    assert ExtractionCache.cached(source_file, "txt", 1, extract) == "parsed text"
+    assert len(calls) == 1
+
+
+def test_parser_version_and_content_change_miss(cache_dir, source_file):
+    calls = []
+
+    def extract(file_path):
+        calls.append(file_path)
+        return f"parsed {len(calls)}"
+
+    ExtractionCache.cached(source_file, "txt", 1, extract)
+    ExtractionCache.cached(source_file, "txt", 2, extract)
+    with open(source_file, "w", encoding="utf-8") as f:
+        f.write("edited content")
+    ExtractionCache.cached(source_file, "txt", 2, extract)
+    assert len(calls) == 3
+
+
+def test_eviction_removes_least_recently_used(cache_dir):
+    ExtractionCache.put("a" * 64, "txt", 1, "x" * 100)
+    ExtractionCache.put("b" * 64, "txt", 1, "y" * 100)
+    old_path = ExtractionCache.entry_path("a" * 64, "txt", 1)
+    os.utime(old_path, (0, 0))
+
+    removed = ExtractionCache.evict(max_bytes=150)
+
+    assert removed == 1
+    assert ExtractionCache.get("a" * 64, "txt", 1) is None
+    assert ExtractionCache.get("b" * 64, "txt", 1) == "y" * 100
+
+
+def test_put_only_scans_the_directory_over_the_limit(cache_dir, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_MAX_MB", 1)
+    scans = []
+    list_entries = ExtractionCache.list_entries
+    monkeypatch.setattr(ExtractionCache, "list_entries", staticmethod(
+        lambda directory: scans.append(directory) or list_entries(directory)))
+
+    for name in "abcd":
+        ExtractionCache.put(name * 64, "txt", 1, "x" * 1000)
+    # Counted once when first seen, then tracked incrementally
+    assert len(scans) == 1
+
+    ExtractionCache.put("e" * 64, "txt", 1, "y" * (1024 * 1024 - 2500))
+    assert len(scans) == 2
+    assert ExtractionCache.get("b" * 64, "txt", 1) is None
+    assert ExtractionCache.get("c" * 64, "txt", 1) is not None
+    assert ExtractionCache._sizes[str(cache_dir)] == sum(
+        path.stat().st_size for path in cache_dir.glob("*.json"))
@@ -0,0 +1,121 @@
+import io
+import os
+import time
+import asyncio
+import hashlib
+from datetime import datetime
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.file_manager.catalog import FileCatalogService
+from app.services.file_manager.file_service import FileService
+
+
+@pytest.fixture
+def upload_dir(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(FileService, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(FileService, "UPLOAD_CHUNK_SIZE", 4)
+    return tmp_path
+
+
+def upload(filename, content):
+    return asyncio.run(FileService.save_file(
+        UploadFile(file=io.BytesIO(content), filename=filename)))
+
+
+def test_upload_is_streamed_hashed_and_catalogued(upload_dir):
+    stored = upload("my paper.txt", b"some research notes")
+    assert stored["filename"] == "my_paper.txt"
+    assert stored["size"] == 19
+    assert stored["sha256"] == hashlib.sha256(b"some research notes").hexdigest()
+    assert (upload_dir / "my_paper.txt").read_bytes() == b"some research notes"
+    assert FileCatalogService.get_hash("my_paper.txt", str(upload_dir / "my_paper.txt")) == stored["sha256"]
+    assert not list(upload_dir.glob("*.part"))
+
+
+def test_identical_upload_is_deduplicated(upload_dir):
+    upload("first.txt", b"same bytes")
+    stored = upload("second.txt", b"same bytes")
+    assert stored["filename"] == "first.txt"
+    assert sorted(path.name for path in upload_dir.iterdir() if path.suffix == ".txt") == ["first.txt"]
+
+    with pytest.raises(HTTPException) as error:
+        upload("first.txt", b"different bytes")
+    assert error.value.status_code == 400
+
+
+def test_upload_over_limit_is_rejected_while_streaming(upload_dir, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.UPLOAD_MAX_MB", 0)
+    with pytest.raises(HTTPException) as error:
+        upload("big.txt", b"x" * 10)
+    assert error.value.status_code == 413
+    assert not list(upload_dir.glob("*.txt"))
+    assert not list(upload_dir.glob("*.part"))
+
+
+def test_upload_over_declared_length_is_rejected_before_reading(upload_dir, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.UPLOAD_MAX_MB", 0)
+
+    def unread(*args, **kwargs):
+        raise AssertionError("the body should not be read")
+
+    monkeypatch.setattr("starlette.requests.Request.form", unread)
+    response = TestClient(app).post(
+        "/api/v1/files/upload", files={"file": ("big.txt", b"x" * (FileService.MULTIPART_OVERHEAD + 1))})
+    assert response.status_code == 413
+
+
+def test_stale_partial_uploads_are_removed(upload_dir):
+    (upload_dir / "old.part").write_bytes(b"partial")
+    (upload_dir / "fresh.part").write_bytes(b"partial")
+    stale = time.time() - FileService.PARTIAL_UPLOAD_MAX_AGE - 1
+    os.utime(upload_dir / "old.part", (stale, stale))
+    assert FileService.remove_partial_uploads() == 1
+    assert [path.name for path in upload_dir.glob("*.part")] == ["fresh.part"]
+
+
+def test_catalog_listing_is_paginated_and_sorted(upload_dir):
+    for name, content in [("b.txt", b"bb"), ("a.txt", b"aaaa"), ("c.txt", b"c")]:
+        upload(name, content)
+
+    files, total = FileService.get_file_list(offset=0, limit=2, sort="size", order="desc")
+    assert total == 3
+    assert [entry["filename"] for entry in files] == ["a.txt", "b.txt"]
+    files, _ = FileService.get_file_list(offset=2, limit=2, sort="size", order="desc")
+    assert [entry["filename"] for entry in files] == ["c.txt"]
+
+    FileCatalogService.update_status("c.txt", "ingested", chunk_count=7, page_count=None)
+    files, total = FileService.get_file_list(status="ingested")
+    assert total == 1
+    assert files[0]["chunk_count"] == 7
+    assert files[0]["ingested_at"] is not None
+
+
+def test_sync_catalogs_files_that_predate_the_catalog(upload_dir):
+    upload("known.txt", b"known")
+    (upload_dir / "legacy.pdf").write_bytes(b"%PDF-legacy")
+    FileCatalogService.add("gone.txt", 1, "0" * 64)
+
+    result = FileCatalogService.sync(str(upload_dir), FileService.SUPPORTED_EXTENSIONS)
+    assert result == {"added": 1, "removed": 1}
+    legacy = FileCatalogService.get("legacy.pdf")
+    assert legacy["sha256"] == hashlib.sha256(b"%PDF-legacy").hexdigest()
+    # Stored in UTC like uploads, not in the server's local time
+    assert legacy["uploaded_at"] == datetime.utcfromtimestamp((upload_dir / "legacy.pdf").stat().st_mtime)
+    assert legacy["mime_type"] == "application/pdf"
+    assert FileCatalogService.get("gone.txt") is None
+
+
+def test_sync_keeps_a_file_uploaded_while_listing(upload_dir, monkeypatch):
+    listdir = os.listdir
+
+    def listdir_then_upload(path):
+        names = listdir(path)
+        upload("late.txt", b"late")
+        return names
+
+    monkeypatch.setattr(os, "listdir", listdir_then_upload)
+    assert FileCatalogService.sync(str(upload_dir), FileService.SUPPORTED_EXTENSIONS) == \
+        {"added": 0, "removed": 0}
+    assert FileCatalogService.get("late.txt") is not None
@@ -0,0 +1,126 @@
+import time
+import threading
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from app.services.rag.chunking import ChunkingService
+from app.services.rag.ingestion_jobs import IngestionJobService
+
+
+@pytest.fixture
+def job_db(temp_db):
+    yield temp_db
+    IngestionJobService.shutdown()
+
+
+def wait_for(job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = IngestionJobService.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+
+def test_job_runs_in_background_and_reports_progress(job_db, monkeypatch):
+    def fake_ingest(filename, progress=None):
+        for stage in ("parse", "split", "embed", "write"):
+            progress(stage, 1.0)
+        return {"chunk_count": 3, "timings": {}, "chunks_per_second": None}
+
+    monkeypatch.setattr(ChunkingService, "ingest_file",
+                        staticmethod(fake_ingest))
+
+    job = IngestionJobService.submit("paper.pdf")
+    assert job["status"] == "queued"
+
+    job = wait_for(job["job_id"], {"completed", "failed"})
+    assert job["status"] == "completed"
+    assert job["result"]["chunk_count"] == 3
+    assert job["progress"] == 1.0
+    assert job["stages"]["embed"] == 1.0
+
+
+def test_running_job_can_be_cancelled(job_db, monkeypatch):
+    started = threading.Event()
+
+    def slow_ingest(filename, progress=None):
+        started.set()
+        for step in range(500):
+            progress("embed", step / 500)
+            time.sleep(0.01)
+        return {"chunk_count": 1}
+
+    monkeypatch.setattr(ChunkingService, "ingest_file",
+                        staticmethod(slow_ingest))
+
+    job = IngestionJobService.submit("paper.pdf")
+    assert started.wait(timeout=5)
+    IngestionJobService.cancel(job["job_id"])
+
+    job = wait_for(job["job_id"], {"cancelled", "completed"})
+    assert job["status"] == "cancelled"
+
+
+def test_shutdown_leaves_running_jobs_for_the_next_start(job_db, monkeypatch):
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def slow_ingest(filename, progress=None):
+        started.set()
+        try:
+            for step in range(500):
+                progress("parse", step / 500)
+                time.sleep(0.01)
+        finally:
+            stopped.set()
+        return {"chunk_count": 1}
+
+    monkeypatch.setattr(ChunkingService, "ingest_file",
+                        staticmethod(slow_ingest))
+
+    job = IngestionJobService.submit("paper.pdf")
+    assert started.wait(timeout=5)
+    IngestionJobService.shutdown()
+    assert stopped.wait(timeout=5)
+    time.sleep(0.05)
+    assert IngestionJobService.get(job["job_id"])["status"] == "running"
+
+
+def test_failed_job_records_error(job_db, monkeypatch):
+    def broken_ingest(filename, progress=None):
+        raise ValueError("parser exploded")
+
+    monkeypatch.setattr(ChunkingService, "ingest_file",
+                        staticmethod(broken_ingest))
+
+    job = IngestionJobService.submit("paper.pdf")
+    job = wait_for(job["job_id"], {"failed", "completed"})
+    assert job["status"] == "failed"
+    assert "parser exploded" in job["error"]
+
+
+def test_job_cancelled_while_being_claimed_does_not_run(job_db, monkeypatch):
+    ran = []
+    monkeypatch.setattr(ChunkingService, "ingest_file",
+                        staticmethod(lambda filename, progress=None: ran.append(filename)))
+    monkeypatch.setattr(IngestionJobService, "get_executor",
+                        staticmethod(lambda: SimpleNamespace(submit=lambda *args: None)))
+    job = IngestionJobService.submit("paper.pdf")
+
+    class CancelOnClaim(datetime):
+        cancelled = False
+
+        @classmethod
+        def utcnow(cls):
+            # cancel() lands between the worker's read and its write
+            if not cls.cancelled:
+                cls.cancelled = True
+                IngestionJobService.cancel(job["job_id"])
+            return datetime.utcnow()
+
+    monkeypatch.setattr("app.services.rag.ingestion_jobs.datetime", CancelOnClaim)
+    IngestionJobService.run(job["job_id"])
+    assert ran == []
+    assert IngestionJobService.get(job["job_id"])["status"] == "cancelled"
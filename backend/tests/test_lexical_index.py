@@ -0,0 +1,88 @@
+import threading
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.lexical_index import LexicalCollection, LexicalTerm
+from app.services.rag.lexical_index import LexicalIndexService
+
+
+def test_tokenize_normalizes_case_and_yo():
+    assert LexicalIndexService.tokenize("Ёмкость и BM25-индекс, E=mc2") == \
+        ["емкость", "bm25", "индекс", "e", "mc2"]
+
+
+def test_search_ranks_exact_terms(temp_db):
+    LexicalIndexService.add(
+        ["a_1", "a_2"],
+        ["Метод градиентного спуска для обучения нейросетей",
+         "Сходимость стохастического градиентного спуска SGD"],
+        "a.pdf", collection="test")
+    LexicalIndexService.add(
+        ["b_1"], ["Трансформеры и механизм внимания"], "b.pdf", collection="test")
+
+    hits = LexicalIndexService.search("SGD градиентного", 5, collection="test")
+    assert [chunk_id for chunk_id, _ in hits] == ["a_2", "a_1"]
+    assert LexicalIndexService.search("внимания", 5, collection="other") == []
+    assert LexicalIndexService.search(
+        "градиентного внимания", 5, collection="test", filenames=["b.pdf"])[0][0] == "b_1"
+    assert len(LexicalIndexService.search(
+        "градиентного внимания", 5, collection="test", filenames=["b.pdf"])) == 1
+
+
+def test_remove_file_and_reindex(temp_db):
+    LexicalIndexService.add(["a_1"], ["alpha beta"], "a.txt", collection="test")
+    LexicalIndexService.add(["b_1"], ["alpha gamma"], "b.txt", collection="test")
+    # Re-adding a chunk replaces its postings instead of duplicating them
+    LexicalIndexService.add(["b_1"], ["alpha delta"], "b.txt", collection="test")
+    assert LexicalIndexService.search("gamma", 5, collection="test") == []
+
+    LexicalIndexService.remove_file("a.txt", collection="test")
+    assert [chunk_id for chunk_id, _ in LexicalIndexService.search(
+        "alpha", 5, collection="test")] == ["b_1"]
+
+
+def test_statistics_follow_adds_and_removes(temp_db):
+    LexicalIndexService.add(["a_1", "a_2"], ["alpha beta", "alpha of the gamma"], "a.txt", collection="test")
+    LexicalIndexService.add(["b_1"], ["alpha delta delta"], "b.txt", collection="test")
+    LexicalIndexService.remove(["a_2"], collection="test")
+    with SessionLocal() as session:
+        stats = session.get(LexicalCollection, "test")
+        assert (stats.document_count, stats.total_length) == (2, 5)
+        assert dict(session.query(LexicalTerm.term, LexicalTerm.df).filter(
+            LexicalTerm.collection == "test")) == {"alpha": 2, "beta": 1, "delta": 1}
+
+    # Statistics of an index built before they were kept are recomputed
+    with SessionLocal() as session:
+        session.query(LexicalTerm).delete()
+        session.query(LexicalCollection).delete()
+        session.commit()
+    assert [chunk_id for chunk_id, _ in LexicalIndexService.search(
+        "delta", 5, collection="test")] == ["b_1"]
+    with SessionLocal() as session:
+        assert session.get(LexicalCollection, "test").document_count == 2
+
+
+def test_stopwords_and_postings_cap(temp_db, monkeypatch):
+    assert LexicalIndexService.search("the и of", 5, collection="test") == []
+    LexicalIndexService.add(
+        [f"c_{i}" for i in range(5)], ["common " * (i + 1) for i in range(5)], "c.txt", collection="test")
+    monkeypatch.setattr(settings, "LEXICAL_MAX_POSTINGS", 2)
+    assert {chunk_id for chunk_id, _ in LexicalIndexService.search(
+        "common", 5, collection="test")} == {"c_3", "c_4"}
+
+
+def test_concurrent_adds_keep_statistics(temp_db):
+    def add(worker):
+        for i in range(5):
+            LexicalIndexService.add(
+                [f"w{worker}_{i}"], [f"alpha beta{worker}"], f"{worker}.txt", collection="test")
+
+    threads = [threading.Thread(target=add, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with SessionLocal() as session:
+        stats = session.get(LexicalCollection, "test")
+        assert (stats.document_count, stats.total_length) == (20, 40)
+        assert session.query(LexicalTerm.df).filter(
+            LexicalTerm.collection == "test", LexicalTerm.term == "alpha").scalar() == 20
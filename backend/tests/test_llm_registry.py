@@ -0,0 +1,34 @@
+from app.schemas.chat import LLMProvider
+from app.services.llm.base import BaseLLMService
+from app.services.llm.registry import LLMServiceRegistry
+
+
+class CountingLLMService(BaseLLMService):
+    builds = 0
+
+    def get_llm(self):
+        CountingLLMService.builds += 1
+        return lambda prompt_value: "ok"
+
+
+def test_registry_reuses_service_instances():
+    LLMServiceRegistry.clear()
+    try:
+        first = LLMServiceRegistry.get(LLMProvider.CHATGPT)
+        second = LLMServiceRegistry.get("chatgpt")
+        assert first is second
+    finally:
+        LLMServiceRegistry.clear()
+
+
+def test_unsupported_provider():
+    assert not LLMServiceRegistry.is_supported("invalid")
+    assert LLMServiceRegistry.is_supported(LLMProvider.GIGACHAT)
+
+
+def test_client_is_built_once():
+    CountingLLMService.builds = 0
+    service = CountingLLMService()
+    assert service.generate_response("a") == "ok"
+    assert service.generate_response("b") == "ok"
+    assert CountingLLMService.builds == 1
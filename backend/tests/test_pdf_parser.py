@@ -0,0 +1,140 @@
+import time
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.utils import pdf_parser
+from app.utils.pdf_parser import PDFParser
+
+
+class FakePage:
+    def __init__(self, text, images=()):
+        self.text = text
+        self.images = list(images)
+
+    def extract_text(self):
+        return self.text
+
+
+class FakePDF:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+BODY = "This page has a proper text layer with plenty of words in it. " * 3
+
+
+def test_classify_page():
+    assert PDFParser.classify_page(BODY, has_images=False) == "text"
+    assert PDFParser.classify_page(BODY, has_images=True) == "text"
+    assert PDFParser.classify_page("", has_images=True) == "ocr"
+    assert PDFParser.classify_page("~~ | ~~ | ~~ " * 10, has_images=True) == "ocr"
+    assert PDFParser.classify_page("Appendix", has_images=False) == "text"
+    assert PDFParser.classify_page("", has_images=False) == "empty"
+
+
+@pytest.fixture
+def mixed_pdf(monkeypatch):
+    pages = [
+        FakePage(BODY),
+        FakePage("", images=[{}]),
+        FakePage(""),
+        FakePage("", images=[{}]),
+    ]
+    monkeypatch.setattr(pdf_parser.pdfplumber, "open",
+                        lambda file_path: FakePDF(pages))
+    ocr_requests = []
+
+    def fake_ocr(file_path, page_numbers, progress=None):
+        ocr_requests.append(page_numbers)
+        return [f"scanned page {number}" for number in page_numbers]
+
+    monkeypatch.setattr(PDFParser, "ocr_pages", staticmethod(fake_ocr))
+    return ocr_requests
+
+
+def test_only_pages_without_text_layer_are_ocred(mixed_pdf):
+    pages = PDFParser.parse_pages("paper.pdf")
+
+    assert mixed_pdf == [[2, 4]]
+    assert [page["method"] for page in pages] == ["text", "ocr", "empty", "ocr"]
+    assert pages[1]["text"] == "scanned page 2"
+    assert pages[0]["text"] == BODY
+
+
+def test_ocr_reports_every_page_and_stops_when_progress_raises(monkeypatch):
+    monkeypatch.setattr(PDFParser, "OCR_INLINE", True)
+    ocred = []
+    monkeypatch.setattr(pdf_parser, "ocr_page",
+                        lambda file_path, number, dpi, lang: ocred.append(number) or f"page {number}")
+    fractions = []
+    assert PDFParser.ocr_pages("scan.pdf", [1, 2, 3, 4], fractions.append) == [
+        "page 1", "page 2", "page 3", "page 4"]
+    assert fractions == [0.25, 0.5, 0.75, 1.0]
+
+    def cancel_after_two(fraction):
+        if fraction >= 0.5:
+            raise RuntimeError("cancelled")
+
+    ocred.clear()
+    with pytest.raises(RuntimeError):
+        PDFParser.ocr_pages("scan.pdf", [1, 2, 3, 4], cancel_after_two)
+    assert ocred == [1, 2]
+
+
+def test_ocr_keeps_a_sliding_window_of_pages_in_flight(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=8)
+    monkeypatch.setattr(PDFParser, "get_ocr_pool", staticmethod(lambda: pool))
+    monkeypatch.setattr(PDFParser, "get_ocr_worker_count", staticmethod(lambda: 1))
+    monkeypatch.setattr(PDFParser, "OCR_PAGES_PER_WORKER", 2)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+    third_started = threading.Event()
+
+    def fake_ocr(file_path, number, dpi, lang):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        if number == 3:
+            third_started.set()
+        # Page 1 only finishes once page 3 has replaced the finished page 2
+        if number == 1:
+            assert third_started.wait(timeout=2)
+        else:
+            time.sleep(0.01)
+        with lock:
+            running["now"] -= 1
+        return f"page {number}"
+
+    monkeypatch.setattr(pdf_parser, "ocr_page", fake_ocr)
+    try:
+        assert PDFParser.ocr_pages("scan.pdf", [1, 2, 3, 4, 5, 6]) == [
+            f"page {number}" for number in range(1, 7)]
+    finally:
+        pool.shutdown()
+    assert running["max"] == 2
+
+
+def test_pdf_cache_entries_are_keyed_by_parsing_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_ENABLED", True)
+    source = tmp_path / "paper.pdf"
+    source.write_bytes(b"%PDF-cached")
+    calls = []
+    monkeypatch.setattr(PDFParser, "parse_pages",
+                        staticmethod(lambda path, progress=None: calls.append(path) or []))
+
+    PDFParser.extract_pages(str(source))
+    PDFParser.extract_pages(str(source))
+    assert len(calls) == 1
+    monkeypatch.setattr(settings, "OCR_DPI", settings.OCR_DPI + 100)
+    PDFParser.extract_pages(str(source))
+    monkeypatch.setattr(settings, "PDF_MIN_ALNUM_RATIO", 0.9)
+    PDFParser.extract_pages(str(source))
+    assert len(calls) == 3
@@ -0,0 +1,112 @@
+import time
+import pytest
+from app.services.rag.reranker import RerankerService
+
+
+class FakeCrossEncoder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = 0
+
+    def predict(self, pairs, batch_size):
+        self.batches += 1
+        time.sleep(self.delay)
+        # Score by how often the query word occurs in the text
+        return [text.count(query) for query, text in pairs]
+
+
+HITS = [{"id": f"c{i}", "text": text, "score": -float(i)} for i, text in enumerate(
+    ["nothing here", "rag once", "rag rag rag", "rag rag"])]
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeCrossEncoder()
+    monkeypatch.setattr(RerankerService, "get_model",
+                        staticmethod(lambda *args: model))
+    RerankerService.clear()
+    yield model
+    RerankerService.clear()
+
+
+def test_rerank_orders_by_cross_encoder_score(fake_model, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.RERANK_BATCH_SIZE", 3)
+    hits, reranked = RerankerService.rerank("rag", HITS, 2, budget_ms=0)
+    assert reranked
+    assert [hit["id"] for hit in hits] == ["c2", "c3"]
+    assert hits[0]["retrieval_score"] == -2.0
+    assert fake_model.batches == 2
+
+
+def test_rerank_keeps_retrieval_order_over_budget(fake_model, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.RERANK_BATCH_SIZE", 1)
+    fake_model.delay = 0.02
+    hits, reranked = RerankerService.rerank("rag", HITS, 2, budget_ms=10)
+    assert not reranked
+    assert [hit["id"] for hit in hits] == ["c0", "c1"]
+    # Scoring stops at the first batch boundary past the budget
+    assert fake_model.batches == 1
+    assert RerankerService.get_stats()["budget_exceeded"] == 1
+
+
+def test_rerank_uses_scores_when_only_the_last_batch_overruns(fake_model, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.RERANK_BATCH_SIZE", 4)
+    fake_model.delay = 0.02
+    hits, reranked = RerankerService.rerank("rag", HITS, 2, budget_ms=10)
+    assert reranked
+    assert [hit["id"] for hit in hits] == ["c2", "c3"]
+    assert RerankerService.get_stats()["budget_exceeded"] == 0
+
+
+def test_rerank_falls_back_when_model_fails(monkeypatch):
+    def broken(*args):
+        raise OSError("model not downloaded")
+
+    monkeypatch.setattr(RerankerService, "get_model", staticmethod(broken))
+    RerankerService.clear()
+    hits, reranked = RerankerService.rerank("rag", HITS, 3)
+    assert not reranked
+    assert [hit["id"] for hit in hits] == ["c0", "c1", "c2"]
+    assert RerankerService.get_stats()["fallbacks"] == 1
+
+
+def test_failed_load_is_not_retried_immediately(monkeypatch):
+    import sys
+    loads = []
+
+    class BrokenCrossEncoder:
+        def __init__(self, *args, **kwargs):
+            loads.append(args)
+            raise OSError("model not downloaded")
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        type(sys)("sentence_transformers"))
+    monkeypatch.setattr(sys.modules["sentence_transformers"], "CrossEncoder",
+                        BrokenCrossEncoder, raising=False)
+    RerankerService.clear()
+    for _ in range(3):
+        _, reranked = RerankerService.rerank("rag", HITS, 3)
+        assert not reranked
+    assert len(loads) == 1
+    assert RerankerService.get_stats()["fallbacks"] == 3
+    RerankerService.clear()
+
+
+def test_budget_fallback_is_not_cached(fake_model, monkeypatch):
+    from app.services.rag.retrieval import RetrievalService
+
+    monkeypatch.setattr(RetrievalService, "vector_search",
+                        staticmethod(lambda query, k, collection, where: [dict(hit) for hit in HITS]))
+    monkeypatch.setattr("app.core.config.settings.RERANK_BATCH_SIZE", 1)
+    RetrievalService.result_cache.clear()
+    fake_model.delay = 0.02
+    monkeypatch.setattr("app.core.config.settings.RERANK_BUDGET_MS", 10)
+    first = RetrievalService.retrieve("rag", 2, rerank=True)
+    assert [hit["id"] for hit in first] == ["c0", "c1"]
+
+    # Within budget the next request is re-ranked instead of served from cache
+    fake_model.delay = 0.0
+    monkeypatch.setattr("app.core.config.settings.RERANK_BUDGET_MS", 0)
+    second = RetrievalService.retrieve("rag", 2, rerank=True)
+    assert [hit["id"] for hit in second] == ["c2", "c3"]
+    RetrievalService.result_cache.clear()
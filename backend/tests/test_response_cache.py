@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from app.core.config import settings
+from app.services.llm.base import BaseLLMService
+from app.services.llm.response_cache import ResponseCache
+
+
+class FakeLLMService(BaseLLMService):
+    provider_name = "fake"
+    model_name = "fake-model"
+
+    def get_llm(self):
+        return FakeListChatModel(responses=["first", "second", "third"])
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_ENDPOINTS", {"chat"})
+    monkeypatch.setattr(settings, "LLM_CACHE_SEMANTIC_THRESHOLD", 0.0)
+    ResponseCache.clear()
+    yield ResponseCache
+    ResponseCache.clear()
+
+
+def test_exact_prompt_is_served_from_cache(cache):
+    service = FakeLLMService()
+    assert service.generate_response("hello", cache_scope="chat") == "first"
+    assert service.generate_response("hello", cache_scope="chat") == "first"
+    assert cache.get_stats()["endpoints"]["chat"] == {
+        "exact_hits": 1, "semantic_hits": 0, "misses": 1}
+
+
+def test_cache_is_opt_in_per_endpoint(cache):
+    service = FakeLLMService()
+    assert service.generate_response("hello", cache_scope="plan") == "first"
+    assert service.generate_response("hello", cache_scope="plan") == "second"
+    assert service.generate_response("hello") == "third"
+
+
+def test_near_duplicate_prompt_hits_semantic_cache(cache, monkeypatch):
+    vectors = {
+        "What is RAG?": np.array([1.0, 0.0]),
+        "what is rag": np.array([0.99, 0.14]),
+        "Something else": np.array([0.0, 1.0]),
+    }
+    monkeypatch.setattr(settings, "LLM_CACHE_SEMANTIC_THRESHOLD", 0.95)
+    embedded = []
+
+    def embed(prompt):
+        embedded.append(prompt)
+        return vectors[prompt] / np.linalg.norm(vectors[prompt])
+
+    monkeypatch.setattr(ResponseCache, "embed", staticmethod(embed))
+    service = FakeLLMService()
+
+    assert service.generate_response("What is RAG?", cache_scope="chat") == "first"
+    assert service.generate_response("what is rag", cache_scope="chat") == "first"
+    assert service.generate_response("Something else", cache_scope="chat") == "second"
+    assert cache.get_stats()["endpoints"]["chat"]["semantic_hits"] == 1
+    # A miss reuses the embedding from its lookup when caching the response
+    assert embedded == ["What is RAG?", "what is rag", "Something else"]
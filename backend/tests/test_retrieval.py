@@ -0,0 +1,140 @@
+import pytest
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from contextlib import contextmanager
+from app.core.config import settings
+from app.services.rag.retrieval import RetrievalService
+from app.services.rag.lexical_index import LexicalIndexService
+from app.services.rag.vector_store import VectorStoreManager
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text))]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.searches = 0
+        self.where = None
+
+    def query(self, query_embeddings, n_results, include, where=None):
+        self.searches += 1
+        self.where = where
+        ids = [f"c{i}" for i in range(n_results)]
+        return {"ids": [ids], "documents": [[f"chunk {i}" for i in range(n_results)]],
+                "metadatas": [[{} for _ in ids]], "distances": [[float(i) for i in range(n_results)]]}
+
+    def get(self, ids, include, where=None):
+        return {"ids": ids, "documents": [f"chunk {chunk_id[1:]}" for chunk_id in ids],
+                "metadatas": [{} for _ in ids]}
+
+
+class FakeStore:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+    @property
+    def searches(self):
+        return self._collection.searches
+
+
+@pytest.fixture
+def fake_retrieval(temp_db, monkeypatch):
+    model = FakeModel()
+    store = FakeStore()
+
+    @contextmanager
+    def read(*args, **kwargs):
+        yield store
+
+    monkeypatch.setattr(VectorStoreManager, "read", staticmethod(read))
+    monkeypatch.setattr(RetrievalService, "get_embedding_model",
+                        staticmethod(lambda binding: model))
+    RetrievalService.query_embedding_cache.clear()
+    RetrievalService.result_cache.clear()
+    yield model, store
+    RetrievalService.query_embedding_cache.clear()
+    RetrievalService.result_cache.clear()
+
+
+def test_repeated_query_hits_caches(fake_retrieval):
+    model, store = fake_retrieval
+    first = RetrievalService.retrieve_relevant_chunks("what is  RAG?", 2, "chatgpt")
+    second = RetrievalService.retrieve_relevant_chunks(" what is RAG? ", 2, "chatgpt")
+    assert first == second == ["chunk 0", "chunk 1"]
+    assert model.calls == 1
+    assert store.searches == 1
+
+
+def test_collection_write_invalidates_results(fake_retrieval):
+    model, store = fake_retrieval
+    RetrievalService.retrieve_relevant_chunks("query", 2, "chatgpt")
+    VectorStoreManager.bump_version()
+    RetrievalService.retrieve_relevant_chunks("query", 2, "chatgpt")
+    assert store.searches == 2
+    # the query embedding does not depend on the collection contents
+    assert model.calls == 1
+
+
+def test_query_embeddings_are_cached_per_backend(fake_retrieval, monkeypatch):
+    model, store = fake_retrieval
+    binding = {"embedding_model": "model", "normalize": False, "query_prefix": "", "dimension": None}
+    RetrievalService.embed_query("query", binding)
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx-int8")
+    RetrievalService.embed_query("query", binding)
+    assert model.calls == 2
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    vector = [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}, {"id": "c", "text": "C"}]
+    keyword = [{"id": "c", "text": "C"}, {"id": "d", "text": "D"}]
+    fused = RetrievalService.reciprocal_rank_fusion([vector, keyword], k=60)
+    assert [hit["id"] for hit in fused] == ["c", "a", "b", "d"]
+
+
+def test_keyword_mode_skips_query_embedding(fake_retrieval, monkeypatch):
+    model, store = fake_retrieval
+    monkeypatch.setattr(LexicalIndexService, "search",
+                        staticmethod(lambda query, k, *args: [("c3", 2.0), ("c1", 1.0)]))
+    chunks = RetrievalService.retrieve_relevant_chunks("query", 2, "chatgpt", mode="keyword")
+    assert chunks == ["chunk 3", "chunk 1"]
+    assert model.calls == 0
+    assert store.searches == 0
+
+
+def test_hybrid_mode_fuses_both_rankings(fake_retrieval, monkeypatch):
+    model, store = fake_retrieval
+    monkeypatch.setattr(LexicalIndexService, "search",
+                        staticmethod(lambda query, k, *args: [("c5", 3.0), ("c1", 1.0)]))
+    hits = RetrievalService.retrieve("query", 2, mode="hybrid")
+    # Chunks found by both searches beat the top vector-only hit
+    assert [hit["id"] for hit in hits] == ["c1", "c5"]
+    assert model.calls == 1
+
+
+def test_build_where_combines_filters():
+    assert RetrievalService.build_where() is None
+    assert RetrievalService.build_where(filenames=["a.pdf"]) == {"filename": {"$in": ["a.pdf"]}}
+    where = RetrievalService.build_where(
+        tags=["nlp"], ingested_after=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert where == {"$and": [{"tag:nlp": True}, {"ingested_at": {"$gte": 1704067200}}]}
+
+
+def test_filters_are_pushed_down_and_cached_separately(fake_retrieval):
+    model, store = fake_retrieval
+    RetrievalService.retrieve("query", 2, filenames=["a.pdf"])
+    assert store._collection.where == {"filename": {"$in": ["a.pdf"]}}
+    RetrievalService.retrieve("query", 2, filenames=["b.pdf"])
+    RetrievalService.retrieve("query", 2, filenames=["b.pdf"])
+    assert store.searches == 2
+
+
+def test_invalid_collection_name_is_rejected(fake_retrieval):
+    with pytest.raises(HTTPException) as error:
+        RetrievalService.retrieve("query", 2, collection="a")
+    assert error.value.status_code == 400
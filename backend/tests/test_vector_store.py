@@ -0,0 +1,47 @@
+import pytest
+import threading
+from app.services.rag.vector_store import ReadWriteLock, VectorStoreClosed, VectorStoreManager
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    with lock.read():
+        acquired = threading.Event()
+
+        def reader():
+            with lock.read():
+                acquired.set()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        assert acquired.wait(timeout=1)
+        thread.join()
+
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    written = threading.Event()
+
+    def writer():
+        with lock.write():
+            written.set()
+
+    with lock.read():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert not written.wait(timeout=0.1)
+
+    assert written.wait(timeout=1)
+    thread.join()
+
+
+def test_closed_store_is_not_reopened_implicitly(monkeypatch):
+    monkeypatch.setattr(VectorStoreManager, "_create_client", staticmethod(lambda: object()))
+    monkeypatch.setattr(VectorStoreManager, "_client", None)
+    VectorStoreManager.open()
+    VectorStoreManager.close()
+    try:
+        with pytest.raises(VectorStoreClosed):
+            VectorStoreManager.get_client()
+    finally:
+        VectorStoreManager._closed = False